@@ -0,0 +1,66 @@
+# api/caching.py
+
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+from content.catalogue import get_catalogue_version
+from progress.versions import get_progress_version
+
+RESPONSE_KEY = 'api:{view}:{user_id}:{etag}'
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+def cached_progress_response(view):
+    """
+    Кеширует ответ GET-эндпоинта статистики для пользователя.
+
+    ETag строится из версии прогресса пользователя, версии каталога
+    и текущей даты. Совпадение с If-None-Match дает 304 без обращения
+    к таблицам прогресса, иначе ответ берется из кеша или строится заново.
+    Ставится под @api_view, чтобы request.user уже был определен.
+    Работает только с settings.PROGRESS_RESPONSE_CACHE (нужен общий кеш).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.PROGRESS_RESPONSE_CACHE:
+            return view(request, *args, **kwargs)
+
+        user = request.user
+        progress_version = get_progress_version(user.pk)
+        catalogue_version = get_catalogue_version()
+        if progress_version is None or catalogue_version is None:
+            # Кеш отключен
+            return view(request, *args, **kwargs)
+
+        today = timezone.now().date().isoformat()
+        digest = hashlib.md5(
+            f'{view.__name__}:{user.pk}:{progress_version}:{catalogue_version}:{today}'.encode()
+        ).hexdigest()
+        etag = f'"{digest}"'
+
+        if _etag_matches(request, etag):
+            response = Response(status=304)
+        else:
+            key = RESPONSE_KEY.format(view=view.__name__, user_id=user.pk, etag=digest)
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data, settings.PROGRESS_CACHE_TIMEOUT)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return wrapper
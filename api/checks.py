@@ -0,0 +1,17 @@
+# api/checks.py
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_response_cache_backend(app_configs, **kwargs):
+    """Кеш ответов статистики (api/caching.py) требует общего для воркеров кеша"""
+    if settings.PROGRESS_RESPONSE_CACHE and settings.CACHES['default']['BACKEND'] in settings.LOCAL_CACHE_BACKENDS:
+        return [Warning(
+            'PROGRESS_RESPONSE_CACHE включен с кешем в памяти процесса: '
+            'другие воркеры будут отдавать устаревшую статистику и 304.',
+            hint='Задайте общий кеш (CACHE_URL=rediscache://...) или PROGRESS_RESPONSE_CACHE=False.',
+            id='api.W001',
+        )]
+    return []
@@ -0,0 +1,234 @@
+# api/management/commands/bench_api.py
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from api.views import MAX_ANSWERS_BATCH
+from content.catalogue import get_catalogue, bump_catalogue_version
+from content.fixtures import seed_catalogue
+from core.metrics import QueryCounter, percentile
+from users.fixtures import create_paid_user
+
+
+class Stats:
+    """Время ответа и число SQL-запросов по каждому шагу сценария"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.first_errors = {}
+
+    def record(self, step, duration, queries, error=None):
+        with self._lock:
+            self.samples.setdefault(step, []).append((duration, queries))
+            if error is not None:
+                self.errors[step] = self.errors.get(step, 0) + 1
+                self.first_errors.setdefault(step, error)
+
+    def report(self, elapsed):
+        steps = {}
+        for step, samples in self.samples.items():
+            durations = [duration * 1000 for duration, _ in samples]
+            queries = [count for _, count in samples]
+            steps[step] = {
+                'requests': len(samples),
+                'errors': self.errors.get(step, 0),
+                'first_error': self.first_errors.get(step),
+                'rps': round(len(samples) / elapsed, 2),
+                'latency_ms': {
+                    'mean': round(sum(durations) / len(durations), 2),
+                    'p50': round(percentile(durations, 0.5), 2),
+                    'p95': round(percentile(durations, 0.95), 2),
+                    'p99': round(percentile(durations, 0.99), 2),
+                    'max': round(max(durations), 2),
+                },
+                'queries': {
+                    'mean': round(sum(queries) / len(queries), 2),
+                    'max': max(queries),
+                },
+            }
+        return steps
+
+
+class Session:
+    """Один пользователь, проходящий первый блок через тестовый клиент"""
+
+    def __init__(self, stats, user, block, answers_per_word, progress='batch'):
+        self.stats = stats
+        self.user = user
+        self.block = block
+        self.answers_per_word = answers_per_word
+        self.progress = progress
+        self.client = Client(raise_request_exception=False)
+
+    def call(self, step, url, data=None):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            if data is None:
+                response = self.client.get(url, secure=True)
+            else:
+                response = self.client.post(url, json.dumps(data), content_type='application/json', secure=True)
+        duration = time.perf_counter() - start
+
+        error = None
+        if response.status_code >= 400:
+            error = f'{response.status_code} {response.content[:200].decode(errors="replace")}'
+        elif step == 'token_login' and not response.json().get('success'):
+            # token_login сообщает об ошибке в теле ответа со статусом 200
+            error = response.json().get('error', 'login failed')
+        self.stats.record(step, duration, counter.count, error)
+        return response, error is None
+
+    def run(self):
+        try:
+            _, ok = self.call('token_login', reverse('token_login'), {'token': str(self.user.auth_token)})
+            if not ok:
+                return
+            self.call('api_dashboard', reverse('api_dashboard'))
+            self.call('block_detail', reverse('block_detail', kwargs={'block_id': self.block.id}))
+
+            for lesson in self.block.active_lessons:
+                self.call('lesson_detail', reverse('lesson_detail', kwargs={'lesson_id': lesson.id}))
+                self.answer(lesson)
+                self.call('complete_lesson', reverse('complete_lesson'), {'lesson_id': lesson.id, 'score': 100})
+
+            response, ok = self.call(
+                'start_block_test', reverse('start_block_test', kwargs={'block_id': self.block.id})
+            )
+            if ok:
+                test = response.json()
+                catalogue = get_catalogue()
+                answers = {
+                    str(word['id']): catalogue.get_word(word['id']).translation
+                    for word in test['words']
+                }
+                self.call(
+                    'submit_block_test',
+                    reverse('submit_block_test', kwargs={'test_id': test['test_id']}),
+                    {'answers': answers},
+                )
+        finally:
+            # Соединения с базой у каждого потока свои
+            connection.close()
+
+    def answer(self, lesson):
+        answers = [
+            {'word_id': word.id, 'is_correct': True, 'time_spent': 5}
+            for _ in range(self.answers_per_word)
+            for word in lesson.words
+        ]
+        if self.progress == 'single':
+            for answer in answers:
+                self.call('update_progress', reverse('update_progress'), {**answer, 'lesson_id': lesson.id})
+            return
+        # Как PWA (flushProgress в static/js/lesson_detail.js): ответы урока
+        # копятся и уходят пакетом перед завершением урока
+        for start in range(0, len(answers), MAX_ANSWERS_BATCH):
+            self.call('update_progress_batch', reverse('update_progress_batch'), {
+                'lesson_id': lesson.id,
+                'answers': answers[start:start + MAX_ANSWERS_BATCH],
+            })
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный прогон API по сценарию урока: вход по токену, дашборд,
+    блок, уроки с ответами на слова, завершение уроков и тест блока.
+    Ответы по умолчанию уходят пакетом на урок, как из PWA, с
+    --progress=single - по одному запросу на ответ.
+
+    Работает на отдельной тестовой базе (как manage.py test) и с отдельным
+    префиксом ключей кеша, рабочие данные не затрагиваются. Пользователи
+    проходят сценарий параллельно в --concurrency потоках через тестовый
+    клиент Django, то есть со всеми middleware, но без сети и сервера.
+    Результат - JSON с пропускной способностью, перцентилями времени ответа
+    и числом SQL-запросов по шагам, удобен для сравнения сборок.
+    Для оценки параллельной нагрузки нужен PostgreSQL: SQLite
+    блокирует таблицы при одновременной записи.
+    """
+    help = 'Нагрузочный прогон API по сценарию урока'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Сколько пользователей проходят сценарий')
+        parser.add_argument('--concurrency', type=int, default=4, help='Параллельных потоков')
+        parser.add_argument('--blocks', type=int, default=3)
+        parser.add_argument('--lessons', type=int, default=5, help='Уроков в блоке')
+        parser.add_argument('--words', type=int, default=10, help='Слов в уроке')
+        parser.add_argument('--answers', type=int, default=3, help='Ответов на каждое слово')
+        parser.add_argument(
+            '--progress', choices=('batch', 'single'), default='batch',
+            help='Ответы пакетом на урок, как PWA (batch), или по одному (single)',
+        )
+        parser.add_argument('--label', default='', help='Метка прогона в результате (например, ревизия)')
+        parser.add_argument('--output', help='Файл для JSON-результата (по умолчанию - stdout)')
+        parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+
+    def handle(self, *args, **options):
+        caches = {
+            alias: {**config, 'KEY_PREFIX': f"bench-{uuid.uuid4().hex}:{config.get('KEY_PREFIX', '')}"}
+            for alias, config in settings.CACHES.items()
+        }
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(CACHES=caches):
+                result = self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(result, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Результат записан в {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run_benchmark(self, options):
+        if connection.vendor == 'sqlite' and options['concurrency'] > 1:
+            self.stderr.write(self.style.WARNING(
+                'SQLite блокирует таблицы при параллельной записи, ошибки "database table is locked" ожидаемы'
+            ))
+        seed_catalogue(options['blocks'], options['lessons'], options['words'])
+        bump_catalogue_version()
+        users = [create_paid_user(f'bench_{index}') for index in range(options['users'])]
+        block = get_catalogue().active_blocks[0]
+
+        stats = Stats()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            futures = [
+                executor.submit(Session(stats, user, block, options['answers'], options['progress']).run)
+                for user in users
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        steps = stats.report(elapsed)
+        total_requests = sum(step['requests'] for step in steps.values())
+        return {
+            'label': options['label'],
+            'database': connection.vendor,
+            'config': {
+                key: options[key]
+                for key in ('users', 'concurrency', 'blocks', 'lessons', 'words', 'answers', 'progress')
+            },
+            'elapsed_s': round(elapsed, 3),
+            'requests': total_requests,
+            'errors': sum(step['errors'] for step in steps.values()),
+            'rps': round(total_requests / elapsed, 2),
+            'sessions_per_s': round(len(users) / elapsed, 3),
+            'steps': steps,
+        }
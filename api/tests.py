@@ -1,3 +1,393 @@
-from django.test import TestCase
+# api/tests.py
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from content.models import Lesson, Word
+from content.catalogue import get_catalogue
+from progress.achievements import get_rules
+from progress.models import LessonProgress, BlockProgress, DailyProgress, UserSummary
+from progress.summary import get_user_summary
+from users.backends import get_cached_user
+from tests.factories import seed_catalogue, seed_progress, create_paid_user
+from .checks import check_response_cache_backend
+
+
+class ApiTestCase(TestCase):
+    """
+    Каталог 30 блоков x 10 уроков x 10 слов, у пользователя пройден
+    первый блок и начат второй. Кеши каталога, сводки пользователя
+    и аутентификации прогреты. Для проверяемого запроса тест передает
+    точное число SQL-запросов на горячем пути (queries), поэтому любое
+    лишнее обращение к базе видно сразу.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blocks = seed_catalogue()
+        cls.user = create_paid_user()
+        seed_progress(cls.user, cls.blocks)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        get_catalogue()
+        get_rules()
+        get_user_summary(self.user)
+        get_cached_user(self.user.pk)
+
+    def call(self, url_name, data=None, method='get', headers=None, queries=None, **kwargs):
+        url = reverse(url_name, kwargs=kwargs)
+        with CaptureQueriesContext(connection) as captured:
+            # Версии кешей меняются в on_commit - выполняем их как в проде
+            with self.captureOnCommitCallbacks(execute=True):
+                if method == 'get':
+                    response = self.client.get(url, headers=headers)
+                else:
+                    response = self.client.post(url, data or {}, content_type='application/json')
+
+        self.check_queries(url_name, len(captured), queries)
+        return response
+
+    def check_queries(self, url_name, count, expected):
+        if expected is not None:
+            self.assertEqual(count, expected, f'{url_name}: {count} SQL queries, expected {expected}')
+
+    def lesson(self, block_index, order):
+        return Lesson.objects.get(block=self.blocks[block_index], order=order)
+
+
+class ReadEndpointsTests(ApiTestCase):
+
+    def test_dashboard(self):
+        response = self.call('api_dashboard', queries=6)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {'user', 'stats', 'blocks', 'achievements'})
+        self.assertEqual(data['stats']['total_words'], 3000)
+        self.assertEqual(data['stats']['learned_words'], 100)
+        self.assertEqual(len(data['blocks']), 30)
+        self.assertFalse(data['blocks'][1]['is_locked'])
+        self.assertTrue(data['blocks'][2]['is_locked'])
+        self.assertEqual(data['blocks'][0]['learned_words'], 100)
+
+    def test_dashboard_for_new_user(self):
+        self.client.force_login(create_paid_user('newcomer'))
+
+        data = self.call('api_dashboard').json()
+
+        self.assertEqual(data['stats']['learned_words'], 0)
+        self.assertFalse(data['blocks'][0]['is_locked'])
+        self.assertTrue(all(block['is_locked'] for block in data['blocks'][1:]))
+
+    def test_progress_detailed(self):
+        response = self.call('progress_detailed', queries=6)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            set(data),
+            {'overview', 'chart_data', 'blocks_progress', 'time_distribution', 'achievements', 'study_habits'}
+        )
+        self.assertEqual(len(data['chart_data']), 30)
+        self.assertEqual(len(data['blocks_progress']), 30)
+        self.assertEqual(data['overview']['learned_words'], 100)
+        self.assertEqual(data['study_habits']['total_study_days'], 10)
+        self.assertEqual(set(data['time_distribution']), {'morning', 'afternoon', 'evening', 'night'})
+
+    def test_progress_detail(self):
+        response = self.call('progress_detail', queries=4)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {'weekly_progress', 'blocks_progress', 'recent_sessions'})
+        self.assertLessEqual(len(data['weekly_progress']), 8)
+        self.assertEqual(len(data['recent_sessions']), 5)
+
+    def test_user_profile(self):
+        data = self.call('user_profile', queries=4).json()
+
+        self.assertEqual(data['user']['id'], self.user.id)
+        self.assertEqual(data['stats']['learned_words'], 100)
+        self.assertEqual(len(data['blocks_progress']), 30)
+
+    def test_block_detail(self):
+        response = self.call('block_detail', queries=3, block_id=self.blocks[1].id)
+
+        self.assertEqual(response.status_code, 200)
+        lessons = response.json()['lessons']
+        self.assertEqual(len(lessons), 9)  # последний урок блока неактивен
+        self.assertFalse(lessons[0]['is_locked'])
+        self.assertTrue(lessons[1]['is_locked'])
+        self.assertEqual(len(lessons[0]['words']), 10)
+
+    def test_lesson_detail(self):
+        response = self.call('lesson_detail', queries=3, lesson_id=self.lesson(1, 1).id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {'lesson', 'words'})
+        self.assertEqual(len(response.json()['words']), 10)
+
+    def test_locked_lesson_detail(self):
+        response = self.call('lesson_detail', queries=1, lesson_id=self.lesson(1, 2).id)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(response.json()['is_locked'])
+
+    def test_not_modified(self):
+        first = self.call('api_dashboard')
+
+        second = self.call('api_dashboard', headers={'If-None-Match': first['ETag']}, queries=0)
+
+        self.assertEqual(second.status_code, 304)
+
+    @override_settings(PROGRESS_RESPONSE_CACHE=False)
+    def test_response_cache_disabled(self):
+        response = self.call('api_dashboard')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_local_cache_warning(self):
+        messages = check_response_cache_backend(None)
+
+        self.assertEqual([message.id for message in messages], ['api.W001'])
+
+    def test_etag_changes_after_answer(self):
+        first = self.call('api_dashboard')
+        word = self.lesson(1, 1).words.first()
+
+        self.call('update_progress', {'word_id': word.id, 'is_correct': True}, method='post')
+        second = self.call('api_dashboard', headers={'If-None-Match': first['ETag']})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+
+class WriteEndpointsTests(ApiTestCase):
+
+    def test_update_progress(self):
+        lesson = self.lesson(1, 1)
+        word = lesson.words.first()
+        data = {'word_id': word.id, 'is_correct': True, 'lesson_id': lesson.id}
+
+        # Первый ответ по уроку создает LessonProgress
+        self.call('update_progress', data, method='post', queries=15)
+        # Слово выучено: пересчет выученных слов урока
+        learned = self.call('update_progress', data, method='post', queries=13)
+        response = self.call('update_progress', data, method='post', queries=12)
+
+        self.assertTrue(learned.json()['progress']['is_learned'])
+        self.assertEqual(response.status_code, 200)
+        progress = response.json()['progress']
+        self.assertEqual(progress['total_attempts'], 6)  # 3 попытки из seed_progress
+        self.assertTrue(progress['is_learned'])
+        self.assertEqual(self.call('api_dashboard').json()['stats']['learned_words'], 101)
+
+    def test_update_progress_unknown_word(self):
+        response = self.call('update_progress', {'word_id': 10 ** 9, 'is_correct': True}, method='post')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_update_progress_batch(self):
+        lesson = self.lesson(1, 2)
+        answers = [
+            {'word_id': word.id, 'is_correct': True, 'time_spent': 10}
+            for word in lesson.words.all()
+            for _ in range(3)
+        ]
+
+        response = self.call(
+            'update_progress_batch', {'lesson_id': lesson.id, 'answers': answers + [{'word_id': 0}]}, method='post',
+            queries=21,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['processed'], 30)
+        self.assertEqual(data['skipped'], [0])
+        self.assertTrue(all(progress['is_learned'] for progress in data['progress'].values()))
+
+    def test_update_progress_rejects_foreign_words(self):
+        lesson = self.lesson(1, 1)
+        other = self.lesson(1, 2)
+        answers = [{'word_id': word.id, 'is_correct': True} for word in other.words.all()] * 3
+
+        batch = self.call('update_progress_batch', {'lesson_id': lesson.id, 'answers': answers}, method='post')
+        single = self.call(
+            'update_progress', {'word_id': answers[0]['word_id'], 'lesson_id': lesson.id, 'is_correct': True},
+            method='post',
+        )
+
+        self.assertEqual(batch.status_code, 400)
+        self.assertEqual(single.status_code, 400)
+        self.assertFalse(LessonProgress.objects.filter(user=self.user, lesson=other).exists())
+        self.assertFalse(LessonProgress.objects.filter(user=self.user, lesson=lesson, is_completed=True).exists())
+
+    def test_update_progress_time_spent(self):
+        word = self.lesson(1, 1).words.first()
+
+        invalid = self.call('update_progress', {'word_id': word.id, 'time_spent': 'abc'}, method='post')
+        negative = self.call('update_progress', {'word_id': word.id, 'time_spent': -600}, method='post')
+        batch = self.call(
+            'update_progress_batch', {'answers': [{'word_id': word.id, 'time_spent': [1]}]}, method='post'
+        )
+
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(negative.status_code, 200)
+        self.assertEqual(batch.status_code, 400)
+
+    def test_complete_lesson(self):
+        response = self.call(
+            'complete_lesson', {'lesson_id': self.lesson(1, 1).id, 'score': 90}, method='post', queries=9
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['block_id'], self.blocks[1].id)
+        self.assertFalse(response.json()['all_lessons_completed'])
+        lessons = self.call('block_detail', block_id=self.blocks[1].id).json()['lessons']
+        self.assertFalse(lessons[1]['is_locked'])
+
+    def test_submit_block_test(self):
+        start = self.call('start_block_test', queries=5, block_id=self.blocks[0].id)
+        self.assertEqual(start.status_code, 200)
+        words = start.json()['words']
+        translations = dict(
+            Word.objects.filter(id__in=[word['id'] for word in words]).values_list('id', 'translation')
+        )
+
+        response = self.call(
+            'submit_block_test',
+            {'answers': {str(word_id): translation for word_id, translation in translations.items()}},
+            method='post',
+            queries=15,
+            test_id=start.json()['test_id'],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_passed'])
+        self.assertEqual(response.json()['correct_answers'], len(words))
+
+    def test_start_block_test_seeded(self):
+        first = self.call('start_block_test', block_id=self.blocks[0].id).json()
+
+        url = reverse('start_block_test', kwargs={'block_id': self.blocks[0].id})
+        again = self.client.get(url, {'seed': first['seed']}).json()
+
+        self.assertEqual(again['words'], first['words'])
+        self.assertEqual(len(first['words']), 10)
+        self.assertTrue(all(len(word['options']) == 4 for word in first['words']))
+
+
+class ColdPathTests(ApiTestCase):
+    """
+    Худшие случаи из QUERY_BUDGETS: кеш пуст, сводки пользователя нет,
+    сегодня он еще не занимался. Каждый запрос проверяется на бюджет.
+    """
+
+    def check_queries(self, url_name, count, expected):
+        budget = settings.QUERY_BUDGETS[url_name]
+        self.assertLessEqual(count, budget, f'{url_name}: {count} SQL queries, budget {budget}')
+
+    def make_cold(self):
+        cache.clear()
+        UserSummary.objects.filter(user=self.user).delete()
+        DailyProgress.objects.filter(user=self.user, date=timezone.now().date()).delete()
+
+    def answers(self, lesson, times=3):
+        return [{'word_id': word.id, 'is_correct': True, 'time_spent': 10}
+                for word in lesson.words.all() for _ in range(times)]
+
+    def learn_block_except_last_word(self, block_index):
+        """Выучивает блок, кроме последнего слова. Возвращает (урок, слово)"""
+        lessons = list(self.blocks[block_index].lessons.filter(is_active=True))
+        for lesson in lessons[:-1]:
+            self.call('update_progress_batch', {'lesson_id': lesson.id, 'answers': self.answers(lesson)}, method='post')
+        last_lesson = lessons[-1]
+        answers = self.answers(last_lesson)
+        self.call('update_progress_batch', {'lesson_id': last_lesson.id, 'answers': answers[:-1]}, method='post')
+        return last_lesson, answers[-1]['word_id']
+
+    def test_reads(self):
+        for url_name in ('api_dashboard', 'progress_detailed', 'progress_detail', 'user_profile'):
+            self.make_cold()
+            self.assertEqual(self.call(url_name).status_code, 200)
+        self.make_cold()
+        self.assertEqual(self.call('block_detail', block_id=self.blocks[1].id).status_code, 200)
+        self.make_cold()
+        self.assertEqual(self.call('lesson_detail', lesson_id=self.lesson(1, 1).id).status_code, 200)
+
+    def test_first_answer_of_new_user(self):
+        self.client.force_login(create_paid_user('newcomer'))
+        self.make_cold()
+
+        response = self.call(
+            'update_progress', {'word_id': self.lesson(0, 1).words.first().id, 'is_correct': True}, method='post'
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_progress_completes_block(self):
+        lesson, word_id = self.learn_block_except_last_word(1)
+        self.make_cold()
+
+        response = self.call(
+            'update_progress', {'word_id': word_id, 'lesson_id': lesson.id, 'is_correct': True}, method='post'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlockProgress.objects.get(user=self.user, block=self.blocks[1]).is_completed)
+
+    def test_batch_completes_block(self):
+        lessons = list(self.blocks[1].lessons.filter(is_active=True))
+        for lesson in lessons[:-1]:
+            self.call('update_progress_batch', {'lesson_id': lesson.id, 'answers': self.answers(lesson)}, method='post')
+        self.make_cold()
+
+        response = self.call(
+            'update_progress_batch', {'lesson_id': lessons[-1].id, 'answers': self.answers(lessons[-1])}, method='post'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlockProgress.objects.get(user=self.user, block=self.blocks[1]).is_completed)
+
+    def test_complete_lesson_completes_block(self):
+        lessons = list(self.blocks[1].lessons.filter(is_active=True))
+        for lesson in lessons[:-1]:
+            self.call('complete_lesson', {'lesson_id': lesson.id, 'score': 90}, method='post')
+        self.make_cold()
+
+        response = self.call('complete_lesson', {'lesson_id': lessons[-1].id, 'score': 90}, method='post')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['all_lessons_completed'])
+
+    def test_complete_block(self):
+        self.make_cold()
+
+        response = self.call('complete_block', {'block_id': self.blocks[1].id}, method='post')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['block_completed'])
+
+    def test_block_test(self):
+        self.make_cold()
+        start = self.call('start_block_test', block_id=self.blocks[0].id)
+        translations = dict(
+            Word.objects.filter(id__in=[word['id'] for word in start.json()['words']]).values_list('id', 'translation')
+        )
+        self.make_cold()
+
+        response = self.call(
+            'submit_block_test',
+            {'answers': {str(word_id): translation for word_id, translation in translations.items()}},
+            method='post',
+            test_id=start.json()['test_id'],
+        )
+
+        self.assertEqual(response.status_code, 200)
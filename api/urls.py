@@ -23,6 +23,7 @@ urlpatterns = [
     
     # Progress Tracking - ВСЕ POST методы
     path('progress/update/', views.update_progress, name='update_progress'),
+    path('progress/update/batch/', views.update_progress_batch, name='update_progress_batch'),
     path('lessons/complete/', views.complete_lesson, name='complete_lesson'),
     path('blocks/complete/', views.complete_block, name='complete_block'),
     path('sessions/start/', views.start_study_session, name='start_study_session'),
@@ -1,9 +1,9 @@
 # api/views.py
 
 import hmac
+import logging
 import hashlib
 import json
-import random
 from datetime import datetime, timedelta
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -17,16 +17,29 @@ from django.db import transaction
 from django.db.models import Count, Avg, Sum
 from django.utils import timezone
 from users.models import User
-from content.models import Block, Lesson, Word, UserProgress, BlockTest, UserBlockTest
+from content.models import Block, Lesson, Word, BlockTest, UserBlockTest
+from content.catalogue import get_catalogue
+from content.questions import build_questions, new_seed
 from progress.models import (
-    UserStats, DailyProgress, LessonProgress, BlockProgress,
-    Achievement, UserAchievement, StudySession
+    UserStats, LessonProgress,
+    UserAchievement, StudySession
+)
+from progress.summary import get_user_summary
+from progress.charts import last_days, daily_series, time_of_day_distribution
+from progress.versions import progress_changed
+from progress.services import (
+    get_blocks_overview, get_user_stats, get_daily_progress,
+    get_word_progress_map, get_lesson_progress_map, get_block_progress_map,
+    record_answer, record_answers, mark_lesson_completed, mark_block_completed
 )
 from .models import PaymentRecord
+from .caching import cached_progress_response
 
 # 🔥 ВАЖНО: Импорт для работы с CSRF куками
 from django.views.decorators.csrf import ensure_csrf_cookie
 
+logger = logging.getLogger(__name__)
+
 @csrf_exempt
 @require_POST
 def payment_webhook(request):
@@ -151,46 +164,23 @@ def complete_lesson(request):
     """Отметить урок как завершенный"""
     user = request.user
 
-    print(f"🔐 API Complete Lesson - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Complete Lesson: user=%s paid=%s', user.pk, user.is_paid)
 
     lesson_id = request.data.get('lesson_id')
     score = request.data.get('score', 0)
 
     try:
-        lesson = Lesson.objects.get(id=lesson_id)
-
-        # Обновляем прогресс урока
-        lesson_progress, created = LessonProgress.objects.get_or_create(
-            user=user,
-            lesson=lesson
-        )
-        lesson_progress.is_completed = True
-        lesson_progress.completed_at = timezone.now()
-        lesson_progress.accuracy = score
-        lesson_progress.save()
-
-        # Обновляем прогресс блока
-        block_progress, created = BlockProgress.objects.get_or_create(
-            user=user,
-            block=lesson.block
-        )
-        block_progress.update_progress()
+        lesson = get_catalogue().get_lesson(lesson_id)
 
-        # Проверяем, все ли уроки блока завершены
-        block_lessons = Lesson.objects.filter(block=lesson.block, is_active=True)
-        completed_lessons = LessonProgress.objects.filter(
-            user=user,
-            lesson__in=block_lessons,
-            is_completed=True
-        )
-
-        all_lessons_completed = completed_lessons.count() == block_lessons.count()
+        # Урок -> блок -> следующий блок -> достижения
+        with transaction.atomic():
+            completion = mark_lesson_completed(user, lesson, accuracy=score)
 
         return Response({
             'success': True,
             'lesson_completed': True,
-            'all_lessons_completed': all_lessons_completed,
-            'block_id': lesson.block.id
+            'all_lessons_completed': completion.all_lessons_completed,
+            'block_id': lesson.block_id
         })
 
     except Lesson.DoesNotExist:
@@ -206,34 +196,17 @@ def complete_block(request):
     """Отметить блок как завершенный и разблокировать следующий"""
     user = request.user
 
-    print(f"🔐 API Complete Block - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Complete Block: user=%s paid=%s', user.pk, user.is_paid)
 
     block_id = request.data.get('block_id')
 
     try:
-        block = Block.objects.get(id=block_id)
+        block = get_catalogue().get_block(block_id)
 
-        # Отмечаем блок завершенным
-        block_progress, created = BlockProgress.objects.get_or_create(
-            user=user,
-            block=block
-        )
-        block_progress.is_completed = True
-        block_progress.completed_at = timezone.now()
-        block_progress.save()
-
-        # Находим следующий блок
-        next_block = Block.objects.filter(
-            order=block.order + 1,
-            is_active=True
-        ).first()
-
-        # Если есть следующий блок, создаем для него прогресс
-        if next_block:
-            BlockProgress.objects.get_or_create(
-                user=user,
-                block=next_block
-            )
+        # Блок -> следующий блок -> достижения
+        with transaction.atomic():
+            completion = mark_block_completed(user, block)
+        next_block = completion.next_block
 
         return Response({
             'success': True,
@@ -250,64 +223,25 @@ def complete_block(request):
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_progress_response
 def dashboard(request):
     """Dashboard API - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Dashboard - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Dashboard: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
-        # Общая статистика
-        total_words = Word.objects.count()
-        learned_words = UserProgress.objects.filter(user=user, is_learned=True).count()
+        # Общая статистика и блоки с прогрессом
+        overview = get_blocks_overview(user)
+        total_words = overview['total_words']
+        learned_words = overview['learned_words']
 
         # Статистика из UserStats
-        user_stats, _ = UserStats.objects.get_or_create(user=user)
+        user_stats = get_user_stats(user)
 
         # Ежедневный прогресс
         today = timezone.now().date()
-        daily_progress, _ = DailyProgress.objects.get_or_create(user=user, date=today)
-
-        # Блоки с прогрессом
-        blocks = []
-        for block in Block.objects.filter(is_active=True).order_by('order'):
-            block_words = Word.objects.filter(lesson__block=block)
-            learned_block_words = UserProgress.objects.filter(
-                user=user,
-                word__in=block_words,
-                is_learned=True
-            ).count()
-
-            # Прогресс блока
-            block_progress, _ = BlockProgress.objects.get_or_create(user=user, block=block)
-
-            # Проверяем, пройден ли предыдущий блок
-            is_locked = False
-            if block.order > 1:
-                prev_block = Block.objects.filter(order=block.order-1, is_active=True).first()
-                if prev_block:
-                    prev_block_progress = BlockProgress.objects.filter(
-                        user=user,
-                        block=prev_block,
-                        is_completed=True
-                    ).exists()
-                    is_locked = not prev_block_progress
-
-            blocks.append({
-                'id': block.id,
-                'title': block.title,
-                'description': block.description,
-                'order': block.order,
-                'total_words': block_words.count(),
-                'learned_words': learned_block_words,
-                'is_locked': is_locked,
-                'progress': {
-                    'is_completed': block_progress.is_completed,
-                    'lessons_completed': block_progress.lessons_completed,
-                    'total_lessons': block_progress.total_lessons,
-                    'overall_accuracy': block_progress.overall_accuracy,
-                }
-            })
+        daily_progress = get_daily_progress(user, today)
 
         # Достижения
         user_achievements = UserAchievement.objects.filter(user=user).select_related('achievement')
@@ -340,7 +274,7 @@ def dashboard(request):
                 'today_lessons': daily_progress.lessons_completed,
                 'today_time': daily_progress.time_studied,
             },
-            'blocks': blocks,
+            'blocks': overview['blocks'],
             'achievements': achievements_data,
         })
 
@@ -350,110 +284,50 @@ def dashboard(request):
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_progress_response
 def progress_detailed(request):
     """Детальная статистика прогресса с графиками"""
     user = request.user
 
-    print(f"🔐 API Progress Detailed - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Progress Detailed: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
         # Основная статистика
-        user_stats, _ = UserStats.objects.get_or_create(user=user)
-        total_words = Word.objects.count()
-        learned_words = UserProgress.objects.filter(user=user, is_learned=True).count()
-
-        # Рассчитываем среднюю точность
-        user_progress = UserProgress.objects.filter(user=user)
-        average_accuracy = 0
-        if user_progress.exists():
-            total_accuracy = sum(progress.accuracy for progress in user_progress)
-            average_accuracy = round(total_accuracy / user_progress.count(), 1)
+        user_stats = get_user_stats(user)
+        catalogue = get_catalogue()
+        total_words = catalogue.total_words
+        summary = get_user_summary(user)
+        learned_words = summary.learned_words
+        average_accuracy = summary.average_accuracy
 
         # Прогресс за последние 30 дней
-        thirty_days_ago = timezone.now().date() - timedelta(days=30)
-        daily_progress = DailyProgress.objects.filter(
-            user=user,
-            date__gte=thirty_days_ago
-        ).order_by('date')
-
-        # Данные для графика
-        chart_data = []
-        for progress in daily_progress:
-            chart_data.append({
-                'date': progress.date.strftime('%Y-%m-%d'),
-                'words_learned': progress.words_learned,
-                'lessons_completed': progress.lessons_completed,
-                'time_studied': progress.time_studied,
-                'accuracy': progress.accuracy,
-            })
-
-        # Заполняем пропущенные дни нулями
-        today = timezone.now().date()
-        complete_chart_data = []
-        for i in range(30):
-            date = today - timedelta(days=29 - i)
-            date_str = date.strftime('%Y-%m-%d')
-
-            existing_data = next((item for item in chart_data if item['date'] == date_str), None)
-            if existing_data:
-                complete_chart_data.append(existing_data)
-            else:
-                complete_chart_data.append({
-                    'date': date_str,
-                    'words_learned': 0,
-                    'lessons_completed': 0,
-                    'time_studied': 0,
-                    'accuracy': 0,
-                })
+        start_date, end_date = last_days(30)
+        complete_chart_data = daily_series(user, start_date, end_date)
 
         # Статистика по блокам
         blocks_progress = []
-        for block in Block.objects.filter(is_active=True).order_by('order'):
-            block_words = Word.objects.filter(lesson__block=block)
-            learned_block_words = UserProgress.objects.filter(
-                user=user,
-                word__in=block_words,
-                is_learned=True
-            ).count()
-
-            block_progress, _ = BlockProgress.objects.get_or_create(user=user, block=block)
-
-            # Рассчитываем точность для блока
-            block_user_progress = UserProgress.objects.filter(user=user, word__in=block_words)
-            block_accuracy = 0
-            if block_user_progress.exists():
-                total_block_accuracy = sum(progress.accuracy for progress in block_user_progress)
-                block_accuracy = round(total_block_accuracy / block_user_progress.count(), 1)
+        block_progress_map = get_block_progress_map(user, catalogue.active_blocks)
+        learned_by_block = summary.learned_by_block
+        accuracy_by_block = summary.accuracy_by_block
+        for block in catalogue.active_blocks:
+            block_words_count = block.words_count
+            learned_block_words = learned_by_block.get(block.id, 0)
+
+            block_progress = block_progress_map[block.id]
 
             blocks_progress.append({
                 'id': block.id,
                 'title': block.title,
-                'total_words': block_words.count(),
+                'total_words': block_words_count,
                 'learned_words': learned_block_words,
-                'progress_percentage': round((learned_block_words / block_words.count() * 100), 2) if block_words.count() > 0 else 0,
+                'progress_percentage': round((learned_block_words / block_words_count * 100), 2) if block_words_count > 0 else 0,
                 'is_completed': block_progress.is_completed,
-                'accuracy': block_accuracy,
+                'accuracy': accuracy_by_block.get(block.id, 0),
             })
 
         # Статистика по времени суток
-        study_sessions = StudySession.objects.filter(user=user, start_time__gte=thirty_days_ago)
-        time_distribution = {
-            'morning': 0,    # 6:00-12:00
-            'afternoon': 0,  # 12:00-18:00
-            'evening': 0,    # 18:00-24:00
-            'night': 0,      # 0:00-6:00
-        }
-
-        for session in study_sessions:
-            hour = session.start_time.hour
-            if 6 <= hour < 12:
-                time_distribution['morning'] += session.duration
-            elif 12 <= hour < 18:
-                time_distribution['afternoon'] += session.duration
-            elif 18 <= hour < 24:
-                time_distribution['evening'] += session.duration
-            else:
-                time_distribution['night'] += session.duration
+        thirty_days_ago = timezone.now().date() - timedelta(days=30)
+        time_distribution = time_of_day_distribution(user, thirty_days_ago)
 
         # Достижения
         achievements = UserAchievement.objects.filter(user=user).select_related('achievement')
@@ -468,7 +342,7 @@ def progress_detailed(request):
         ]
 
         # Привычки обучения
-        total_study_days = DailyProgress.objects.filter(user=user, words_learned__gt=0).count()
+        total_study_days = summary.study_days
         words_per_day = learned_words / total_study_days if total_study_days > 0 else 0
 
         # Определяем любимое время для учебы
@@ -505,61 +379,47 @@ def progress_detailed(request):
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_progress_response
 def progress_detail(request):
     """Детальная статистика прогресса - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Progress Detail - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Progress Detail: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
         # Еженедельный прогресс
-        week_ago = timezone.now().date() - timedelta(days=7)
-        weekly_progress = DailyProgress.objects.filter(
-            user=user,
-            date__gte=week_ago
-        ).order_by('date')
-
-        weekly_data = [
-            {
-                'date': progress.date.strftime('%Y-%m-%d'),
-                'words_learned': progress.words_learned,
-                'lessons_completed': progress.lessons_completed,
-                'time_studied': progress.time_studied,
-                'accuracy': progress.accuracy,
-            }
-            for progress in weekly_progress
-        ]
+        start_date, end_date = last_days(8)
+        weekly_data = daily_series(user, start_date, end_date, fill_gaps=False)
 
         # Статистика по блокам
-        block_progress = BlockProgress.objects.filter(user=user).select_related('block')
+        active_blocks = get_catalogue().active_blocks
+        block_progress_map = get_block_progress_map(user, active_blocks)
+        learned_by_block = get_user_summary(user).learned_by_block
         blocks_data = []
-        for bp in block_progress:
-            block_words = Word.objects.filter(lesson__block=bp.block)
-            learned_words = UserProgress.objects.filter(
-                user=user,
-                word__in=block_words,
-                is_learned=True
-            ).count()
-
+        for block in active_blocks:
+            bp = block_progress_map[block.id]
             blocks_data.append({
-                'block_id': bp.block.id,
-                'title': bp.block.title,
+                'block_id': block.id,
+                'title': block.title,
                 'is_completed': bp.is_completed,
                 'lessons_completed': bp.lessons_completed,
                 'total_lessons': bp.total_lessons,
-                'learned_words': learned_words,
-                'total_words': block_words.count(),
+                'learned_words': learned_by_block.get(block.id, 0),
+                'total_words': block.words_count,
                 'overall_accuracy': bp.overall_accuracy,
             })
 
         # Последние сессии
-        recent_sessions = StudySession.objects.filter(user=user).order_by('-start_time')[:5]
+        recent_sessions = StudySession.objects.filter(user=user).annotate(
+            lessons_count=Count('lessons_studied', distinct=True),
+            words_count=Count('words_reviewed', distinct=True),
+        ).order_by('-start_time')[:5]
         sessions_data = [
             {
                 'start_time': session.start_time.strftime('%Y-%m-%d %H:%M'),
                 'duration': session.duration,
-                'lessons_count': session.lessons_studied.count(),
-                'words_count': session.words_reviewed.count(),
+                'lessons_count': session.lessons_count,
+                'words_count': session.words_count,
                 'accuracy': session.average_accuracy,
             }
             for session in recent_sessions
@@ -581,47 +441,38 @@ def block_detail(request, block_id):
     """Детали блока - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Block Detail - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Block Detail: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
-        block = Block.objects.get(id=block_id)
+        block = get_catalogue().get_block(block_id)
         lessons = []
 
-        # Получаем все уроки блока в правильном порядке
-        block_lessons = block.lessons.filter(is_active=True).order_by('order')
+        # Уроки и слова блока в правильном порядке - из снимка каталога
+        block_lessons = block.active_lessons
 
-        for index, lesson in enumerate(block_lessons):
+        # Весь прогресс пользователя по блоку - по одному запросу
+        lesson_progress_map = get_lesson_progress_map(user, block_lessons)
+        word_progress_map = get_word_progress_map(
+            user, [word for lesson in block_lessons for word in lesson.words]
+        )
+
+        # Граница открытых уроков - из сводки пользователя
+        summary = get_user_summary(user)
+
+        for lesson in block_lessons:
             lesson_words = []
-            lesson_progress, _ = LessonProgress.objects.get_or_create(
-                user=user,
-                lesson=lesson
-            )
+            lesson_progress = lesson_progress_map[lesson.id]
 
-            # ПРОВЕРКА БЛОКИРОВКИ УРОКА - ИСПРАВЛЕННАЯ ЛОГИКА
-            is_locked = False
-            if index > 0:  # Все уроки кроме первого
-                prev_lesson = block_lessons.filter(order=lesson.order-1).first()
-                if prev_lesson:
-                    prev_lesson_progress = LessonProgress.objects.filter(
-                        user=user,
-                        lesson=prev_lesson,
-                        is_completed=True
-                    ).first()
-                    is_locked = not prev_lesson_progress or not prev_lesson_progress.is_completed
-
-            for word in lesson.words.all().order_by('order'):
-                progress, _ = UserProgress.objects.get_or_create(
-                    user=user,
-                    word=word
-                )
+            for word in lesson.words:
+                progress = word_progress_map[word.id]
 
                 lesson_words.append({
                     'id': word.id,
                     'arabic': word.arabic,
                     'translation': word.translation,
                     'transcription': word.transcription,
-                    'audio_url': word.audio.url if word.audio else None,
-                    'image_url': word.image.url if word.image else None,
+                    'audio_url': word.audio_url,
+                    'image_url': word.image_url,
                     'example_verse': word.example_verse,
                     'example_translation': word.example_translation,
                     'is_learned': progress.is_learned,
@@ -632,7 +483,7 @@ def block_detail(request, block_id):
                 'id': lesson.id,
                 'title': lesson.title,
                 'order': lesson.order,
-                'is_locked': is_locked,
+                'is_locked': summary.is_lesson_locked(lesson, block),
                 'progress': {
                     'is_completed': lesson_progress.is_completed,
                     'accuracy': lesson_progress.accuracy,
@@ -662,49 +513,35 @@ def lesson_detail(request, lesson_id):
     """Детали урока - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Lesson Detail - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Lesson Detail: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
-        lesson = Lesson.objects.get(id=lesson_id)
-
-        # ПРОВЕРКА БЛОКИРОВКИ УРОКА ПЕРЕД ЗАГРУЗКОЙ
-        if lesson.order > 1:
-            prev_lesson = Lesson.objects.filter(
-                block=lesson.block,
-                order=lesson.order-1
-            ).first()
-            if prev_lesson:
-                prev_lesson_progress = LessonProgress.objects.filter(
-                    user=user,
-                    lesson=prev_lesson,
-                    is_completed=True
-                ).first()
-                if not prev_lesson_progress or not prev_lesson_progress.is_completed:
-                    return Response({
-                        'error': 'Урок заблокирован. Сначала завершите предыдущий урок.',
-                        'is_locked': True
-                    }, status=403)
+        catalogue = get_catalogue()
+        lesson = catalogue.get_lesson(lesson_id)
+        block = catalogue.get_block(lesson.block_id)
+
+        # ПРОВЕРКА БЛОКИРОВКИ УРОКА ПЕРЕД ЗАГРУЗКОЙ - по границе из сводки
+        if get_user_summary(user).is_lesson_locked(lesson, block):
+            return Response({
+                'error': 'Урок заблокирован. Сначала завершите предыдущий урок.',
+                'is_locked': True
+            }, status=403)
 
         words_data = []
 
-        lesson_progress, _ = LessonProgress.objects.get_or_create(
-            user=user,
-            lesson=lesson
-        )
+        lesson_progress = get_lesson_progress_map(user, [lesson])[lesson.id]
 
-        for word in lesson.words.all().order_by('order'):
-            progress, _ = UserProgress.objects.get_or_create(
-                user=user,
-                word=word
-            )
+        word_progress_map = get_word_progress_map(user, lesson.words)
+        for word in lesson.words:
+            progress = word_progress_map[word.id]
 
             words_data.append({
                 'id': word.id,
                 'arabic': word.arabic,
                 'translation': word.translation,
                 'transcription': word.transcription,
-                'audio_url': word.audio.url if word.audio else None,
-                'image_url': word.image.url if word.image else None,
+                'audio_url': word.audio_url,
+                'image_url': word.image_url,
                 'example_verse': word.example_verse,
                 'example_translation': word.example_translation,
                 'is_learned': progress.is_learned,
@@ -715,7 +552,7 @@ def lesson_detail(request, lesson_id):
             'lesson': {
                 'id': lesson.id,
                 'title': lesson.title,
-                'block_title': lesson.block.title,
+                'block_title': block.title,
                 'progress': {
                     'is_completed': lesson_progress.is_completed,
                     'accuracy': lesson_progress.accuracy,
@@ -730,6 +567,15 @@ def lesson_detail(request, lesson_id):
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
+def parse_time_spent(value):
+    """Время ответа в секундах: целое, отрицательное - 0. None, если это не число"""
+    if value in (None, ''):
+        return 0
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
 @api_view(['POST'])
 @authentication_classes([SessionAuthentication])
 @permission_classes([IsAuthenticated])
@@ -738,121 +584,122 @@ def update_progress(request):
     """Обновление прогресса после упражнения - требует авторизации"""
     user = request.user
 
-    # 🔥 ДЕТАЛЬНАЯ ОТЛАДКА
-    print(f"🔐 API Update Progress - User: {user.username}")
-    print(f"🔐 API Update Progress - Authenticated: {request.user.is_authenticated}")
-    print(f"🔐 API Update Progress - Is Paid: {user.is_paid}")
-    print(f"🔐 API Update Progress - Session ID: {request.session.session_key}")
-    print(f"🔐 API Update Progress - Session keys: {list(request.session.keys())}")
-
     word_id = request.data.get('word_id')
     is_correct = request.data.get('is_correct', False)
-    time_spent = request.data.get('time_spent', 0)  # в секундах
+    time_spent = parse_time_spent(request.data.get('time_spent'))  # в секундах
     lesson_id = request.data.get('lesson_id')
 
-    print(f"🔐 API Update Progress - Data: word_id={word_id}, is_correct={is_correct}, lesson_id={lesson_id}")
+    logger.debug(
+        'API Update Progress: user=%s word_id=%s is_correct=%s lesson_id=%s',
+        user.pk, word_id, is_correct, lesson_id
+    )
+
+    if time_spent is None:
+        return Response({'error': 'time_spent must be an integer'}, status=400)
 
     try:
-        word = Word.objects.get(id=word_id)
-        lesson = Lesson.objects.get(id=lesson_id) if lesson_id else None
+        catalogue = get_catalogue()
+        word = catalogue.get_word(word_id)
+        lesson = catalogue.get_lesson(lesson_id) if lesson_id else None
+        if lesson and word.lesson_id != lesson.id:
+            return Response({'error': 'Word does not belong to lesson'}, status=400)
 
         with transaction.atomic():
-            # Обновляем прогресс слова
-            progress, created = UserProgress.objects.get_or_create(
-                user=user,
-                word=word
-            )
+            progress = record_answer(user, word, lesson, is_correct, time_spent)
 
-            progress.total_attempts += 1
-            if is_correct:
-                progress.correct_answers += 1
-
-            # Сохраняем - автоматически проверит is_learned в модели
-            progress.save()
-
-            # Обновляем прогресс урока
-            if lesson:
-                lesson_progress, _ = LessonProgress.objects.get_or_create(
-                    user=user,
-                    lesson=lesson
-                )
-
-                # Пересчитываем точность урока на основе слов
-                lesson_words_progress = UserProgress.objects.filter(
-                    user=user,
-                    word__lesson=lesson
-                )
-
-                if lesson_words_progress.exists():
-                    total_accuracy = sum(p.accuracy for p in lesson_words_progress)
-                    lesson_progress.accuracy = total_accuracy / lesson_words_progress.count()
-
-                # Добавляем время
-                lesson_progress.time_spent += time_spent // 60  # конвертируем в минуты
-
-                # Проверяем, завершен ли урок (все слова выучены)
-                learned_words = UserProgress.objects.filter(
-                    user=user,
-                    word__lesson=lesson,
-                    is_learned=True
-                ).count()
-                total_words = lesson.words.count()
-
-                if learned_words == total_words and total_words > 0:
-                    lesson_progress.is_completed = True
-                    lesson_progress.completed_at = timezone.now()
-
-                lesson_progress.save()
-
-            # Обновляем ежедневный прогресс
-            today = timezone.now().date()
-            daily_progress, _ = DailyProgress.objects.get_or_create(
-                user=user,
-                date=today
-            )
+        return Response({
+            'success': True,
+            'progress': {
+                'is_learned': progress.is_learned,
+                'accuracy': progress.accuracy,
+                'correct_answers': progress.correct_answers,
+                'total_attempts': progress.total_attempts,
+            }
+        })
 
-            if is_correct and created:
-                daily_progress.words_learned += 1
+    except Word.DoesNotExist:
+        logger.info('API Update Progress: word not found: %s', word_id)
+        return Response({'error': 'Word not found'}, status=404)
+    except Lesson.DoesNotExist:
+        logger.info('API Update Progress: lesson not found: %s', lesson_id)
+        return Response({'error': 'Lesson not found'}, status=404)
+    except Exception as e:
+        logger.exception('API Update Progress failed: user=%s word_id=%s', user.pk, word_id)
+        return Response({'error': str(e)}, status=500)
 
-            daily_progress.time_studied += time_spent // 60
+MAX_ANSWERS_BATCH = 500
 
-            # Пересчитываем среднюю точность за день
-            today_progress = UserProgress.objects.filter(
-                user=user,
-                last_reviewed__date=today
-            )
-            if today_progress.count() > 0:
-                daily_progress.accuracy = sum(p.accuracy for p in today_progress) / today_progress.count()
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAuthenticated])
+@ensure_csrf_cookie  # 🔥 ДОБАВЛЕНО ДЛЯ CSRF ЗАЩИТЫ
+def update_progress_batch(request):
+    """Пакетное сохранение ответов по уроку - требует авторизации"""
+    user = request.user
 
-            daily_progress.save()
+    logger.debug('API Update Progress Batch: user=%s', user.pk)
 
-            # Обновляем UserStats
-            user_stats, _ = UserStats.objects.get_or_create(user=user)
-            user_stats.total_study_time += time_spent // 60
-            user_stats.save()
+    lesson_id = request.data.get('lesson_id')
+    answers_data = request.data.get('answers', [])
 
-            # Проверяем достижения
-            check_achievements(user)
+    if not isinstance(answers_data, list) or not answers_data:
+        return Response({'error': 'answers required'}, status=400)
+    if len(answers_data) > MAX_ANSWERS_BATCH:
+        return Response({'error': f'Too many answers (max {MAX_ANSWERS_BATCH})'}, status=400)
 
-        print(f"✅ API Update Progress - Success: word_id={word_id}")
+    try:
+        catalogue = get_catalogue()
+        lesson = catalogue.get_lesson(lesson_id) if lesson_id else None
+
+        answers = []
+        skipped = []
+        foreign = []
+        for answer in answers_data:
+            word_id = answer.get('word_id') if isinstance(answer, dict) else None
+            try:
+                word = catalogue.get_word(word_id)
+            except Word.DoesNotExist:
+                skipped.append(word_id)
+                continue
+            if lesson and word.lesson_id != lesson.id:
+                foreign.append(word.id)
+                continue
+            time_spent = parse_time_spent(answer.get('time_spent'))  # в секундах
+            if time_spent is None:
+                return Response({'error': 'time_spent must be an integer'}, status=400)
+            answers.append((word, bool(answer.get('is_correct', False)), time_spent))
+
+        # Счетчики урока считаются по всей пачке - чужие слова не принимаем
+        if foreign:
+            return Response({'error': 'Words do not belong to lesson', 'word_ids': foreign}, status=400)
+
+        progress_map = {}
+        if answers:
+            with transaction.atomic():
+                progress_map = record_answers(user, lesson, answers)
+
+        if skipped:
+            logger.info('API Update Progress Batch: unknown words skipped: %s', skipped)
         return Response({
             'success': True,
+            'processed': len(answers),
+            'skipped': skipped,
             'progress': {
-                'is_learned': progress.is_learned,
-                'accuracy': progress.accuracy,
-                'correct_answers': progress.correct_answers,
-                'total_attempts': progress.total_attempts,
+                word_id: {
+                    'is_learned': progress.is_learned,
+                    'accuracy': progress.accuracy,
+                    'correct_answers': progress.correct_answers,
+                    'total_attempts': progress.total_attempts,
+                }
+                for word_id, progress in progress_map.items()
             }
         })
 
-    except Word.DoesNotExist:
-        print(f"❌ API Update Progress - Word not found: {word_id}")
-        return Response({'error': 'Word not found'}, status=404)
     except Lesson.DoesNotExist:
-        print(f"❌ API Update Progress - Lesson not found: {lesson_id}")
+        logger.info('API Update Progress Batch: lesson not found: %s', lesson_id)
         return Response({'error': 'Lesson not found'}, status=404)
     except Exception as e:
-        print(f"❌ API Update Progress - Error: {str(e)}")
+        logger.exception('API Update Progress Batch failed: user=%s', user.pk)
         return Response({'error': str(e)}, status=500)
 
 @api_view(['POST'])
@@ -863,9 +710,10 @@ def start_study_session(request):
     """Начало сессии изучения - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Start Session - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Start Session: user=%s paid=%s', user.pk, user.is_paid)
 
     session = StudySession.objects.create(user=user)
+    progress_changed(user)
 
     return Response({
         'session_id': session.id,
@@ -880,7 +728,7 @@ def end_study_session(request):
     """Завершение сессии изучения - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API End Session - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API End Session: user=%s paid=%s', user.pk, user.is_paid)
 
     session_id = request.data.get('session_id')
     lessons_studied = request.data.get('lessons_studied', [])
@@ -904,6 +752,7 @@ def end_study_session(request):
         user_stats, _ = UserStats.objects.get_or_create(user=user)
         user_stats.total_sessions += 1
         user_stats.save()
+        progress_changed(user)
 
         return Response({
             'success': True,
@@ -927,38 +776,45 @@ def start_block_test(request, block_id):
     """Начало теста блока - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Start Block Test - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Start Block Test: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
-        block = Block.objects.get(id=block_id)
-        block_test, created = BlockTest.objects.get_or_create(block=block)
+        catalogue = get_catalogue()
+        block = catalogue.get_block(block_id)
+        block_test, created = BlockTest.objects.get_or_create(block_id=block.id)
 
         # Проверяем, завершены ли все уроки блока
-        block_lessons = Lesson.objects.filter(block=block, is_active=True)
-        completed_lessons = LessonProgress.objects.filter(
+        total_lessons = block.active_lessons_count
+        completed_lessons_count = LessonProgress.objects.filter(
             user=user,
-            lesson__in=block_lessons,
+            lesson__in=block.active_lesson_ids,
             is_completed=True
-        )
+        ).count()
 
-        if completed_lessons.count() < block_lessons.count():
+        if completed_lessons_count < total_lessons:
             return Response({
                 'error': 'Сначала завершите все уроки этого блока',
-                'lessons_completed': completed_lessons.count(),
-                'total_lessons': block_lessons.count()
+                'lessons_completed': completed_lessons_count,
+                'total_lessons': total_lessons
             }, status=403)
 
-        # Выбираем 10 случайных слов из блока
-        block_words = Word.objects.filter(lesson__block=block)
-        test_words = random.sample(list(block_words), min(10, block_words.count()))
+        # Вопросы - по массиву id слов блока из снимка каталога.
+        # С тем же seed тест повторяется с теми же словами и вариантами
+        try:
+            seed = int(request.query_params['seed'])
+        except (KeyError, ValueError):
+            seed = new_seed()
+        questions = build_questions(catalogue, [block.id], seed)
 
         test_data = []
-        for word in test_words:
+        for question in questions:
+            word = question.word
             test_data.append({
                 'id': word.id,
                 'arabic': word.arabic,
-                'audio_url': word.audio.url if word.audio else None,
+                'audio_url': word.audio_url,
                 'transcription': word.transcription,
+                'options': list(question.options),
             })
 
         return Response({
@@ -966,6 +822,7 @@ def start_block_test(request, block_id):
             'title': block_test.title,
             'description': block_test.description,
             'passing_score': block_test.passing_score,
+            'seed': seed,
             'words': test_data,
         })
 
@@ -982,7 +839,7 @@ def submit_block_test(request, test_id):
     """Отправка результатов теста блока - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API Submit Block Test - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API Submit Block Test: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
         block_test = BlockTest.objects.get(id=test_id)
@@ -992,9 +849,10 @@ def submit_block_test(request, test_id):
         total_questions = len(user_answers)
 
         # Проверяем ответы
+        catalogue = get_catalogue()
         for word_id, user_translation in user_answers.items():
             try:
-                word = Word.objects.get(id=word_id)
+                word = catalogue.get_word(word_id)
                 # Простая проверка - можно улучшить
                 if user_translation.lower().strip() == word.translation.lower().strip():
                     correct_answers += 1
@@ -1012,28 +870,12 @@ def submit_block_test(request, test_id):
         user_test.score = score
         user_test.is_passed = is_passed
         user_test.save()
+        progress_changed(user)
 
-        # Обновляем прогресс блока
+        # Завершаем блок и открываем следующий
         if is_passed:
-            block_progress, _ = BlockProgress.objects.get_or_create(
-                user=user,
-                block=block_test.block
-            )
-            block_progress.is_completed = True
-            block_progress.completed_at = timezone.now()
-            block_progress.save()
-
-            # Разблокируем следующий блок
-            next_block = Block.objects.filter(
-                order=block_test.block.order + 1,
-                is_active=True
-            ).first()
-
-            if next_block:
-                BlockProgress.objects.get_or_create(
-                    user=user,
-                    block=next_block
-                )
+            with transaction.atomic():
+                mark_block_completed(user, catalogue.get_block(block_test.block_id))
 
         return Response({
             'score': round(score, 2),
@@ -1051,37 +893,36 @@ def submit_block_test(request, test_id):
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_progress_response
 def user_profile(request):
     """Профиль пользователя - требует авторизации"""
     user = request.user
 
-    print(f"🔐 API User Profile - User: {user.username}, Paid: {user.is_paid}")
+    logger.debug('API User Profile: user=%s paid=%s', user.pk, user.is_paid)
 
     try:
         # Получаем статистику пользователя
-        user_stats, _ = UserStats.objects.get_or_create(user=user)
+        user_stats = get_user_stats(user)
 
         # Общая статистика
-        total_words = Word.objects.count()
-        learned_words = UserProgress.objects.filter(user=user, is_learned=True).count()
+        catalogue = get_catalogue()
+        total_words = catalogue.total_words
+        summary = get_user_summary(user)
+        learned_by_block = summary.learned_by_block
+        learned_words = summary.learned_words
 
         # Прогресс по блокам
-        block_progress = BlockProgress.objects.filter(user=user).select_related('block')
+        active_blocks = catalogue.active_blocks
+        block_progress_map = get_block_progress_map(user, active_blocks)
         blocks_data = []
-        for bp in block_progress:
-            block_words = Word.objects.filter(lesson__block=bp.block)
-            learned_block_words = UserProgress.objects.filter(
-                user=user,
-                word__in=block_words,
-                is_learned=True
-            ).count()
-
+        for block in active_blocks:
+            bp = block_progress_map[block.id]
             blocks_data.append({
-                'block_id': bp.block.id,
-                'title': bp.block.title,
+                'block_id': block.id,
+                'title': block.title,
                 'is_completed': bp.is_completed,
-                'learned_words': learned_block_words,
-                'total_words': block_words.count(),
+                'learned_words': learned_by_block.get(block.id, 0),
+                'total_words': block.words_count,
                 'overall_accuracy': bp.overall_accuracy,
             })
 
@@ -1108,63 +949,3 @@ def user_profile(request):
 
     except Exception as e:
         return Response({'error': str(e)}, status=500)
-
-def check_achievements(user):
-    """Проверка и выдача достижений"""
-    try:
-        learned_words_count = UserProgress.objects.filter(user=user, is_learned=True).count()
-
-        # Достижение за первое слово
-        if learned_words_count >= 1:
-            achievement, created = Achievement.objects.get_or_create(
-                achievement_type='first_words',
-                defaults={
-                    'name': 'Первый шаг',
-                    'description': 'Выучите первое слово',
-                    'icon': '🎯',
-                }
-            )
-            if created:
-                UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-        # Достижение за 10 слов
-        if learned_words_count >= 10:
-            achievement, created = Achievement.objects.get_or_create(
-                achievement_type='words_10',
-                defaults={
-                    'name': 'Десять слов',
-                    'description': 'Выучите 10 слов',
-                    'icon': '🔟',
-                }
-            )
-            if created:
-                UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-        # Достижение за 50 слов
-        if learned_words_count >= 50:
-            achievement, created = Achievement.objects.get_or_create(
-                achievement_type='words_50',
-                defaults={
-                    'name': 'Пятьдесят слов',
-                    'description': 'Выучите 50 слов',
-                    'icon': '🌟',
-                }
-            )
-            if created:
-                UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-        # Достижение за 100 слов
-        if learned_words_count >= 100:
-            achievement, created = Achievement.objects.get_or_create(
-                achievement_type='words_100',
-                defaults={
-                    'name': 'Сто слов',
-                    'description': 'Выучите 100 слов',
-                    'icon': '💯',
-                }
-            )
-            if created:
-                UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-    except Exception as e:
-        print(f"Achievement check error: {e}")
@@ -1,7 +1,35 @@
 # content/admin.py
 
 from django.contrib import admin
+from django.db import transaction
 from .models import Block, Lesson, Word, BlockTest
+from .ordering import update_sort_keys
+
+# Поля, от которых зависит сквозной порядок уроков и слов (sort_key)
+ORDER_FIELDS = {'order', 'block', 'lesson'}
+
+
+class SortKeyAdminMixin:
+    """
+    Пересчитывает sort_key уроков и слов, если в админке изменился порядок:
+    один раз на запрос, после фиксации транзакции
+    """
+
+    def schedule_sort_keys(self, request):
+        if not getattr(request, '_sort_keys_scheduled', False):
+            request._sort_keys_scheduled = True
+            transaction.on_commit(update_sort_keys)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change or ORDER_FIELDS & set(form.changed_data):
+            self.schedule_sort_keys(request)
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        # Удаление не нарушает порядок оставшихся записей
+        if formset.new_objects or any(ORDER_FIELDS & set(fields) for _, fields in formset.changed_objects):
+            self.schedule_sort_keys(request)
 
 class LessonInline(admin.TabularInline):
     model = Lesson
@@ -12,7 +40,7 @@ class WordInline(admin.TabularInline):
     extra = 3
 
 @admin.register(Block)
-class BlockAdmin(admin.ModelAdmin):
+class BlockAdmin(SortKeyAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'order', 'is_active', 'created_at')
     list_editable = ('order', 'is_active')
     list_filter = ('is_active', 'created_at')
@@ -20,7 +48,7 @@ class BlockAdmin(admin.ModelAdmin):
     inlines = [LessonInline]
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(SortKeyAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'block', 'order', 'is_active')
     list_editable = ('order', 'is_active')
     list_filter = ('block', 'is_active')
@@ -28,7 +56,7 @@ class LessonAdmin(admin.ModelAdmin):
     inlines = [WordInline]
 
 @admin.register(Word)
-class WordAdmin(admin.ModelAdmin):
+class WordAdmin(SortKeyAdminMixin, admin.ModelAdmin):
     list_display = ('arabic', 'translation', 'lesson', 'order')
     list_editable = ('order',)
     list_filter = ('lesson__block', 'lesson')
@@ -0,0 +1,234 @@
+# content/catalogue.py
+
+"""
+Общий для всех пользователей снимок каталога: блоки -> уроки -> слова.
+
+Снимок строится один раз, хранится в кеше Django под ключом текущей
+версии каталога и дополнительно запоминается в памяти процесса.
+Версия меняется при сохранении/удалении контента (см. content.signals).
+"""
+
+import uuid
+from dataclasses import dataclass
+from functools import cached_property
+from django.conf import settings
+from django.core.cache import cache
+from .models import Block, Lesson, Word
+
+CATALOGUE_VERSION_KEY = 'content:catalogue:version'
+CATALOGUE_KEY = 'content:catalogue:{version}'
+
+
+@dataclass(frozen=True)
+class CatalogueWord:
+    id: int
+    lesson_id: int
+    block_id: int
+    arabic: str
+    translation: str
+    transcription: str
+    audio_url: str
+    image_url: str
+    example_verse: str
+    example_translation: str
+    order: int
+
+
+@dataclass(frozen=True)
+class CatalogueLesson:
+    id: int
+    block_id: int
+    title: str
+    order: int
+    is_active: bool
+    words: tuple
+
+
+@dataclass(frozen=True)
+class CatalogueBlock:
+    id: int
+    title: str
+    description: str
+    order: int
+    is_active: bool
+    lessons: tuple  # все уроки блока, включая неактивные
+
+    @property
+    def active_lessons(self):
+        return tuple(lesson for lesson in self.lessons if lesson.is_active)
+
+    @property
+    def active_lessons_count(self):
+        return len(self.active_lessons)
+
+    @property
+    def active_lesson_ids(self):
+        return [lesson.id for lesson in self.active_lessons]
+
+    @property
+    def first_lesson_order(self):
+        return min((lesson.order for lesson in self.lessons if lesson.is_active), default=0)
+
+    def get_next_lesson(self, lesson):
+        """Первый активный урок блока с order больше, чем у lesson, или None"""
+        return next((item for item in self.lessons if item.is_active and item.order > lesson.order), None)
+
+    @property
+    def words(self):
+        return tuple(word for lesson in self.lessons for word in lesson.words)
+
+    @property
+    def words_count(self):
+        return sum(len(lesson.words) for lesson in self.lessons)
+
+
+class Catalogue:
+    """Неизменяемый снимок каталога с индексами по id"""
+
+    def __init__(self, version, blocks):
+        self.version = version
+        self.blocks = tuple(blocks)
+        self.active_blocks = tuple(block for block in self.blocks if block.is_active)
+        self.blocks_by_id = {block.id: block for block in self.blocks}
+        self.lessons_by_id = {
+            lesson.id: lesson for block in self.blocks for lesson in block.lessons
+        }
+        self.words_by_id = {
+            word.id: word for lesson in self.lessons_by_id.values() for word in lesson.words
+        }
+
+    @property
+    def total_words(self):
+        return len(self.words_by_id)
+
+    @cached_property
+    def word_ids_by_block(self):
+        """
+        {block_id: tuple(id слов активных уроков)} для выборки вопросов тестов.
+        Считается один раз на снимок в процессе
+        """
+        return {
+            block.id: tuple(word.id for lesson in block.active_lessons for word in lesson.words)
+            for block in self.blocks
+        }
+
+    @property
+    def first_block_order(self):
+        return self.active_blocks[0].order if self.active_blocks else 0
+
+    def get_next_block(self, block):
+        """
+        Активный блок, который открывается после block: первый с order
+        больше, чем у block (порядковые номера могут идти с пропусками), или None
+        """
+        return next((candidate for candidate in self.active_blocks if candidate.order > block.order), None)
+
+    # get_* ведут себя как objects.get(): отсутствие записи - DoesNotExist
+
+    def get_block(self, block_id):
+        try:
+            return self.blocks_by_id[int(block_id)]
+        except (KeyError, TypeError, ValueError):
+            raise Block.DoesNotExist
+
+    def get_lesson(self, lesson_id):
+        try:
+            return self.lessons_by_id[int(lesson_id)]
+        except (KeyError, TypeError, ValueError):
+            raise Lesson.DoesNotExist
+
+    def get_word(self, word_id):
+        try:
+            return self.words_by_id[int(word_id)]
+        except (KeyError, TypeError, ValueError):
+            raise Word.DoesNotExist
+
+
+def _file_url(field):
+    return field.url if field else None
+
+
+def build_catalogue(version):
+    """Строит снимок каталога из базы тремя запросами"""
+    words_by_lesson = {}
+    for word in Word.objects.order_by('lesson_id', 'order', 'id'):
+        words_by_lesson.setdefault(word.lesson_id, []).append(word)
+
+    lessons_by_block = {}
+    for lesson in Lesson.objects.order_by('block_id', 'order', 'id'):
+        lessons_by_block.setdefault(lesson.block_id, []).append(CatalogueLesson(
+            id=lesson.id,
+            block_id=lesson.block_id,
+            title=lesson.title,
+            order=lesson.order,
+            is_active=lesson.is_active,
+            words=tuple(
+                CatalogueWord(
+                    id=word.id,
+                    lesson_id=lesson.id,
+                    block_id=lesson.block_id,
+                    arabic=word.arabic,
+                    translation=word.translation,
+                    transcription=word.transcription,
+                    audio_url=_file_url(word.audio),
+                    image_url=_file_url(word.image),
+                    example_verse=word.example_verse,
+                    example_translation=word.example_translation,
+                    order=word.order,
+                )
+                for word in words_by_lesson.get(lesson.id, [])
+            ),
+        ))
+
+    blocks = [
+        CatalogueBlock(
+            id=block.id,
+            title=block.title,
+            description=block.description,
+            order=block.order,
+            is_active=block.is_active,
+            lessons=tuple(lessons_by_block.get(block.id, [])),
+        )
+        for block in Block.objects.order_by('order', 'id')
+    ]
+    return Catalogue(version, blocks)
+
+
+_local_catalogue = None
+
+
+def get_catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # add() не перезапишет версию, уже выставленную другим воркером
+        cache.add(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, settings.CATALOGUE_CACHE_TIMEOUT)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Инвалидирует снимок каталога во всех процессах"""
+    cache.set(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, settings.CATALOGUE_CACHE_TIMEOUT)
+
+
+def get_catalogue():
+    """Текущий снимок каталога"""
+    global _local_catalogue
+
+    version = get_catalogue_version()
+    if version is None:
+        # Кеш отключен (DummyCache) - строим снимок на каждый запрос
+        return build_catalogue(version)
+
+    catalogue = _local_catalogue
+    if catalogue is not None and catalogue.version == version:
+        return catalogue
+
+    key = CATALOGUE_KEY.format(version=version)
+    catalogue = cache.get(key)
+    if catalogue is None:
+        catalogue = build_catalogue(version)
+        cache.set(key, catalogue, settings.CATALOGUE_CACHE_TIMEOUT)
+
+    _local_catalogue = catalogue
+    return catalogue
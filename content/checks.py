@@ -0,0 +1,17 @@
+# content/checks.py
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_catalogue_cache_backend(app_configs, **kwargs):
+    """Снимок каталога (content/catalogue.py) сбрасывается версией в общем кеше"""
+    if settings.CACHES['default']['BACKEND'] in settings.LOCAL_CACHE_BACKENDS:
+        return [Warning(
+            'Кеш в памяти процесса: правки каталога в админке другие воркеры '
+            f'увидят только через CATALOGUE_CACHE_TIMEOUT ({settings.CATALOGUE_CACHE_TIMEOUT} с).',
+            hint='Задайте общий кеш (CACHE_URL=rediscache://...).',
+            id='content.W001',
+        )]
+    return []
@@ -0,0 +1,43 @@
+# content/fixtures.py
+
+"""
+Синтетический каталог для тестов и нагрузочного прогона (bench_api).
+Вставляется через bulk_create, сигналы контента не срабатывают.
+"""
+
+from .models import Block, Lesson, Word
+from .ordering import update_sort_keys
+
+
+def seed_catalogue(blocks=30, lessons_per_block=10, words_per_lesson=10):
+    """Каталог blocks x lessons_per_block x words_per_lesson, последний урок второго блока неактивен"""
+    Block.objects.bulk_create([
+        Block(title=f'Блок {b}', description=f'Описание {b}', order=b)
+        for b in range(1, blocks + 1)
+    ])
+    block_list = list(Block.objects.order_by('order'))
+
+    Lesson.objects.bulk_create([
+        Lesson(
+            block=block,
+            title=f'Урок {block.order}.{l}',
+            order=l,
+            is_active=not (block.order == 2 and l == lessons_per_block),
+        )
+        for block in block_list
+        for l in range(1, lessons_per_block + 1)
+    ])
+    lesson_list = list(Lesson.objects.order_by('block__order', 'order'))
+
+    Word.objects.bulk_create([
+        Word(
+            lesson=lesson,
+            arabic=f'كلمة {lesson.id}-{w}',
+            translation=f'слово {lesson.id}-{w}',
+            order=w,
+        )
+        for lesson in lesson_list
+        for w in range(1, words_per_lesson + 1)
+    ])
+    update_sort_keys()
+    return block_list
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='block',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='word_progress', to='content.block'),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='word_progress', to='content.lesson'),
+        ),
+        migrations.AddIndex(
+            model_name='userprogress',
+            index=models.Index(condition=models.Q(('is_learned', True)), fields=['user', 'block'], name='userprogress_learned_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:56
+
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def fill_sort_keys(apps, schema_editor):
+    """Нумеруем уроки и слова в порядке прохождения (как content.ordering.update_sort_keys)"""
+    orderings = (
+        ('Lesson', ('block__order', 'block_id', 'order', 'id')),
+        ('Word', ('lesson__block__order', 'lesson__block_id', 'lesson__order', 'lesson_id', 'order', 'id')),
+    )
+    connection = schema_editor.connection
+    for model_name, ordering in orderings:
+        model = apps.get_model('content', model_name)
+        ranked = model.objects.annotate(
+            new_sort_key=Window(RowNumber(), order_by=[F(name).asc() for name in ordering])
+        ).order_by().values('id', 'new_sort_key')
+        sql, params = ranked.query.sql_with_params()
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET sort_key = ranked.new_sort_key FROM ({sql}) ranked '
+                f'WHERE {table}.id = ranked.id',
+                params,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_userprogress_location'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='lesson',
+            options={'ordering': ['sort_key']},
+        ),
+        migrations.AlterModelOptions(
+            name='word',
+            options={'ordering': ['sort_key']},
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='sort_key',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='sort_key',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_sort_keys, migrations.RunPython.noop),
+    ]
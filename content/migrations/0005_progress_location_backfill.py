@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+
+
+def backfill_location(apps, schema_editor):
+    """
+    Заполняем UserProgress.lesson/block, добавленные в 0003, по слову
+    (как команда backfill_progress_location): диапазонами первичного ключа
+    """
+    UserProgress = apps.get_model('content', 'UserProgress')
+    Word = apps.get_model('content', 'Word')
+
+    queryset = UserProgress.objects.filter(Q(lesson__isnull=True) | Q(block__isnull=True))
+    bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return
+
+    word = Word.objects.filter(pk=OuterRef('word_id'))
+    batch_size = 5000
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        queryset.filter(pk__gte=start, pk__lt=start + batch_size).update(
+            lesson_id=Subquery(word.values('lesson_id')[:1]),
+            block_id=Subquery(word.values('lesson__block_id')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_sort_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_location, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userprogress',
+            index=models.Index(fields=['user', 'lesson'], name='userprogress_user_lesson_idx'),
+        ),
+    ]
@@ -1,10 +1,45 @@
 # content/models.py
 
 from django.db import models
+from django.db.models.lookups import Exact, GreaterThanOrEqual
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Правило "слово выучено": точность >= 80% и не меньше 3 попыток
+LEARNED_MIN_ACCURACY = 80
+LEARNED_MIN_ATTEMPTS = 3
+
+
+def accuracy_expression(correct=None, attempts=None):
+    """
+    Точность в процентах как выражение запроса, 0 при отсутствии попыток.
+    correct и attempts - выражения счетчиков, по умолчанию поля
+    correct_answers и total_attempts (в UPDATE можно передать F() + прибавку)
+    """
+    correct = models.F('correct_answers') if correct is None else correct
+    attempts = models.F('total_attempts') if attempts is None else attempts
+    return models.Case(
+        models.When(Exact(attempts, 0), then=models.Value(0.0)),
+        default=models.ExpressionWrapper(correct * 100.0 / attempts, output_field=models.FloatField()),
+        output_field=models.FloatField(),
+    )
+
+
+def is_learned_by_rule(correct_answers, total_attempts):
+    """Правило выученного слова для счетчиков в памяти"""
+    return (total_attempts >= LEARNED_MIN_ATTEMPTS
+            and correct_answers * 100 >= total_attempts * LEARNED_MIN_ACCURACY)
+
+
+def learned_rule():
+    """Правило выученного слова как Q для фильтров и массовых UPDATE"""
+    # Сравнение в целых числах, без деления
+    return models.Q(total_attempts__gte=LEARNED_MIN_ATTEMPTS) & models.Q(GreaterThanOrEqual(
+        models.F('correct_answers') * 100, models.F('total_attempts') * LEARNED_MIN_ACCURACY
+    ))
+
+
 class Block(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -23,9 +58,11 @@ class Lesson(models.Model):
     title = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # Позиция в сквозном порядке (блок, урок), см. content.ordering
+    sort_key = models.PositiveIntegerField(default=0, db_index=True, editable=False)
     
     class Meta:
-        ordering = ['block__order', 'order']
+        ordering = ['sort_key']
     
     def __str__(self):
         return f"{self.block.title} - {self.title}"
@@ -40,23 +77,46 @@ class Word(models.Model):
     example_verse = models.TextField(blank=True)
     example_translation = models.TextField(blank=True)
     order = models.PositiveIntegerField(default=0)
+    # Позиция в сквозном порядке (блок, урок, слово), см. content.ordering
+    sort_key = models.PositiveIntegerField(default=0, db_index=True, editable=False)
     
     class Meta:
-        ordering = ['lesson__block__order', 'lesson__order', 'order']
+        ordering = ['sort_key']
     
     def __str__(self):
         return f"{self.arabic} - {self.translation}"
 
+class UserProgressQuerySet(models.QuerySet):
+    def apply_learned_rule(self):
+        """То же, что UserProgress.apply_learned_rule, одним UPDATE"""
+        return self.filter(learned_rule(), is_learned=False).update(is_learned=True)
+
 class UserProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='progress')
     word = models.ForeignKey(Word, on_delete=models.CASCADE)
+    # Денормализация word.lesson и word.lesson.block для агрегатов без JOIN.
+    # Поддерживается в record_answers, save() и content.signals
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, blank=True, related_name='word_progress')
+    block = models.ForeignKey(Block, on_delete=models.CASCADE, null=True, blank=True, related_name='word_progress')
     is_learned = models.BooleanField(default=False)
     correct_answers = models.PositiveIntegerField(default=0)
     total_attempts = models.PositiveIntegerField(default=0)
     last_reviewed = models.DateTimeField(auto_now=True)
+
+    objects = UserProgressQuerySet.as_manager()
     
     class Meta:
         unique_together = ['user', 'word']
+        indexes = [
+            # Подсчет выученных слов пользователя (в целом и по блокам)
+            models.Index(
+                fields=['user', 'block'],
+                condition=models.Q(is_learned=True),
+                name='userprogress_learned_idx',
+            ),
+            # Прогресс слов урока (get_word_progress_map)
+            models.Index(fields=['user', 'lesson'], name='userprogress_user_lesson_idx'),
+        ]
     
     @property
     def accuracy(self):
@@ -64,10 +124,20 @@ class UserProgress(models.Model):
             return 0
         return (self.correct_answers / self.total_attempts) * 100
 
-    def save(self, *args, **kwargs):
+    def apply_learned_rule(self):
         # Автоматически помечаем слово как выученное при accuracy >= 80%
-        if self.accuracy >= 80 and self.total_attempts >= 3:
+        if is_learned_by_rule(self.correct_answers, self.total_attempts):
             self.is_learned = True
+
+    def sync_location(self):
+        # Копируем урок и блок слова
+        self.lesson_id = self.word.lesson_id
+        self.block_id = self.word.lesson.block_id
+
+    def save(self, *args, **kwargs):
+        self.apply_learned_rule()
+        if self.lesson_id is None or self.block_id is None:
+            self.sync_location()
         super().save(*args, **kwargs)
 
 class BlockTest(models.Model):
@@ -0,0 +1,46 @@
+# content/ordering.py
+
+"""
+Сквозной порядок уроков и слов (поле sort_key).
+
+Порядок прохождения задается тремя полями order: блока, урока в блоке
+и слова в уроке. Чтобы сортировка по умолчанию не тянула JOIN к урокам
+и блокам, он хранится в самих уроках и словах номером позиции. Номера
+пересчитываются после изменения порядка в админке (content.admin).
+"""
+
+from django.db import connection
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from .models import Lesson, Word
+
+LESSON_ORDERING = ('block__order', 'block_id', 'order', 'id')
+WORD_ORDERING = ('lesson__block__order', 'lesson__block_id', 'lesson__order', 'lesson_id', 'order', 'id')
+
+
+def _renumber(model, ordering):
+    """
+    Один UPDATE ... FROM по нумерации ROW_NUMBER(): номера считает база,
+    записываются только изменившиеся. bulk_update на тысячах слов заметно
+    медленнее. UPDATE ... FROM есть в PostgreSQL и SQLite 3.33+.
+    """
+    ranked = model.objects.annotate(
+        new_sort_key=Window(RowNumber(), order_by=[F(name).asc() for name in ordering])
+    ).order_by().values('id', 'new_sort_key')
+    sql, params = ranked.query.sql_with_params()
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET sort_key = ranked.new_sort_key FROM ({sql}) ranked '
+            f'WHERE {table}.id = ranked.id AND {table}.sort_key <> ranked.new_sort_key',
+            params,
+        )
+        return cursor.rowcount
+
+
+def update_sort_keys():
+    """
+    Пересчитывает sort_key уроков и слов по order блоков, уроков и слов.
+    Возвращает число обновленных записей.
+    """
+    return _renumber(Lesson, LESSON_ORDERING) + _renumber(Word, WORD_ORDERING)
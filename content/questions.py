@@ -0,0 +1,85 @@
+# content/questions.py
+
+"""
+Вопросы тестов по блокам.
+
+Слова выбираются по массивам id слов блоков из снимка каталога
+(Catalogue.word_ids_by_block): случайные позиции берутся из range, слова
+и варианты ответов - по id из индексов снимка. Стоимость зависит от числа
+вопросов, а не от размера блоков и их количества в тесте на повторение.
+Набор вопросов определяется seed и версией каталога: тот же seed дает
+те же слова и те же варианты в том же порядке.
+"""
+
+import random
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+
+QUESTIONS_PER_TEST = 10
+OPTIONS_PER_QUESTION = 4  # правильный перевод и отвлекающие
+MAX_SEED = 2 ** 31 - 1
+
+
+@dataclass(frozen=True)
+class Question:
+    word: object  # слово снимка каталога
+    options: tuple  # переводы, перемешанные, среди них word.translation
+
+
+class WordPool:
+    """Слова нескольких блоков как один массив, без копирования id"""
+
+    def __init__(self, catalogue, block_ids):
+        word_ids_by_block = catalogue.word_ids_by_block
+        self.arrays = [
+            word_ids_by_block[block_id]
+            for block_id in dict.fromkeys(block_ids)
+            if word_ids_by_block.get(block_id)
+        ]
+        self.ends = list(accumulate(len(array) for array in self.arrays))
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, position):
+        index = bisect_right(self.ends, position)
+        start = self.ends[index - 1] if index else 0
+        return self.arrays[index][position - start]
+
+
+def new_seed():
+    return random.randint(0, MAX_SEED)
+
+
+def _options(rng, catalogue, pool, position, word, count):
+    """
+    Правильный перевод и до count - 1 отвлекающих из того же набора слов.
+    Число попыток ограничено, в маленьком блоке вариантов может быть меньше
+    """
+    options = [word.translation]
+    for _ in range(count * 3):
+        if len(options) >= count:
+            break
+        other = rng.randrange(len(pool))
+        if other == position:
+            continue
+        translation = catalogue.get_word(pool[other]).translation
+        if translation not in options:
+            options.append(translation)
+    rng.shuffle(options)
+    return tuple(options)
+
+
+def build_questions(catalogue, block_ids, seed, count=QUESTIONS_PER_TEST, options=OPTIONS_PER_QUESTION):
+    """
+    Вопросы теста по словам блоков block_ids (один блок или несколько для
+    повторения). Слова в тесте не повторяются.
+    """
+    rng = random.Random(seed)
+    pool = WordPool(catalogue, block_ids)
+    questions = []
+    for position in rng.sample(range(len(pool)), min(count, len(pool))):
+        word = catalogue.get_word(pool[position])
+        questions.append(Question(word=word, options=_options(rng, catalogue, pool, position, word, options)))
+    return questions
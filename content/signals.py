@@ -0,0 +1,41 @@
+# content/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .catalogue import bump_catalogue_version
+from .models import Block, Lesson, Word, BlockTest, UserProgress
+
+
+@receiver(post_save, sender=Block)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Word)
+@receiver(post_save, sender=BlockTest)
+@receiver(post_delete, sender=Block)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Word)
+@receiver(post_delete, sender=BlockTest)
+def invalidate_catalogue(sender, **kwargs):
+    """Сбрасываем снимок каталога после изменения контента в админке"""
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=Word)
+def sync_word_progress_location(sender, instance, created, **kwargs):
+    """Слово перенесли в другой урок - переносим и прогресс по нему"""
+    if created:
+        return
+    UserProgress.objects.filter(word=instance).exclude(lesson_id=instance.lesson_id).update(
+        lesson_id=instance.lesson_id,
+        block_id=instance.lesson.block_id,
+    )
+
+
+@receiver(post_save, sender=Lesson)
+def sync_lesson_progress_location(sender, instance, created, **kwargs):
+    """Урок перенесли в другой блок - переносим прогресс по его словам"""
+    if created:
+        return
+    UserProgress.objects.filter(lesson=instance).exclude(block_id=instance.block_id).update(
+        block_id=instance.block_id,
+    )
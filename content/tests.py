@@ -1,3 +1,226 @@
-from django.test import TestCase
+# content/tests.py
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from tests.factories import seed_catalogue, create_paid_user
+from .catalogue import get_catalogue, build_catalogue
+from .checks import check_catalogue_cache_backend
+from .models import Block, Lesson, Word, UserProgress, accuracy_expression
+from .ordering import update_sort_keys
+from .questions import build_questions
+
+
+class CatalogueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blocks = seed_catalogue(blocks=5, lessons_per_block=4, words_per_lesson=5)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_build_does_not_depend_on_size(self):
+        with self.assertNumQueries(3):
+            catalogue = build_catalogue('test')
+
+        self.assertEqual(len(catalogue.blocks), 5)
+        self.assertEqual(catalogue.total_words, 100)
+
+    def test_cached_between_calls(self):
+        get_catalogue()
+
+        with self.assertNumQueries(0):
+            get_catalogue()
+
+    def test_invalidated_on_content_change(self):
+        word = Word.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            word.translation = 'новый перевод'
+            word.save()
+
+        self.assertEqual(get_catalogue().get_word(word.id).translation, 'новый перевод')
+
+    def test_unknown_ids(self):
+        catalogue = get_catalogue()
+
+        with self.assertRaises(Word.DoesNotExist):
+            catalogue.get_word(10 ** 9)
+        with self.assertRaises(Lesson.DoesNotExist):
+            catalogue.get_lesson('abc')
+
+    def test_local_cache_warning(self):
+        messages = check_catalogue_cache_backend(None)
+
+        self.assertEqual([message.id for message in messages], ['content.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache(self):
+        self.assertEqual(check_catalogue_cache_backend(None), [])
+
+
+class SortKeyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blocks = seed_catalogue(blocks=3, lessons_per_block=3, words_per_lesson=2)
+
+    def assertOrderMatchesJoins(self):
+        self.assertEqual(
+            list(Lesson.objects.values_list('id', flat=True)),
+            list(Lesson.objects.order_by('block__order', 'order').values_list('id', flat=True)),
+        )
+        self.assertEqual(
+            list(Word.objects.values_list('id', flat=True)),
+            list(Word.objects.order_by('lesson__block__order', 'lesson__order', 'order').values_list('id', flat=True)),
+        )
+
+    def test_default_ordering_without_joins(self):
+        self.assertNotIn('JOIN', str(Word.objects.filter(lesson__in=[1, 2]).query))
+        self.assertNotIn('JOIN', str(Lesson.objects.filter(block=self.blocks[0]).query))
+        self.assertOrderMatchesJoins()
+
+    def test_update_after_reorder(self):
+        Block.objects.filter(pk=self.blocks[0].pk).update(order=10)
+        Lesson.objects.filter(block=self.blocks[1], order=1).update(order=5)
+
+        update_sort_keys()
+
+        self.assertOrderMatchesJoins()
+        self.assertEqual(update_sort_keys(), 0)
+
+    def test_admin_reorder(self):
+        model_admin = admin.site._registry[Block]
+        request = RequestFactory().post('/')
+        block = self.blocks[0]
+        form = model_admin.get_form(request, block)(
+            data={'title': block.title, 'description': block.description, 'order': 10, 'is_active': True},
+            instance=block,
+        )
+        self.assertTrue(form.is_valid())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+        self.assertEqual(Word.objects.last().lesson.block_id, block.id)
+        self.assertOrderMatchesJoins()
+
+
+class QuestionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blocks = seed_catalogue(blocks=3, lessons_per_block=3, words_per_lesson=5)
+
+    def setUp(self):
+        cache.clear()
+        self.catalogue = get_catalogue()
+
+    def test_seeded(self):
+        first = build_questions(self.catalogue, [self.blocks[0].id], seed=42)
+
+        self.assertEqual(build_questions(self.catalogue, [self.blocks[0].id], seed=42), first)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len({question.word.id for question in first}), 10)
+        for question in first:
+            self.assertEqual(question.word.block_id, self.blocks[0].id)
+            self.assertIn(question.word.translation, question.options)
+            self.assertEqual(len(set(question.options)), 4)
+
+    def test_inactive_lessons_skipped(self):
+        # У второго блока последний урок неактивен
+        block = self.catalogue.get_block(self.blocks[1].id)
+        inactive = {word.id for lesson in block.lessons if not lesson.is_active for word in lesson.words}
+
+        questions = build_questions(self.catalogue, [block.id], seed=1, count=100)
+
+        self.assertEqual(len(questions), 10)
+        self.assertFalse(inactive & {question.word.id for question in questions})
+
+    def test_revision_over_blocks_without_queries(self):
+        block_ids = [block.id for block in self.blocks]
+
+        with self.assertNumQueries(0):
+            questions = build_questions(self.catalogue, block_ids, seed=7, count=45)
+
+        self.assertEqual({question.word.block_id for question in questions}, set(block_ids))
+
+
+class UserProgressTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blocks = seed_catalogue(blocks=2, lessons_per_block=2, words_per_lesson=3)
+        cls.user = create_paid_user()
+
+    def create_progress(self, correct, attempts, word=None):
+        return UserProgress.objects.create(
+            user=self.user,
+            word=word or Word.objects.exclude(userprogress__user=self.user).first(),
+            correct_answers=correct,
+            total_attempts=attempts,
+        )
+
+    def test_learned_rule(self):
+        self.assertTrue(self.create_progress(4, 5).is_learned)  # ровно 80%
+        self.assertFalse(self.create_progress(3, 4).is_learned)  # 75%
+        self.assertFalse(self.create_progress(2, 2).is_learned)  # мало попыток
+
+    def test_bulk_rule_matches_model(self):
+        cases = [(4, 5), (3, 4), (2, 2), (3, 3), (79, 100), (8, 10)]
+        words = list(Word.objects.all()[:len(cases)])
+        UserProgress.objects.bulk_create([
+            UserProgress(
+                user=self.user, word=word, lesson_id=word.lesson_id,
+                correct_answers=correct, total_attempts=attempts,
+            )
+            for word, (correct, attempts) in zip(words, cases)
+        ])
+
+        UserProgress.objects.filter(user=self.user).apply_learned_rule()
+
+        for progress in UserProgress.objects.filter(user=self.user):
+            expected = UserProgress(correct_answers=progress.correct_answers, total_attempts=progress.total_attempts)
+            expected.apply_learned_rule()
+            self.assertEqual(progress.is_learned, expected.is_learned, progress.correct_answers)
+
+    def test_accuracy_expression(self):
+        self.create_progress(1, 3)
+        self.create_progress(0, 0)
+
+        values = sorted(
+            UserProgress.objects.filter(user=self.user)
+            .annotate(accuracy_value=accuracy_expression()).values_list('accuracy_value', flat=True)
+        )
+
+        self.assertEqual(values[0], 0)
+        self.assertAlmostEqual(values[1], 100 / 3)
+
+    def test_location_filled_on_save(self):
+        progress = self.create_progress(1, 1)
+
+        self.assertEqual(progress.lesson_id, progress.word.lesson_id)
+        self.assertEqual(progress.block_id, progress.word.lesson.block_id)
+
+    def test_location_follows_word(self):
+        progress = self.create_progress(1, 1)
+        target = Lesson.objects.filter(block=self.blocks[1]).first()
+
+        word = progress.word
+        word.lesson = target
+        word.save()
+
+        progress.refresh_from_db()
+        self.assertEqual(progress.lesson_id, target.id)
+        self.assertEqual(progress.block_id, self.blocks[1].id)
+
+    def test_location_follows_lesson(self):
+        progress = self.create_progress(1, 1)
+
+        lesson = progress.lesson
+        lesson.block = self.blocks[1]
+        lesson.save()
+
+        progress.refresh_from_db()
+        self.assertEqual(progress.block_id, self.blocks[1].id)
@@ -0,0 +1,56 @@
+# core/logging.py
+
+"""
+Фильтры и форматтер для LOGGING (см. core/settings.py).
+
+request_id проставляется RequestIdMiddleware и попадает в каждую запись,
+сделанную во время обработки запроса.
+"""
+
+import json
+import logging
+import random
+from contextvars import ContextVar
+
+request_id_var = ContextVar('request_id', default='-')
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись поле request_id"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю rate записей уровня level и ниже.
+    Записи выше level (INFO, WARNING, ...) проходят всегда.
+    """
+
+    def __init__(self, rate=1.0, level='DEBUG'):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record):
+        if record.levelno > self.level or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
@@ -0,0 +1,143 @@
+# core/metrics.py
+
+"""
+Метрики запросов по view: число SQL-запросов, время в базе и общее время.
+
+Хранятся в памяти процесса - у каждого воркера gunicorn свои - в окне
+последних QUERY_METRICS_WINDOW запросов на view. Отдаются в текстовом
+формате Prometheus (core.views.metrics).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Обертка для connection.execute_wrapper: считает запросы и время"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsRegistry:
+    """Скользящее окно (запросы, время в базе, время ответа) по view"""
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+
+    def record(self, view, queries, db_time, duration):
+        with self._lock:
+            samples = self._samples.get(view)
+            if samples is None:
+                samples = self._samples[view] = deque(maxlen=self.window)
+            samples.append((queries, db_time, duration))
+            self._totals[view] = self._totals.get(view, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: (list(samples), self._totals[view])
+                for view, samples in self._samples.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+
+registry = MetricsRegistry(settings.QUERY_METRICS_WINDOW)
+
+
+def percentile(values, quantile):
+    values = sorted(values)
+    index = min(len(values) - 1, int(quantile * len(values)))
+    return values[index]
+
+
+def render_prometheus():
+    """Метрики в текстовом формате Prometheus"""
+    metrics = (
+        ('alfiya_request_queries', 'SQL queries per request', 0),
+        ('alfiya_request_db_seconds', 'Time spent in the database per request', 1),
+        ('alfiya_request_duration_seconds', 'Request duration', 2),
+    )
+    snapshot = sorted(registry.snapshot().items())
+
+    lines = []
+    for name, help_text, column in metrics:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} summary')
+        for view, (samples, total) in snapshot:
+            values = [sample[column] for sample in samples]
+            for quantile in QUANTILES:
+                lines.append(
+                    f'{name}{{view="{view}",quantile="{quantile}"}} {percentile(values, quantile):g}'
+                )
+            lines.append(f'{name}_sum{{view="{view}"}} {sum(values):g}')
+            lines.append(f'{name}_count{{view="{view}"}} {len(values)}')
+    lines.append('# HELP alfiya_requests_total Requests handled by this process')
+    lines.append('# TYPE alfiya_requests_total counter')
+    for view, (_, total) in snapshot:
+        lines.append(f'alfiya_requests_total{{view="{view}"}} {total}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryMetricsMiddleware:
+    """
+    Записывает метрики каждого запроса по имени URL.
+
+    Если для view задан бюджет в QUERY_BUDGETS и он превышен, пишет
+    предупреждение, а при QUERY_BUDGET_STRICT (тесты) - бросает
+    QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_METRICS_ENABLED:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry.record(view, counter.count, counter.duration, duration)
+
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is not None and counter.count > budget:
+            message = f'{view}: {counter.count} SQL queries, budget {budget}'
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
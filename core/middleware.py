@@ -0,0 +1,30 @@
+# core/middleware.py
+
+import re
+import uuid
+from .logging import request_id_var
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Принимаем id от прокси, только если он похож на id, а не на произвольный текст
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIdMiddleware:
+    """Присваивает запросу id для логов и возвращает его в заголовке ответа"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        if not VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        token = request_id_var.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
@@ -0,0 +1,47 @@
+# core/sessions.py
+
+"""
+Движок сессий: кеш + база, запись в базу только при необходимости.
+
+При SESSION_SAVE_EVERY_REQUEST middleware сохраняет сессию на каждом
+запросе, чтобы продлевать ее срок. Здесь сохранение пропускается, если
+данные сессии не менялись и срок продлевался недавно (не раньше
+SESSION_REFRESH_INTERVAL секунд назад). Кука продлевается как обычно,
+срок в базе отстает от нее не больше чем на SESSION_REFRESH_INTERVAL.
+"""
+
+import time
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.utils import timezone
+
+REFRESHED_AT_KEY = '_refreshed_at'
+
+
+class SessionStore(cached_db.SessionStore):
+
+    def _needs_refresh(self):
+        refreshed_at = self._session.get(REFRESHED_AT_KEY)
+        if refreshed_at is None:
+            return True
+        return time.time() - refreshed_at >= settings.SESSION_REFRESH_INTERVAL
+
+    def save(self, must_create=False):
+        if not (must_create or self.modified or self._needs_refresh()):
+            return
+        # Пишем в словарь напрямую, чтобы не помечать сессию измененной
+        self._session[REFRESHED_AT_KEY] = int(time.time())
+        super().save(must_create)
+
+    @classmethod
+    def clear_expired(cls, batch_size=5000):
+        """Удаляет истекшие сессии пачками (вызывается командой clearsessions)"""
+        model = cls.get_model_class()
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now())
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return
+            model.objects.filter(session_key__in=keys).delete()
@@ -40,6 +40,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestIdMiddleware',
+    'core.metrics.QueryMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -110,6 +112,49 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ========== КЕШ ==========
+
+# В продакшене кеш должен быть общим для всех воркеров (например,
+# CACHE_URL=rediscache://127.0.0.1:6379/1), иначе сброс кеша каталога
+# после правок в админке увидит только один процесс.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Бэкенды кеша, не общие для воркеров. С ними кеши, которые сбрасываются
+# сменой версии в кеше, выключаются или живут недолго, а проверки
+# content.W001, api.W001 и users.W001 предупреждают об этом.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Время жизни снимка каталога (блоки, уроки, слова) в секундах.
+# Ограничивает устаревание данных, если кеш не общий для воркеров:
+# с локальным кешем правку в админке другие воркеры увидят через минуту.
+CATALOGUE_CACHE_TIMEOUT = env.int(
+    'CATALOGUE_CACHE_TIMEOUT',
+    default=60 * 60 if CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS else 60,
+)
+
+# Время жизни версии правил достижений (progress/achievements.py) в секундах.
+# Ограничивает устаревание правил, если кеш не общий для воркеров.
+ACHIEVEMENTS_CACHE_TIMEOUT = env.int('ACHIEVEMENTS_CACHE_TIMEOUT', default=10 * 60)
+
+# Время жизни версии прогресса пользователя и закешированных ответов
+# статистики (dashboard, progress, profile) в секундах
+PROGRESS_CACHE_TIMEOUT = env.int('PROGRESS_CACHE_TIMEOUT', default=10 * 60)
+
+# Кеш ответов статистики и ETag (api/caching.py) держатся на версии
+# прогресса в кеше. С кешем в памяти процесса версию меняет только воркер,
+# принявший ответ, остальные до PROGRESS_CACHE_TIMEOUT отдают устаревшие
+# данные и 304. Поэтому по умолчанию кеш ответов включен только с общим
+# бэкендом, включение с локальным дает предупреждение api.W001.
+PROGRESS_RESPONSE_CACHE = env.bool(
+    'PROGRESS_RESPONSE_CACHE',
+    default=CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS,
+)
+
 # ========== НАСТРОЙКИ СЕССИИ И АУТЕНТИФИКАЦИИ ==========
 
 # Система аутентификации
@@ -121,10 +166,29 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',  # стандартный (для админки)
 ]
 
+# Кеш TokenBackend (users/backends.py) в секундах: найденные пользователи
+# и промахи по токену. Сброс при изменении пользователя виден только в общем
+# кеше, с кешем в памяти процесса пользователи читаются из базы (users.W002)
+AUTH_CACHE = env.bool('AUTH_CACHE', default=CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS)
+AUTH_CACHE_TIMEOUT = env.int('AUTH_CACHE_TIMEOUT', default=5 * 60)
+AUTH_NEGATIVE_CACHE_TIMEOUT = env.int('AUTH_NEGATIVE_CACHE_TIMEOUT', default=60)
+
 # 🔥 КРИТИЧЕСКИ ВАЖНЫЕ НАСТРОЙКИ СЕССИИ ДЛЯ PWA
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Сессии в кеше с записью в базу только при изменении данных или раз
+# в SESSION_REFRESH_INTERVAL (см. core/sessions.py). Истекшие сессии
+# удаляются по расписанию: python manage.py clearsessions
+# logout удаляет сессию из базы и из кеша только своего воркера. С кешем
+# в памяти процесса остальные воркеры до SESSION_COOKIE_AGE принимали бы
+# куку вышедшего пользователя, поэтому с локальным кешем сессии хранятся
+# в базе, а core.sessions с ним дает предупреждение users.W001.
+SESSION_ENGINE = env.str(
+    'SESSION_ENGINE',
+    default='core.sessions' if CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+    else 'django.contrib.sessions.backends.db',
+)
 SESSION_COOKIE_AGE = 30 * 24 * 60 * 60  # 30 дней
 SESSION_SAVE_EVERY_REQUEST = True
+SESSION_REFRESH_INTERVAL = env.int('SESSION_REFRESH_INTERVAL', default=24 * 60 * 60)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_NAME = 'alfiya_sessionid'
 SESSION_COOKIE_SAMESITE = 'Lax'  # Разрешаем отправку cookies
@@ -241,28 +305,95 @@ if not DEBUG:
     SECURE_HSTS_SECONDS = 31536000  # 1 year
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
-    
-    # Logging
-    LOGGING = {
-        'version': 1,
-        'disable_existing_loggers': False,
-        'handlers': {
-            'file': {
-                'level': 'ERROR',
-                'class': 'logging.FileHandler',
-                'filename': BASE_DIR / 'django_errors.log',
-            },
+
+# ========== МЕТРИКИ ЗАПРОСОВ ==========
+
+# Число SQL-запросов и время по view (core/metrics.py), отдаются на /metrics/
+# персоналу или по заголовку "Authorization: Bearer <METRICS_TOKEN>"
+QUERY_METRICS_ENABLED = env.bool('QUERY_METRICS_ENABLED', default=True)
+QUERY_METRICS_WINDOW = env.int('QUERY_METRICS_WINDOW', default=1000)  # запросов на view
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# Максимум SQL-запросов на запрос к view (по имени URL), включая сессию
+# и аутентификацию. Не должен зависеть от размера каталога и прогресса.
+# Бюджет - худший случай пути: пустой кеш (каталог и сводка пользователя
+# собираются заново), первый ответ за день, завершение урока и блока.
+# Эти случаи проверяет api.tests.ColdPathTests. Горячий путь (кеши
+# прогреты) намного дешевле, его точное число запросов проверяют
+# остальные тесты api.tests.
+QUERY_BUDGETS = {
+    'api_dashboard': 15,
+    'progress_detailed': 15,
+    'progress_detail': 13,
+    'user_profile': 13,
+    'block_detail': 12,
+    'lesson_detail': 12,
+    'update_progress': 39,
+    'update_progress_batch': 42,
+    'complete_lesson': 24,
+    'complete_block': 21,
+    'start_block_test': 10,
+    'submit_block_test': 26,
+}
+# Бросать исключение при превышении бюджета (в тестах), иначе - предупреждение в лог
+QUERY_BUDGET_STRICT = env.bool('QUERY_BUDGET_STRICT', default=False)
+
+# ========== ЛОГИРОВАНИЕ ==========
+
+# В DEBUG - читаемый текст, в продакшене - JSON по строке на запись.
+# DEBUG-записи приложения проходят с вероятностью LOG_DEBUG_SAMPLE_RATE.
+LOG_LEVEL = env('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+LOG_DEBUG_SAMPLE_RATE = env.float('LOG_DEBUG_SAMPLE_RATE', default=1.0 if DEBUG else 0.01)
+APP_LOGGERS = ['api', 'content', 'core', 'progress', 'users']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'core.logging.RequestIdFilter',
         },
-        'loggers': {
-            'django': {
-                'handlers': ['file'],
-                'level': 'ERROR',
-                'propagate': True,
-            },
+        'sampling': {
+            '()': 'core.logging.SamplingFilter',
+            'rate': LOG_DEBUG_SAMPLE_RATE,
         },
-    }
-
-# Для отладки сессий
-if DEBUG:
-    import logging
-    logging.basicConfig(level=logging.DEBUG)
+    },
+    'formatters': {
+        'text': {
+            'format': '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s',
+        },
+        'json': {
+            '()': 'core.logging.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['request_id', 'sampling'],
+            'formatter': 'text' if DEBUG else 'json',
+        },
+        'file': {
+            'level': 'ERROR',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'django_errors.log',
+            'filters': ['request_id'],
+            'formatter': 'text',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'] if DEBUG else ['file'],
+            'level': 'INFO' if DEBUG else 'ERROR',
+            'propagate': False,
+        },
+        **{
+            name: {
+                'handlers': ['console', 'file'],
+                'level': LOG_LEVEL,
+                'propagate': False,
+            }
+            for name in APP_LOGGERS
+        },
+    },
+}
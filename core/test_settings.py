@@ -0,0 +1,53 @@
+# core/test_settings.py
+
+"""
+Настройки для тестов: SQLite в памяти, локальный кеш и строгие бюджеты
+SQL-запросов (QUERY_BUDGETS). PostgreSQL и .env не нужны:
+
+    python manage.py test --settings=core.test_settings
+"""
+
+import os
+
+for name in ('SECRET_KEY', 'DB_NAME', 'DB_USER', 'DB_PASSWORD', 'PAYMENT_SHARED_SECRET'):
+    os.environ.setdefault(name, 'test')
+
+from .settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# Тесты идут в одном процессе, локальный кеш здесь общий
+PROGRESS_RESPONSE_CACHE = True
+SESSION_ENGINE = 'core.sessions'
+AUTH_CACHE = True
+SILENCED_SYSTEM_CHECKS = ['api.W001', 'content.W001', 'users.W001', 'users.W002']
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+SECURE_SSL_REDIRECT = False
+QUERY_BUDGET_STRICT = True
+
+# Без файла django_errors.log: ошибки тестов видны в консоли
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'level': 'ERROR',
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'ERROR',
+    },
+}
@@ -27,6 +27,7 @@ urlpatterns = [
     path('app/', views.pwa_app, name='pwa_app'),
     path('login/token/', views.token_login, name='token_login'),
     path('logout/', views.logout_view, name='logout'),
+    path('metrics/', views.metrics, name='metrics'),
 
     # Protected routes (require authentication)
     path('dashboard/', views.dashboard, name='dashboard'),
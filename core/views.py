@@ -3,8 +3,14 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
+from django.conf import settings
+import hmac
 import json
+import logging
+from .metrics import render_prometheus
+
+logger = logging.getLogger(__name__)
 
 def home(request):
     """Главная страница (лендинг)"""
@@ -14,11 +20,10 @@ def home(request):
 
 def pwa_app(request):
     """PWA приложение - страница входа"""
-    print(f"🔐 PWA App - User: {request.user.username if request.user.is_authenticated else 'Anonymous'}")
+    logger.debug('PWA App: user=%s', request.user.pk)
     
     # Если пользователь уже авторизован и оплатил - сразу на дашборд
     if request.user.is_authenticated and request.user.is_paid:
-        print(f"✅ User already authenticated, redirecting to dashboard")
         return redirect('dashboard')
     
     # Проверяем токен из URL параметра
@@ -27,11 +32,10 @@ def pwa_app(request):
         user = authenticate(request, token=token)
         if user is not None and user.is_paid:
             login(request, user)
-            request.session.save()
-            print(f"✅ User logged in via token, redirecting to dashboard")
+            logger.info('User %s logged in via token', user.pk)
             return redirect('dashboard')
         else:
-            print(f"❌ Token authentication failed")
+            logger.info('PWA App: token authentication failed')
     
     # Иначе показываем страницу авторизации
     return render(request, 'app.html')
@@ -39,17 +43,14 @@ def pwa_app(request):
 @login_required
 def dashboard(request):
     """Dashboard страница - требует авторизации"""
-    print(f"🔐 Dashboard - User: {request.user.username}")
-    print(f"🔐 Dashboard - Authenticated: {request.user.is_authenticated}")
-    print(f"🔐 Dashboard - Is Paid: {request.user.is_paid}")
-    
+    logger.debug('Dashboard: user=%s paid=%s', request.user.pk, request.user.is_paid)
+
     # Дополнительная проверка оплаты
     if not request.user.is_paid:
-        print(f"❌ Dashboard access denied - user not paid: {request.user.username}")
+        logger.info('Dashboard access denied, user not paid: %s', request.user.pk)
         # Перенаправляем на страницу авторизации вместо 403
         return redirect('pwa_app')
     
-    print(f"✅ Dashboard access granted: {request.user.username}")
     return render(request, 'dashboard.html')
 
 @login_required
@@ -116,7 +117,6 @@ def token_login(request):
             user = authenticate(request, token=token)
             if user is not None and user.is_paid:
                 login(request, user)
-                request.session.save()
 
                 return JsonResponse({
                     'success': True,
@@ -133,6 +133,17 @@ def token_login(request):
 
     return JsonResponse({'success': False, 'error': 'Метод не разрешен'})
 
+def metrics(request):
+    """Метрики запросов в формате Prometheus - для персонала или по METRICS_TOKEN"""
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if not authorized and settings.METRICS_TOKEN:
+        authorized = hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+        )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4')
+
 def handler404(request, exception):
     return render(request, '404.html', status=404)
 
@@ -0,0 +1,196 @@
+# progress/achievements.py
+
+"""
+Движок достижений.
+
+Определения Achievement загружаются один раз в память процесса и
+раскладываются по счетчикам. При изменении счетчика проверяются только
+правила этого счетчика, пересекшие порог между старым и новым значением.
+Если порог не пересечен, база не трогается.
+
+Версия правил хранится в кеше с ACHIEVEMENTS_CACHE_TIMEOUT: с кешем
+в памяти процесса правку в админке остальные воркеры увидят не позже,
+чем истечет их версия.
+
+Счетчик и порог берутся из condition ({"counter": ..., "threshold": ...}),
+а если их там нет - выводятся из achievement_type.
+"""
+
+import re
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from content.models import UserProgress
+from .models import Achievement, UserAchievement, UserStats, LessonProgress, BlockProgress
+
+WORDS_LEARNED = 'words_learned'
+LESSONS_COMPLETED = 'lessons_completed'
+BLOCKS_COMPLETED = 'blocks_completed'
+STREAK = 'streak'
+
+COUNTERS = (WORDS_LEARNED, LESSONS_COMPLETED, BLOCKS_COMPLETED, STREAK)
+
+# achievement_type -> (счетчик, порог) для типов без числа в названии
+TYPE_RULES = {
+    'first_words': (WORDS_LEARNED, 1),
+    'first_lesson': (LESSONS_COMPLETED, 1),
+    'block_completed': (BLOCKS_COMPLETED, 1),
+}
+
+TYPE_PATTERNS = (
+    (re.compile(r'^words_(\d+)$'), WORDS_LEARNED),
+    (re.compile(r'^streak_(\d+)$'), STREAK),
+)
+
+ACHIEVEMENTS_VERSION_KEY = 'progress:achievements:version'
+
+
+def get_rule(achievement):
+    """(счетчик, порог) для достижения или None, если правила нет"""
+    condition = achievement.condition or {}
+    counter, threshold = TYPE_RULES.get(achievement.achievement_type, (None, None))
+
+    if counter is None:
+        for pattern, pattern_counter in TYPE_PATTERNS:
+            match = pattern.match(achievement.achievement_type)
+            if match:
+                counter, threshold = pattern_counter, int(match.group(1))
+                break
+
+    counter = condition.get('counter', counter)
+    threshold = condition.get('threshold', threshold)
+    if counter not in COUNTERS or threshold is None:
+        return None
+    return counter, int(threshold)
+
+
+def load_rules():
+    """{счетчик: [(порог, achievement_id), ...]} по возрастанию порога"""
+    rules = {}
+    for achievement in Achievement.objects.all():
+        rule = get_rule(achievement)
+        if rule:
+            counter, threshold = rule
+            rules.setdefault(counter, []).append((threshold, achievement.id))
+    for counter_rules in rules.values():
+        counter_rules.sort()
+    return rules
+
+
+_local_rules = None
+_local_version = None
+
+
+def invalidate_rules():
+    cache.set(ACHIEVEMENTS_VERSION_KEY, uuid.uuid4().hex, settings.ACHIEVEMENTS_CACHE_TIMEOUT)
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def achievement_changed(sender, **kwargs):
+    """Перечитываем правила после правки достижений в админке"""
+    transaction.on_commit(invalidate_rules)
+
+
+def get_rules():
+    global _local_rules, _local_version
+
+    version = cache.get(ACHIEVEMENTS_VERSION_KEY)
+    if version is None:
+        cache.add(ACHIEVEMENTS_VERSION_KEY, uuid.uuid4().hex, settings.ACHIEVEMENTS_CACHE_TIMEOUT)
+        version = cache.get(ACHIEVEMENTS_VERSION_KEY)
+
+    if _local_rules is None or version is None or version != _local_version:
+        _local_rules = load_rules()
+        _local_version = version
+    return _local_rules
+
+
+def award_for_counter(user, counter, old_value, new_value):
+    """
+    Выдает достижения, чей порог пересечен при изменении счетчика
+    с old_value до new_value. Возвращает id выданных достижений.
+    """
+    if new_value <= old_value:
+        return []
+
+    achievement_ids = [
+        achievement_id
+        for threshold, achievement_id in get_rules().get(counter, [])
+        if old_value < threshold <= new_value
+    ]
+    if achievement_ids:
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(user=user, achievement_id=achievement_id) for achievement_id in achievement_ids],
+            ignore_conflicts=True
+        )
+    return achievement_ids
+
+
+def on_words_learned(user, count, learned):
+    """
+    Слова стали выученными: count - сколько слов добавилось,
+    learned - выучено всего (learned_words из сводки, без COUNT по прогрессу)
+    """
+    if count <= 0 or not get_rules().get(WORDS_LEARNED):
+        return []
+    return award_for_counter(user, WORDS_LEARNED, learned - count, learned)
+
+
+def on_lesson_completed(user):
+    if not get_rules().get(LESSONS_COMPLETED):
+        return []
+    completed = LessonProgress.objects.filter(user=user, is_completed=True).count()
+    return award_for_counter(user, LESSONS_COMPLETED, completed - 1, completed)
+
+
+def on_block_completed(user):
+    if not get_rules().get(BLOCKS_COMPLETED):
+        return []
+    completed = BlockProgress.objects.filter(user=user, is_completed=True).count()
+    return award_for_counter(user, BLOCKS_COMPLETED, completed - 1, completed)
+
+
+def on_new_study_day(user, date):
+    """
+    Первая активность за день: продлеваем или сбрасываем серию дней
+    и проверяем достижения за серию.
+    """
+    user_stats, _ = UserStats.objects.get_or_create(user=user)
+
+    # Серия продолжается, только если предыдущий учебный день - вчера.
+    # После пропуска сохраненная серия устарела и начинается заново
+    previous_date = (
+        user.daily_progress.filter(date__lt=date)
+        .order_by('-date').values_list('date', flat=True).first()
+    )
+    continues = previous_date == date - timedelta(days=1)
+    old_streak = user_stats.current_streak if continues else 0
+
+    user_stats.current_streak = old_streak + 1
+    user_stats.longest_streak = max(user_stats.longest_streak, user_stats.current_streak)
+    user_stats.save(update_fields=['current_streak', 'longest_streak', 'last_active'])
+
+    return award_for_counter(user, STREAK, old_streak, user_stats.current_streak)
+
+
+def sync_achievements(user):
+    """
+    Выдает все достижения, порог которых уже достигнут.
+    Нужен для пользователей, накопивших прогресс до появления правил.
+    """
+    user_stats = UserStats.objects.filter(user=user).first()
+    values = {
+        WORDS_LEARNED: UserProgress.objects.filter(user=user, is_learned=True).count(),
+        LESSONS_COMPLETED: LessonProgress.objects.filter(user=user, is_completed=True).count(),
+        BLOCKS_COMPLETED: BlockProgress.objects.filter(user=user, is_completed=True).count(),
+        STREAK: user_stats.longest_streak if user_stats else 0,
+    }
+    awarded = []
+    for counter, value in values.items():
+        awarded += award_for_counter(user, counter, 0, value)
+    return awarded
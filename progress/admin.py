@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 from .models import (
-    UserStats, DailyProgress, LessonProgress, 
+    UserStats, UserSummary, DailyProgress, LessonProgress, 
     BlockProgress, Achievement, UserAchievement, StudySession
 )
 
@@ -12,6 +12,12 @@ class UserStatsAdmin(admin.ModelAdmin):
     list_filter = ('last_active',)
     search_fields = ('user__username', 'user__telegram_username')
 
+@admin.register(UserSummary)
+class UserSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'learned_words', 'words_started', 'study_days', 'is_stale', 'updated_at')
+    list_filter = ('is_stale',)
+    search_fields = ('user__username',)
+
 @admin.register(DailyProgress)
 class DailyProgressAdmin(admin.ModelAdmin):
     list_display = ('user', 'date', 'words_learned', 'lessons_completed', 'time_studied', 'accuracy')
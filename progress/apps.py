@@ -3,4 +3,12 @@ from django.apps import AppConfig
 class ProgressConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'progress'
-    verbose_name = 'Прогресс обучения'
\ No newline at end of file
+    verbose_name = 'Прогресс обучения'
+
+    def ready(self):
+        # Сброс закешированных правил достижений при их изменении
+        from . import achievements  # noqa: F401
+        # Пометка сводок устаревшими при переносе и удалении контента
+        from . import summary  # noqa: F401
+        # Сброс кеша статистики при изменении пользователя
+        from . import versions  # noqa: F401
\ No newline at end of file
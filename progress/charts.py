@@ -0,0 +1,79 @@
+# progress/charts.py
+
+"""
+Данные для графиков статистики.
+
+Ряды строятся агрегатами в базе (только нужные колонки, GROUP BY по часу)
+и дополняются пропущенными днями через словарь по дате, поэтому стоимость
+не зависит от объема истории пользователя.
+"""
+
+from datetime import timedelta
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+from .models import DailyProgress, StudySession
+
+DAILY_FIELDS = ('words_learned', 'lessons_completed', 'time_studied', 'accuracy')
+
+# (название, первый час, час после последнего) в порядке вывода
+TIME_OF_DAY_BUCKETS = (
+    ('morning', 6, 12),
+    ('afternoon', 12, 18),
+    ('evening', 18, 24),
+    ('night', 0, 6),
+)
+
+
+def last_days(days, today=None):
+    """(start, end) для последних days дней, включая сегодня"""
+    # Даты DailyProgress пишутся как timezone.now().date()
+    today = today or timezone.now().date()
+    return today - timedelta(days=days - 1), today
+
+
+def date_range(start, end):
+    """Даты от start до end включительно"""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def daily_series(user, start, end, fill_gaps=True):
+    """
+    Дневной ряд DailyProgress за [start, end].
+    С fill_gaps дни без активности заполняются нулями.
+    """
+    rows = {
+        row['date']: row
+        for row in DailyProgress.objects.filter(
+            user=user, date__range=(start, end)
+        ).values('date', *DAILY_FIELDS).order_by()
+    }
+    dates = date_range(start, end) if fill_gaps else sorted(rows)
+
+    series = []
+    for date in dates:
+        row = rows.get(date)
+        point = {'date': date.strftime('%Y-%m-%d')}
+        for field in DAILY_FIELDS:
+            point[field] = row[field] if row else 0
+        series.append(point)
+    return series
+
+
+def time_of_day_distribution(user, since):
+    """
+    Минуты занятий по времени суток с момента since. Час начала сессии
+    берется в TIME_ZONE (ExtractHour с USE_TZ), а не в UTC.
+    """
+    minutes_by_hour = dict(
+        StudySession.objects.filter(user=user, start_time__gte=since)
+        .annotate(hour=ExtractHour('start_time'))
+        .values('hour')
+        .annotate(minutes=Sum('duration'))
+        .values_list('hour', 'minutes')
+        .order_by()
+    )
+    return {
+        name: sum(minutes_by_hour.get(hour, 0) for hour in range(first_hour, last_hour))
+        for name, first_hour, last_hour in TIME_OF_DAY_BUCKETS
+    }
@@ -0,0 +1,45 @@
+# progress/management/commands/backfill_progress_location.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+from content.models import UserProgress, Word
+
+
+class Command(BaseCommand):
+    """
+    Заполняет UserProgress.lesson и UserProgress.block по слову.
+    Незаполненные записи заполняет миграция content.0005, команда нужна
+    для повторной сверки (--all).
+
+    Записи обрабатываются диапазонами первичного ключа, каждый диапазон -
+    один UPDATE с подзапросом, поэтому команду можно запускать на живой
+    базе и прерывать в любой момент.
+    """
+    help = 'Заполняет денормализованные lesson/block в UserProgress'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--all', action='store_true',
+                            help='Пересчитать все записи, а не только незаполненные')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = UserProgress.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(Q(lesson__isnull=True) | Q(block__isnull=True))
+
+        bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.SUCCESS('Нечего заполнять'))
+            return
+
+        word = Word.objects.filter(pk=OuterRef('word_id'))
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            updated += queryset.filter(pk__gte=start, pk__lt=start + batch_size).update(
+                lesson_id=Subquery(word.values('lesson_id')[:1]),
+                block_id=Subquery(word.values('lesson__block_id')[:1]),
+            )
+            self.stdout.write(f'Обработано до id {start + batch_size - 1}: {updated}')
+
+        self.stdout.write(self.style.SUCCESS(f'Обновлено записей: {updated}'))
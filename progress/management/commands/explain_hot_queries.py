@@ -0,0 +1,97 @@
+# progress/management/commands/explain_hot_queries.py
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from content.models import UserProgress
+from progress.models import DailyProgress, LessonProgress, BlockProgress, StudySession
+
+User = get_user_model()
+
+
+def hot_queries(user):
+    """(название, таблица, queryset) - самые частые запросы API"""
+    lesson_ids = list(user.lesson_progress.values_list('lesson_id', flat=True)[:20]) or [0]
+    block_ids = list(user.block_progress.values_list('block_id', flat=True)[:20]) or [0]
+    month_ago = timezone.now() - timedelta(days=30)
+
+    return [
+        ('learned words total', 'content_userprogress',
+         UserProgress.objects.filter(user=user, is_learned=True)),
+        ('learned words by block', 'content_userprogress',
+         UserProgress.objects.filter(user=user, is_learned=True)
+         .values_list('block_id').annotate(learned=Count('id')).order_by()),
+        ('word progress by lessons', 'content_userprogress',
+         UserProgress.objects.filter(user=user, lesson__in=lesson_ids)),
+        ('lesson progress by lessons', 'progress_lessonprogress',
+         LessonProgress.objects.filter(user=user, lesson__in=lesson_ids)),
+        ('completed lessons', 'progress_lessonprogress',
+         LessonProgress.objects.filter(user=user, is_completed=True)),
+        ('block progress by blocks', 'progress_blockprogress',
+         BlockProgress.objects.filter(user=user, block__in=block_ids)),
+        ('completed blocks', 'progress_blockprogress',
+         BlockProgress.objects.filter(user=user, is_completed=True)),
+        ('daily progress for 30 days', 'progress_dailyprogress',
+         DailyProgress.objects.filter(user=user, date__gte=month_ago.date())),
+        ('study sessions for 30 days', 'progress_studysession',
+         StudySession.objects.filter(user=user, start_time__gte=month_ago)),
+        ('recent study sessions', 'progress_studysession',
+         StudySession.objects.filter(user=user).order_by('-start_time')[:5]),
+    ]
+
+
+def uses_seq_scan(plan, table):
+    """Есть ли в плане полный проход по таблице"""
+    if connection.vendor == 'postgresql':
+        return f'Seq Scan on {table}' in plan
+    if connection.vendor == 'sqlite':
+        return any(
+            f'SCAN {table}' in line and 'USING' not in line
+            for line in plan.splitlines()
+        )
+    return False
+
+
+class Command(BaseCommand):
+    """
+    Показывает, какие частые запросы к таблицам прогресса идут по индексу.
+
+    На маленькой базе PostgreSQL часто выбирает Seq Scan независимо от
+    индексов, поэтому запускать имеет смысл на данных продакшн-объема.
+    """
+    help = 'EXPLAIN для частых запросов к таблицам прогресса'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help='Пользователь для подстановки в запросы')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (только PostgreSQL)')
+        parser.add_argument('--plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        if options['user_id']:
+            user = User.objects.filter(pk=options['user_id']).first()
+        else:
+            user = User.objects.filter(progress__isnull=False).first() or User.objects.first()
+        if user is None:
+            raise CommandError('Нет пользователей для построения запросов')
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        seq_scans = 0
+        for name, table, queryset in hot_queries(user):
+            plan = queryset.explain(**explain_options)
+            if uses_seq_scan(plan, table):
+                seq_scans += 1
+                status = self.style.WARNING('seq scan')
+            else:
+                status = self.style.SUCCESS('index')
+            self.stdout.write(f'{name:<30} {table:<26} {status}')
+            if options['plans']:
+                self.stdout.write(plan + '\n')
+
+        if seq_scans:
+            self.stdout.write(self.style.WARNING(f'Запросов с полным проходом по таблице: {seq_scans}'))
@@ -0,0 +1,390 @@
+# progress/management/commands/generate_dataset.py
+
+import gzip
+import json
+import random
+import time
+import uuid
+from datetime import timedelta
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+from content.catalogue import bump_catalogue_version
+from content.models import Block, Lesson, Word, UserProgress, is_learned_by_rule
+from progress.models import UserStats, DailyProgress, LessonProgress, BlockProgress, StudySession
+
+User = get_user_model()
+
+# Порядок загрузки: таблицы, на которые ссылаются, раньше зависимых
+DATASET_MODELS = (
+    Block, Lesson, Word, User,
+    UserProgress, LessonProgress, BlockProgress, DailyProgress, StudySession, UserStats,
+)
+
+# Таблицы каталога выгружаются целиком (команда требует пустой каталог),
+# остальные - только строки пользователей, созданных командой
+CATALOGUE_MODELS = (Block, Lesson, Word)
+
+# Колонки, которые заполняет генератор, в порядке значений в строках
+GENERATED_FIELDS = {
+    Block: ('id', 'title', 'description', 'order', 'is_active', 'created_at'),
+    Lesson: ('id', 'block_id', 'title', 'order', 'is_active', 'sort_key'),
+    Word: (
+        'id', 'lesson_id', 'arabic', 'translation', 'transcription', 'audio', 'image',
+        'example_verse', 'example_translation', 'order', 'sort_key',
+    ),
+    User: (
+        'id', 'username', 'password', 'first_name', 'last_name', 'email', 'telegram_username',
+        'is_superuser', 'is_staff', 'is_active', 'is_paid', 'auth_token',
+        'payment_date', 'date_joined', 'created_at',
+    ),
+    UserProgress: (
+        'user_id', 'word_id', 'lesson_id', 'block_id', 'is_learned',
+        'correct_answers', 'total_attempts', 'last_reviewed',
+    ),
+    LessonProgress: (
+        'user_id', 'lesson_id', 'is_completed', 'completed_at', 'accuracy', 'time_spent',
+        'correct_answers', 'total_attempts', 'words_learned',
+    ),
+    BlockProgress: (
+        'user_id', 'block_id', 'is_completed', 'completed_at', 'overall_accuracy',
+        'lessons_completed', 'total_lessons',
+    ),
+    DailyProgress: (
+        'user_id', 'date', 'words_learned', 'lessons_completed', 'time_studied', 'accuracy',
+        'correct_answers', 'total_attempts',
+    ),
+    StudySession: ('user_id', 'start_time', 'end_time', 'duration', 'average_accuracy'),
+    UserStats: ('user_id', 'total_study_time', 'total_sessions', 'current_streak', 'longest_streak', 'last_active'),
+}
+
+# Значения этих полей уходят в драйвер как есть
+PLAIN_FIELDS = (
+    models.IntegerField, models.FloatField, models.BooleanField,
+    models.CharField, models.TextField, models.ForeignKey,
+)
+
+ARABIC_LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+
+
+def reset_sequences(models):
+    """Сдвигает автоинкремент после вставки с явными id"""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+class BulkWriter:
+    """
+    Пишет строки (кортежи значений полей) многострочными INSERT пачками
+    по batch_size на модель, без создания экземпляров моделей и компиляции
+    запросов в ORM. Даты, UUID и файлы приводятся к виду базы тем же
+    get_db_prep_save, что и при save(); auto_now не применяется.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.fields = {}
+        self.buffers = {}
+        self.counts = {}
+
+    def set_fields(self, model, names):
+        self.flush(model)
+        self.fields[model] = [model._meta.get_field(name) for name in names]
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        for model in [model] if model else [m for m in DATASET_MODELS if m in self.buffers]:
+            rows = self.buffers.pop(model, [])
+            if rows:
+                self.insert(model, rows)
+                self.counts[model] = self.counts.get(model, 0) + len(rows)
+
+    @staticmethod
+    def preparer(field):
+        # Даты в пачке повторяются, приводим каждое значение один раз
+        prepared = {}
+
+        def prepare(value):
+            try:
+                return prepared[value]
+            except KeyError:
+                result = prepared[value] = field.get_db_prep_save(field.to_python(value), connection)
+                return result
+        return prepare
+
+    def insert(self, model, rows):
+        fields = self.fields[model]
+        preparers = [None if isinstance(field, PLAIN_FIELDS) else self.preparer(field) for field in fields]
+        if any(preparers):
+            rows = [
+                [value if prepare is None else prepare(value) for value, prepare in zip(row, preparers)]
+                for row in rows
+            ]
+
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        placeholders = '(%s)' % ', '.join(['%s'] * len(fields))
+        step = connection.ops.bulk_batch_size(fields, rows)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), step):
+                chunk = rows[start:start + step]
+                cursor.execute(
+                    f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+                    f'VALUES {", ".join([placeholders] * len(chunk))}',
+                    [value for row in chunk for value in row],
+                )
+
+
+def streak_lengths(offsets):
+    """(текущая, самая длинная) серия дней по смещениям от сегодня"""
+    days = sorted(set(offsets))
+    current = 0
+    while current < len(days) and days[current] == current:
+        current += 1
+    longest = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous is not None and day == previous + 1 else 1
+        longest = max(longest, run)
+        previous = day
+    return current, longest
+
+
+class Command(BaseCommand):
+    """
+    Генерирует синтетический набор данных: каталог (блоки, уроки, слова
+    с медиа) и пользователей с прогрессом по словам, урокам и блокам,
+    ежедневной статистикой и сессиями.
+
+    Данные детерминированы: один и тот же --seed с теми же параметрами
+    дает те же строки с теми же id. Строки пишутся многострочными INSERT
+    пачками по --batch-size, пользователи - порциями в отдельных
+    транзакциях, поэтому память не растет с объемом. 10M записей
+    UserProgress - это, например, --users 20000 --words-per-user 500.
+
+    --export сохраняет набор в gzip JSON Lines: каталог и только тех
+    пользователей (с их прогрессом), которых создала или загрузила эта
+    команда. Уже существующие пользователи (администраторы, реальные
+    аккаунты) с их паролями и токенами в файл не попадают. --import
+    загружает такой снимок в базу без каталога и прогресса; если id
+    пользователей из файла заняты, загрузка отменяется. Сводки
+    (UserSummary) не генерируются: до запуска rebuild_summaries каждое
+    чтение собирает их заново.
+
+    Предназначена для отдельной базы под нагрузочные тесты.
+    """
+    help = 'Генерирует синтетический набор данных (каталог и прогресс пользователей)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--blocks', type=int, default=30)
+        parser.add_argument('--lessons', type=int, default=10, help='Уроков в блоке')
+        parser.add_argument('--words', type=int, default=10, help='Слов в уроке')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--words-per-user', type=int, default=300, help='Среднее число начатых слов')
+        parser.add_argument('--days', type=int, default=90, help='Глубина истории в днях')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--export', metavar='PATH', help='Сохранить набор в файл (.jsonl.gz)')
+        parser.add_argument('--import', dest='import_path', metavar='PATH', help='Загрузить набор из файла вместо генерации')
+
+    def handle(self, *args, **options):
+        if Block.objects.exists() or UserProgress.objects.exists():
+            raise CommandError('В базе уже есть каталог или прогресс, нужна пустая база')
+
+        # Пользователи с меньшими id созданы не командой и не выгружаются
+        first_user_id = (User.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        start = time.perf_counter()
+        if options['import_path']:
+            counts = self.load(options['import_path'], options['batch_size'])
+        else:
+            counts = self.generate(options, first_user_id)
+        reset_sequences(DATASET_MODELS)
+        bump_catalogue_version()
+
+        for model in DATASET_MODELS:
+            self.stdout.write(f'{model._meta.label}: {counts.get(model, 0)}')
+        self.stdout.write(self.style.SUCCESS(f'Готово за {time.perf_counter() - start:.1f} с'))
+
+        if options['export']:
+            self.dump(options['export'], options['batch_size'], first_user_id)
+            self.stdout.write(self.style.SUCCESS(f"Набор сохранен в {options['export']}"))
+
+    def generate(self, options, first_user_id):
+        rng = random.Random(options['seed'])
+        now = timezone.now().replace(microsecond=0)
+        writer = BulkWriter(options['batch_size'])
+        for model, names in GENERATED_FIELDS.items():
+            writer.set_fields(model, names)
+        blocks, lessons, words = options['blocks'], options['lessons'], options['words']
+
+        # Каталог: id идут в порядке прохождения (и совпадают с sort_key),
+        # слово word_id лежит в уроке (word_id - 1) // words + 1
+        with transaction.atomic():
+            for block_id in range(1, blocks + 1):
+                writer.add(Block, (
+                    block_id, f'Блок {block_id}', f'Описание блока {block_id}', block_id, True, now,
+                ))
+            for lesson_id in range(1, blocks * lessons + 1):
+                writer.add(Lesson, (
+                    lesson_id, (lesson_id - 1) // lessons + 1, f'Урок {lesson_id}',
+                    (lesson_id - 1) % lessons + 1, True, lesson_id,
+                ))
+            for word_id in range(1, blocks * lessons * words + 1):
+                writer.add(Word, (
+                    word_id,
+                    (word_id - 1) // words + 1,
+                    ''.join(rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(3, 7))),
+                    f'слово {word_id}',
+                    f'kalima-{word_id}',
+                    f'words/audio/{word_id}.mp3',
+                    f'words/images/{word_id}.jpg' if rng.random() < 0.5 else None,
+                    'بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ',
+                    f'Пример для слова {word_id}',
+                    (word_id - 1) % words + 1,
+                    word_id,
+                ))
+            writer.flush()
+
+        # Моменты "N дней назад": повторяются во всех таблицах прогресса
+        days_ago = [now - timedelta(days=offset) for offset in range(options['days'] + 1)]
+        total_words = blocks * lessons * words
+        users_done = 0
+        while users_done < options['users']:
+            chunk = range(users_done, min(users_done + options['batch_size'], options['users']))
+            with transaction.atomic():
+                profiles = []
+                for number in chunk:
+                    user_id = first_user_id + number
+                    joined_days = rng.randint(1, options['days'])
+                    joined = days_ago[joined_days]
+                    writer.add(User, (
+                        user_id, f"gen_{options['seed']}_{number}",
+                        '!',  # непригодный пароль, вход только по токену
+                        '', '', '', '', False, False, True, True,
+                        uuid.UUID(int=rng.getrandbits(128), version=4),
+                        joined, joined, joined,
+                    ))
+                    started = min(total_words, int(rng.expovariate(1 / options['words_per_user'])))
+                    profiles.append((user_id, joined_days, started))
+                writer.flush(User)
+
+                for user_id, joined_days, started in profiles:
+                    self.generate_user(rng, writer, days_ago, user_id, joined_days, started, lessons, words)
+                writer.flush()
+            users_done = chunk.stop
+            self.stdout.write(
+                f"Пользователей: {users_done}/{options['users']}, "
+                f"записей UserProgress: {writer.counts.get(UserProgress, 0)}"
+            )
+        return writer.counts
+
+    def generate_user(self, rng, writer, days_ago, user_id, joined_days, started, lessons, words):
+        """Прогресс одного пользователя: первые started слов каталога"""
+        skill = rng.uniform(0.6, 1.0)
+        lesson_stats = {}
+        for word_id in range(1, started + 1):
+            lesson_id = (word_id - 1) // words + 1
+            attempts = rng.randint(1, 8)
+            correct = min(attempts, max(0, round(attempts * rng.uniform(skill - 0.2, 1.0))))
+            is_learned = is_learned_by_rule(correct, attempts)
+            writer.add(UserProgress, (
+                user_id, word_id, lesson_id, (lesson_id - 1) // lessons + 1, is_learned,
+                correct, attempts, days_ago[rng.randrange(joined_days)],
+            ))
+
+            stats = lesson_stats.setdefault(lesson_id, [0, 0, 0])
+            stats[0] += correct
+            stats[1] += attempts
+            stats[2] += is_learned
+
+        # Точности завершенных уроков по блокам
+        block_stats = {}
+        for lesson_id, (correct, attempts, learned) in lesson_stats.items():
+            is_completed = learned == words
+            accuracy = round(correct * 100 / attempts, 1)
+            writer.add(LessonProgress, (
+                user_id, lesson_id, is_completed,
+                days_ago[rng.randrange(joined_days)] if is_completed else None,
+                accuracy, attempts // 2, correct, attempts, learned,
+            ))
+            accuracies = block_stats.setdefault((lesson_id - 1) // lessons + 1, [])
+            if is_completed:
+                accuracies.append(accuracy)
+
+        for block_id, accuracies in block_stats.items():
+            is_completed = len(accuracies) == lessons
+            writer.add(BlockProgress, (
+                user_id, block_id, is_completed, days_ago[0] if is_completed else None,
+                round(sum(accuracies) / len(accuracies), 1) if accuracies else 0,
+                len(accuracies), lessons,
+            ))
+
+        # Активные дни - случайные дни с момента регистрации
+        active_days = rng.sample(range(joined_days), rng.randint(1, joined_days)) if started else []
+        total_minutes = 0
+        for offset in active_days:
+            attempts = rng.randint(5, 60)
+            correct = min(attempts, max(0, round(attempts * rng.uniform(skill - 0.2, 1.0))))
+            accuracy = round(correct * 100 / attempts, 1)
+            minutes = rng.randint(5, 40)
+            total_minutes += minutes
+            writer.add(DailyProgress, (
+                user_id, days_ago[offset].date(), rng.randint(0, 10), rng.randint(0, 1),
+                minutes, accuracy, correct, attempts,
+            ))
+            start_time = days_ago[offset] - timedelta(seconds=rng.randrange(12 * 60 * 60))
+            writer.add(StudySession, (
+                user_id, start_time, start_time + timedelta(minutes=minutes), minutes, accuracy,
+            ))
+
+        current_streak, longest_streak = streak_lengths(active_days)
+        writer.add(UserStats, (
+            user_id, total_minutes, len(active_days), current_streak, longest_streak,
+            days_ago[min(active_days)] if active_days else days_ago[0],
+        ))
+
+    def dump(self, path, batch_size, first_user_id):
+        """
+        Таблицы DATASET_MODELS в gzip JSON Lines: заголовок модели, затем
+        строки. Из пользовательских таблиц - только пользователи с id от
+        first_user_id, созданные командой.
+        """
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for model in DATASET_MODELS:
+                fields = [field.attname for field in model._meta.concrete_fields]
+                f.write(json.dumps({'model': model._meta.label_lower, 'fields': fields}) + '\n')
+                queryset = model.objects.order_by('pk')
+                if model is User:
+                    queryset = queryset.filter(pk__gte=first_user_id)
+                elif model not in CATALOGUE_MODELS:
+                    queryset = queryset.filter(user_id__gte=first_user_id)
+                rows = queryset.values_list(*fields).iterator(chunk_size=batch_size)
+                for row in rows:
+                    f.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+    def load(self, path, batch_size):
+        writer = BulkWriter(batch_size)
+        model = None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f, transaction.atomic():
+                for line in f:
+                    row = json.loads(line)
+                    if isinstance(row, dict):
+                        model = apps.get_model(row['model'])
+                        writer.set_fields(model, row['fields'])
+                    else:
+                        writer.add(model, row)
+                writer.flush()
+        except IntegrityError as e:
+            raise CommandError(f'Набор не загружен, строки конфликтуют с данными в базе (id пользователей?): {e}')
+        return writer.counts
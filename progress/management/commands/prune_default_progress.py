@@ -0,0 +1,57 @@
+# progress/management/commands/prune_default_progress.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from content.models import UserProgress
+from progress.models import LessonProgress, BlockProgress, UserSummary
+
+
+class Command(BaseCommand):
+    """
+    Удаляет записи прогресса, которые совпадают со значениями по умолчанию.
+
+    Раньше такие записи создавались при каждом открытии страницы. Теперь
+    при чтении они подставляются в памяти, поэтому удаление не меняет
+    ответов API.
+    """
+    help = 'Удаляет нетронутые записи прогресса (UserProgress, LessonProgress, BlockProgress)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        querysets = [
+            UserProgress.objects.filter(
+                total_attempts=0, correct_answers=0, is_learned=False
+            ),
+            LessonProgress.objects.filter(
+                is_completed=False, completed_at__isnull=True, accuracy=0, time_spent=0,
+                total_attempts=0, correct_answers=0, words_learned=0,
+            ),
+            BlockProgress.objects.filter(
+                is_completed=False, completed_at__isnull=True,
+                lessons_completed=0, overall_accuracy=0
+            ),
+        ]
+
+        for queryset in querysets:
+            model_name = queryset.model.__name__
+            if options['dry_run']:
+                self.stdout.write(f'{model_name}: {queryset.count()} записей к удалению')
+                continue
+
+            deleted = self._delete_in_batches(queryset, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{model_name}: удалено {deleted}'))
+            if queryset.model is UserProgress and deleted:
+                # Нетронутые слова учитывались в средней точности сводок
+                UserSummary.objects.update(is_stale=True, updated_at=timezone.now())
+
+    def _delete_in_batches(self, queryset, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            count, _ = queryset.model.objects.filter(pk__in=ids).delete()
+            deleted += count
@@ -0,0 +1,108 @@
+# progress/management/commands/rebuild_summaries.py
+
+from math import isclose
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from content.models import UserProgress, learned_rule
+from progress.models import UserSummary
+from progress.summary import build_summary
+from progress.versions import progress_changed
+
+User = get_user_model()
+
+
+def summaries_match(stored, actual):
+    """Сравнение сводок с допуском на накопленную ошибку float"""
+    if (stored.learned_words, stored.words_started, stored.study_days) != (
+        actual.learned_words, actual.words_started, actual.study_days
+    ):
+        return False
+    if not isclose(stored.accuracy_sum, actual.accuracy_sum, abs_tol=0.01):
+        return False
+    if (stored.unlocked_block_order, stored.unlocked_lessons) != (
+        actual.unlocked_block_order, actual.unlocked_lessons
+    ):
+        return False
+
+    block_ids = set(stored.blocks) | set(actual.blocks)
+    empty = {'learned': 0, 'words': 0, 'accuracy_sum': 0}
+    for block_id in block_ids:
+        a = stored.blocks.get(block_id, empty)
+        b = actual.blocks.get(block_id, empty)
+        if (a['learned'], a['words']) != (b['learned'], b['words']):
+            return False
+        if not isclose(a['accuracy_sum'], b['accuracy_sum'], abs_tol=0.01):
+            return False
+    return True
+
+
+class Command(BaseCommand):
+    """
+    Проверяет сводки прогресса (UserSummary) по UserProgress, пересобирает
+    расходящиеся и создает недостающие. Перед этим отмечает выученными записи, подходящие под
+    правило, но записанные в обход save() (bulk_create, загрузка данных).
+    С --check только сообщает о расхождениях.
+    """
+    help = 'Проверяет и пересобирает сводки прогресса пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help='Только этот пользователь')
+        parser.add_argument('--check', action='store_true', help='Только проверить, ничего не записывать')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Пользователи без сводки тоже: чтения ее не создают
+        users = User.objects.filter(
+            Q(pk__in=UserProgress.objects.values('user_id')) | Q(summary__isnull=True)
+        ).order_by('pk')
+        if options['user_id']:
+            users = users.filter(pk=options['user_id'])
+
+        checked = mismatched = learned = 0
+        last_pk = 0
+        while True:
+            batch = list(users.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            progress = UserProgress.objects.filter(user__in=batch)
+            if options['check']:
+                learned += progress.filter(learned_rule(), is_learned=False).count()
+                changed = set()
+            else:
+                changed = set(
+                    progress.filter(learned_rule(), is_learned=False)
+                    .values_list('user_id', flat=True).distinct()
+                )
+                learned += progress.apply_learned_rule()
+            stored_map = {
+                summary.user_id: summary
+                for summary in UserSummary.objects.filter(user__in=batch)
+            }
+
+            for user in batch:
+                checked += 1
+                stored = stored_map.get(user.pk)
+                actual = build_summary(user, UserSummary(pk=stored.pk if stored else None, user=user))
+                if stored is not None and not stored.is_stale and summaries_match(stored, actual):
+                    continue
+
+                mismatched += 1
+                if options['check']:
+                    self.stdout.write(self.style.WARNING(f'Расхождение у пользователя {user.pk}'))
+                else:
+                    actual.save()
+                    changed.add(user.pk)
+
+            # Закешированные ответы статистики построены по старым данным
+            for user in batch:
+                if user.pk in changed:
+                    progress_changed(user)
+
+        action = 'найдено' if options['check'] else 'пересобрано'
+        learned_action = 'не отмечено' if options['check'] else 'отмечено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено сводок: {checked}, {action} расхождений: {mismatched}, '
+            f'{learned_action} выученных слов: {learned}'
+        ))
@@ -0,0 +1,37 @@
+# progress/management/commands/sync_achievements.py
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from progress.achievements import sync_achievements
+from progress.models import UserAchievement
+from progress.versions import progress_changed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Выдает достижения, пороги которых уже достигнуты.
+
+    Движок достижений реагирует только на пересечение порога, поэтому
+    после добавления нового достижения или для старых пользователей
+    нужно один раз прогнать эту команду.
+    """
+    help = 'Выдает пользователям уже заработанные достижения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help='Только для одного пользователя')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user_id']:
+            users = users.filter(pk=options['user_id'])
+
+        before = UserAchievement.objects.count()
+        for user in users.iterator(chunk_size=500):
+            # Достижения есть в закешированных ответах статистики
+            if sync_achievements(user):
+                progress_changed(user)
+
+        awarded = UserAchievement.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(f'Выдано достижений: {awarded}'))
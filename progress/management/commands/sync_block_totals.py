@@ -0,0 +1,59 @@
+# progress/management/commands/sync_block_totals.py
+
+from functools import reduce
+from operator import or_
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, Max, Min, PositiveIntegerField, Q, Value, When
+from content.catalogue import get_catalogue
+from progress.models import BlockProgress
+
+
+class Command(BaseCommand):
+    """
+    Исправляет BlockProgress.total_lessons после изменения каталога:
+    урок добавили, удалили, выключили или перенесли в другой блок.
+
+    Число активных уроков берется из снимка каталога. Записи
+    обрабатываются диапазонами первичного ключа, каждый диапазон - один
+    UPDATE только расходящихся записей, поэтому команду можно запускать
+    на живой базе и прерывать в любой момент.
+    """
+    help = 'Пересчитывает total_lessons в прогрессе блоков по каталогу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        totals = {block.id: block.active_lessons_count for block in get_catalogue().blocks}
+        if not totals:
+            self.stdout.write(self.style.SUCCESS('Каталог пуст'))
+            return
+
+        stale = BlockProgress.objects.filter(reduce(or_, [
+            Q(block_id=block_id) & ~Q(total_lessons=total)
+            for block_id, total in totals.items()
+        ]))
+        if options['dry_run']:
+            self.stdout.write(f'Расходящихся записей: {stale.count()}')
+            return
+
+        bounds = stale.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.SUCCESS('Все записи актуальны'))
+            return
+
+        total_lessons = Case(
+            *[When(block_id=block_id, then=Value(total)) for block_id, total in totals.items()],
+            default=F('total_lessons'),
+            output_field=PositiveIntegerField(),
+        )
+        batch_size = options['batch_size']
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            updated += stale.filter(pk__gte=start, pk__lt=start + batch_size).update(
+                total_lessons=total_lessons
+            )
+            self.stdout.write(f'Обработано до id {start + batch_size - 1}: {updated}')
+
+        self.stdout.write(self.style.SUCCESS(f'Обновлено записей: {updated}'))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_lesson_counters(apps, schema_editor):
+    """
+    Заполняем счетчики уроков по уже накопленному UserProgress.
+    Один UPDATE с подзапросами по (user, урок слова), без выгрузки в Python.
+    """
+    UserProgress = apps.get_model('content', 'UserProgress')
+    LessonProgress = apps.get_model('progress', 'LessonProgress')
+
+    lesson_words = UserProgress.objects.filter(
+        user_id=OuterRef('user_id'), word__lesson_id=OuterRef('lesson_id'),
+    ).order_by().values('user_id')
+
+    def total(aggregate):
+        return Coalesce(Subquery(lesson_words.annotate(value=aggregate).values('value')), 0)
+
+    LessonProgress.objects.filter(Exists(lesson_words)).update(
+        correct_answers=total(Sum('correct_answers')),
+        total_attempts=total(Sum('total_attempts')),
+        words_learned=total(Count('id', filter=Q(is_learned=True))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_initial'),
+        ('progress', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyprogress',
+            name='correct_answers',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyprogress',
+            name='total_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='correct_answers',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='total_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='words_learned',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_lesson_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:30
+
+from django.db import migrations, models
+
+# Достижения, которые раньше создавались на лету в check_achievements
+DEFAULT_ACHIEVEMENTS = [
+    ('first_words', 'Первый шаг', 'Выучите первое слово', '🎯'),
+    ('words_10', 'Десять слов', 'Выучите 10 слов', '🔟'),
+    ('words_50', 'Пятьдесят слов', 'Выучите 50 слов', '🌟'),
+    ('words_100', 'Сто слов', 'Выучите 100 слов', '💯'),
+]
+
+
+def create_default_achievements(apps, schema_editor):
+    Achievement = apps.get_model('progress', 'Achievement')
+    for achievement_type, name, description, icon in DEFAULT_ACHIEVEMENTS:
+        if not Achievement.objects.filter(achievement_type=achievement_type).exists():
+            Achievement.objects.create(
+                achievement_type=achievement_type,
+                name=name,
+                description=description,
+                icon=icon,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0002_answer_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='achievement',
+            name='achievement_type',
+            field=models.CharField(choices=[('first_words', 'Первое слово'), ('words_10', '10 слов выучено'), ('words_50', '50 слов выучено'), ('first_lesson', 'Первый урок'), ('perfect_lesson', 'Идеальный урок'), ('streak_3', 'Серия 3 дня'), ('streak_7', 'Серия 7 дней'), ('streak_30', 'Серия 30 дней'), ('block_completed', 'Блок завершен'), ('words_100', '100 слов выучено'), ('words_500', '500 слов выучено'), ('words_1000', '1000 слов выучено'), ('speed_learner', 'Быстрый ученик')], max_length=50),
+        ),
+        migrations.RunPython(create_default_achievements, migrations.RunPython.noop),
+    ]
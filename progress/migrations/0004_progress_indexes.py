@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0003_achievement_rules'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(fields=['user', '-start_time'], name='studysession_user_start_idx'),
+        ),
+    ]
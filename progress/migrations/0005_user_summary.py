@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_progress_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('learned_words', models.PositiveIntegerField(default=0)),
+                ('words_started', models.PositiveIntegerField(default=0)),
+                ('accuracy_sum', models.FloatField(default=0)),
+                ('study_days', models.PositiveIntegerField(default=0)),
+                ('blocks', models.JSONField(blank=True, default=dict)),
+                ('is_stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Сводка прогресса',
+                'verbose_name_plural': 'Сводки прогресса',
+            },
+        ),
+    ]
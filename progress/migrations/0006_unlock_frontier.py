@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:53
+
+from django.db import migrations, models
+
+
+def mark_summaries_stale(apps, schema_editor):
+    """Граница открытых блоков и уроков посчитается при следующем чтении сводки"""
+    UserSummary = apps.get_model('progress', 'UserSummary')
+    UserSummary.objects.update(is_stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0005_user_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersummary',
+            name='unlocked_block_order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usersummary',
+            name='unlocked_lessons',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(mark_summaries_stale, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,7 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.utils import timezone
+from content.catalogue import get_catalogue
 from content.models import Block, Lesson, Word
 
 User = get_user_model()
@@ -23,6 +23,72 @@ class UserStats(models.Model):
     def __str__(self):
         return f"Статистика {self.user.username}"
 
+class UserSummary(models.Model):
+    """
+    Сводка прогресса пользователя для экранов статистики.
+    Обновляется в progress.services.record_answers, пересобирается
+    из UserProgress командой rebuild_summaries (см. progress.summary).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='summary')
+    learned_words = models.PositiveIntegerField(default=0)
+    words_started = models.PositiveIntegerField(default=0)  # записей UserProgress
+    accuracy_sum = models.FloatField(default=0)  # сумма точности по словам
+    study_days = models.PositiveIntegerField(default=0)  # дни с выученными словами
+    # {"<block_id>": {"learned": ..., "words": ..., "accuracy_sum": ...}}
+    blocks = models.JSONField(default=dict, blank=True)
+    # Граница открытых блоков и уроков: открыто все, чей order не больше
+    # сохраненного (первый активный блок и первый урок блока открыты всегда)
+    unlocked_block_order = models.PositiveIntegerField(default=0)
+    unlocked_lessons = models.JSONField(default=dict, blank=True)  # {"<block_id>": order}
+    is_stale = models.BooleanField(default=False)  # пересобрать при следующем чтении
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Сводка прогресса'
+        verbose_name_plural = 'Сводки прогресса'
+
+    def __str__(self):
+        return f"Сводка {self.user.username}"
+
+    @property
+    def average_accuracy(self):
+        if self.words_started == 0:
+            return 0
+        return round(self.accuracy_sum / self.words_started, 1)
+
+    @property
+    def learned_by_block(self):
+        return {int(block_id): block['learned'] for block_id, block in self.blocks.items()}
+
+    @property
+    def accuracy_by_block(self):
+        return {
+            int(block_id): round(block['accuracy_sum'] / block['words'], 1)
+            for block_id, block in self.blocks.items()
+            if block['words']
+        }
+
+    def unlock_block(self, order):
+        """Сдвигает границу блоков вперед. True, если она изменилась"""
+        if order <= self.unlocked_block_order:
+            return False
+        self.unlocked_block_order = order
+        return True
+
+    def unlock_lesson(self, block_id, order):
+        """Сдвигает границу уроков блока вперед. True, если она изменилась"""
+        if order <= self.unlocked_lessons.get(str(block_id), 0):
+            return False
+        self.unlocked_lessons[str(block_id)] = order
+        return True
+
+    def is_block_locked(self, block, catalogue):
+        """block и catalogue - объекты снимка каталога"""
+        return block.order > max(self.unlocked_block_order, catalogue.first_block_order)
+
+    def is_lesson_locked(self, lesson, block):
+        return lesson.order > max(self.unlocked_lessons.get(str(block.id), 0), block.first_lesson_order)
+
 class DailyProgress(models.Model):
     """Ежедневный прогресс"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_progress')
@@ -31,6 +97,9 @@ class DailyProgress(models.Model):
     lessons_completed = models.PositiveIntegerField(default=0)
     time_studied = models.PositiveIntegerField(default=0)  # в минутах
     accuracy = models.FloatField(default=0)  # средняя точность за день
+    # Накопительные счетчики ответов за день, из них считается accuracy
+    correct_answers = models.PositiveIntegerField(default=0)
+    total_attempts = models.PositiveIntegerField(default=0)
     
     class Meta:
         unique_together = ['user', 'date']
@@ -49,6 +118,10 @@ class LessonProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     accuracy = models.FloatField(default=0)
     time_spent = models.PositiveIntegerField(default=0)  # в минутах
+    # Накопительные счетчики по словам урока, из них считается accuracy
+    correct_answers = models.PositiveIntegerField(default=0)
+    total_attempts = models.PositiveIntegerField(default=0)
+    words_learned = models.PositiveIntegerField(default=0)
     
     class Meta:
         unique_together = ['user', 'lesson']
@@ -59,20 +132,6 @@ class LessonProgress(models.Model):
         status = "✓" if self.is_completed else "✗"
         return f"{self.user.username} - {self.lesson.title} {status}"
 
-    def save(self, *args, **kwargs):
-        # При завершении урока обновляем прогресс блока
-        if self.is_completed and not self.completed_at:
-            self.completed_at = timezone.now()
-            
-            # Обновляем BlockProgress
-            block_progress, created = BlockProgress.objects.get_or_create(
-                user=self.user,
-                block=self.lesson.block
-            )
-            block_progress.update_progress()
-            
-        super().save(*args, **kwargs)
-
 class BlockProgress(models.Model):
     """Прогресс по блоку"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='block_progress')
@@ -93,37 +152,20 @@ class BlockProgress(models.Model):
         return f"{self.user.username} - {self.block.title} {status}"
 
     def save(self, *args, **kwargs):
-        # Автоматически вычисляем общее количество уроков
-        self.total_lessons = self.block.lessons.filter(is_active=True).count()
+        # Число активных уроков блока берем из снимка каталога, без COUNT
+        try:
+            self.total_lessons = get_catalogue().get_block(self.block_id).active_lessons_count
+        except Block.DoesNotExist:
+            # Блок создан в текущей транзакции и еще не попал в снимок
+            self.total_lessons = Lesson.objects.filter(block_id=self.block_id, is_active=True).count()
         super().save(*args, **kwargs)
 
-    def update_progress(self):
-        """Обновляет прогресс блока на основе завершенных уроков"""
-        from django.utils import timezone
-        
-        completed_lessons = LessonProgress.objects.filter(
-            user=self.user,
-            lesson__block=self.block,
-            is_completed=True
-        )
-        
-        self.lessons_completed = completed_lessons.count()
-        
-        # Рассчитываем общую точность
-        if completed_lessons.exists():
-            total_accuracy = sum(lesson.accuracy for lesson in completed_lessons)
-            self.overall_accuracy = round(total_accuracy / completed_lessons.count(), 1)
-        
-        # Проверяем, завершен ли блок
-        self.is_completed = self.lessons_completed >= self.total_lessons
-        if self.is_completed and not self.completed_at:
-            self.completed_at = timezone.now()
-        
-        self.save()
-
 class Achievement(models.Model):
     """Достижения пользователя"""
     ACHIEVEMENT_TYPES = [
+        ('first_words', 'Первое слово'),
+        ('words_10', '10 слов выучено'),
+        ('words_50', '50 слов выучено'),
         ('first_lesson', 'Первый урок'),
         ('perfect_lesson', 'Идеальный урок'),
         ('streak_3', 'Серия 3 дня'),
@@ -140,7 +182,7 @@ class Achievement(models.Model):
     description = models.TextField()
     achievement_type = models.CharField(max_length=50, choices=ACHIEVEMENT_TYPES)
     icon = models.CharField(max_length=50, default='🏆')  # эмодзи или путь к иконке
-    condition = models.JSONField(default=dict)  # условия получения
+    condition = models.JSONField(default=dict)  # условия получения: {"counter": ..., "threshold": ...}
     
     class Meta:
         verbose_name = 'Достижение'
@@ -177,6 +219,10 @@ class StudySession(models.Model):
         verbose_name = 'Сессия изучения'
         verbose_name_plural = 'Сессии изучения'
         ordering = ['-start_time']
+        indexes = [
+            # Последние сессии и сессии за период
+            models.Index(fields=['user', '-start_time'], name='studysession_user_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
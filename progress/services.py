@@ -0,0 +1,380 @@
+# progress/services.py
+
+from dataclasses import dataclass, field
+from django.db.models import F, Count, Avg
+from django.utils import timezone
+from content.catalogue import get_catalogue
+from content.models import UserProgress, accuracy_expression
+from .models import UserStats, DailyProgress, LessonProgress, BlockProgress
+from . import achievements
+from .summary import get_user_summary, lock_user_summary, apply_word_change
+from .versions import progress_changed
+
+# Записи прогресса создаются только при первой реальной записи
+# (update_progress, complete_lesson и т.д.). При чтении отсутствующие
+# записи подставляются несохраненными экземплярами со значениями по умолчанию.
+#
+# Блоки, уроки и слова здесь - объекты снимка каталога (content.catalogue).
+
+
+def get_user_stats(user):
+    """Статистика пользователя без создания записи"""
+    return UserStats.objects.filter(user=user).first() or UserStats(user=user)
+
+
+def get_daily_progress(user, date):
+    """Прогресс за день без создания записи"""
+    return (
+        DailyProgress.objects.filter(user=user, date=date).first()
+        or DailyProgress(user=user, date=date)
+    )
+
+
+def get_word_progress_map(user, words):
+    """
+    Прогресс по словам: {word_id: UserProgress}.
+
+    Выборка идет по урокам слов (UserProgress.lesson), чтобы не передавать
+    в запрос сотни идентификаторов слов.
+    """
+    lesson_ids = {word.lesson_id for word in words}
+    progress_map = {
+        progress.word_id: progress
+        for progress in UserProgress.objects.filter(user=user, lesson__in=lesson_ids)
+    }
+    for word in words:
+        if word.id not in progress_map:
+            progress_map[word.id] = UserProgress(
+                user=user, word_id=word.id, lesson_id=word.lesson_id, block_id=word.block_id
+            )
+    return progress_map
+
+
+def get_lesson_progress_map(user, lessons):
+    """Прогресс по урокам: {lesson_id: LessonProgress}"""
+    progress_map = {
+        progress.lesson_id: progress
+        for progress in LessonProgress.objects.filter(
+            user=user, lesson__in=[lesson.id for lesson in lessons]
+        )
+    }
+    for lesson in lessons:
+        if lesson.id not in progress_map:
+            progress_map[lesson.id] = LessonProgress(user=user, lesson_id=lesson.id)
+    return progress_map
+
+
+def get_block_progress_map(user, blocks):
+    """Прогресс по блокам: {block_id: BlockProgress}"""
+    progress_map = {
+        progress.block_id: progress
+        for progress in BlockProgress.objects.filter(
+            user=user, block__in=[block.id for block in blocks]
+        )
+    }
+    for block in blocks:
+        if block.id not in progress_map:
+            progress_map[block.id] = BlockProgress(
+                user=user, block_id=block.id, total_lessons=block.active_lessons_count
+            )
+    return progress_map
+
+
+def get_blocks_overview(user):
+    """
+    Сводка по активным блокам для дашборда.
+
+    Количество запросов не зависит от числа блоков: блоки и слова берутся
+    из снимка каталога, выученные слова и граница открытых блоков - из
+    сводки пользователя, прогресс блоков выбирается одним запросом.
+    """
+    catalogue = get_catalogue()
+    blocks = catalogue.active_blocks
+
+    summary = get_user_summary(user)
+    learned_by_block = summary.learned_by_block
+    progress_by_block = get_block_progress_map(user, blocks)
+
+    blocks_data = []
+    for block in blocks:
+        block_progress = progress_by_block[block.id]
+
+        blocks_data.append({
+            'id': block.id,
+            'title': block.title,
+            'description': block.description,
+            'order': block.order,
+            'total_words': block.words_count,
+            'learned_words': learned_by_block.get(block.id, 0),
+            'is_locked': summary.is_block_locked(block, catalogue),
+            'progress': {
+                'is_completed': block_progress.is_completed,
+                'lessons_completed': block_progress.lessons_completed,
+                'total_lessons': block_progress.total_lessons,
+                'overall_accuracy': block_progress.overall_accuracy,
+            }
+        })
+
+    return {
+        'total_words': catalogue.total_words,
+        'learned_words': summary.learned_words,
+        'blocks': blocks_data,
+    }
+
+
+def _accuracy_after(correct_delta, attempts_delta):
+    """Точность после прибавки к счетчикам, вычисляется в UPDATE"""
+    return accuracy_expression(F('correct_answers') + correct_delta, F('total_attempts') + attempts_delta)
+
+
+def record_answers(user, lesson, answers):
+    """
+    Записывает пачку ответов пользователя по уроку.
+
+    answers - список (word, is_correct, time_spent), где word - слово из
+    снимка каталога, time_spent - в секундах. Прогресс слов обновляется
+    одним upsert, счетчики урока, дня и статистики - по одному UPDATE
+    с F()-выражениями, поэтому стоимость не зависит от размера урока
+    и активности за день. Сводка пользователя (UserSummary) обновляется
+    по разнице старых и новых записей слов. Достижения проверяются только
+    для изменившихся счетчиков. Вызывается внутри transaction.atomic().
+    Все слова должны быть из lesson (если он передан), иначе ValueError:
+    счетчики урока считаются по всей пачке.
+    Возвращает {word_id: UserProgress}.
+    """
+    if lesson and any(word.lesson_id != lesson.id for word, _, _ in answers):
+        raise ValueError(f'Answers contain words outside lesson {lesson.id}')
+
+    attempts = {}
+    correct = {}
+    first_correct = {}
+    for word, is_correct, _ in answers:
+        attempts[word.id] = attempts.get(word.id, 0) + 1
+        correct[word.id] = correct.get(word.id, 0) + (1 if is_correct else 0)
+        first_correct.setdefault(word.id, bool(is_correct))
+
+    correct_total = sum(correct.values())
+    attempts_total = len(answers)
+    minutes = sum(time_spent for _, _, time_spent in answers) // 60  # конвертируем в минуты
+
+    # Блокировка сводки сериализует параллельные ответы пользователя
+    summary = lock_user_summary(user)
+
+    # Обновляем прогресс слов
+    words = {word.id: word for word, _, _ in answers}
+    existing = {
+        progress.word_id: progress
+        for progress in UserProgress.objects.select_for_update().filter(
+            user=user, word__in=list(attempts)
+        )
+    }
+    progress_map = {}
+    became_learned = 0
+    created_correct = 0
+    for word_id, word_attempts in attempts.items():
+        old = existing.get(word_id)
+        progress = UserProgress(
+            user=user,
+            word_id=word_id,
+            lesson_id=words[word_id].lesson_id,
+            block_id=words[word_id].block_id,
+            is_learned=old.is_learned if old else False,
+            correct_answers=(old.correct_answers if old else 0) + correct[word_id],
+            total_attempts=(old.total_attempts if old else 0) + word_attempts,
+        )
+        progress.apply_learned_rule()
+        if progress.is_learned and not (old and old.is_learned):
+            became_learned += 1
+        if not old and first_correct[word_id]:
+            created_correct += 1
+        apply_word_change(summary, words[word_id].block_id, old, progress)
+        progress_map[word_id] = progress
+
+    UserProgress.objects.bulk_create(
+        list(progress_map.values()),
+        update_conflicts=True,
+        unique_fields=['user', 'word'],
+        update_fields=[
+            'lesson', 'block', 'is_learned', 'correct_answers', 'total_attempts', 'last_reviewed'
+        ],
+    )
+
+    # Обновляем прогресс урока
+    if lesson:
+        lesson_progress, _ = LessonProgress.objects.get_or_create(user=user, lesson_id=lesson.id)
+        counters = {
+            'correct_answers': F('correct_answers') + correct_total,
+            'total_attempts': F('total_attempts') + attempts_total,
+            'time_spent': F('time_spent') + minutes,
+            'accuracy': _accuracy_after(correct_total, attempts_total),
+        }
+        # Урок может завершиться только когда очередное слово стало выученным.
+        # Тогда выученные слова урока пересчитываются: слова, выученные без
+        # lesson_id или до появления записи урока, в счетчик не попадали
+        if became_learned:
+            counters['words_learned'] = UserProgress.objects.filter(
+                user=user, lesson_id=lesson.id, is_learned=True
+            ).count()
+        LessonProgress.objects.filter(pk=lesson_progress.pk).update(**counters)
+
+        if became_learned:
+            total_words = len(lesson.words)
+            if (not lesson_progress.is_completed and total_words > 0
+                    and counters['words_learned'] >= total_words):
+                mark_lesson_completed(user, lesson, summary=summary)
+
+    # Обновляем ежедневный прогресс
+    today = timezone.now().date()
+    daily_progress, daily_created = DailyProgress.objects.get_or_create(user=user, date=today)
+    DailyProgress.objects.filter(pk=daily_progress.pk).update(
+        words_learned=F('words_learned') + created_correct,
+        time_studied=F('time_studied') + minutes,
+        correct_answers=F('correct_answers') + correct_total,
+        total_attempts=F('total_attempts') + attempts_total,
+        accuracy=_accuracy_after(correct_total, attempts_total),
+    )
+
+    # День становится учебным с первым выученным за него словом
+    if created_correct and daily_progress.words_learned == 0:
+        summary.study_days += 1
+    summary.save()
+
+    # Обновляем UserStats
+    user_stats, _ = UserStats.objects.get_or_create(user=user)
+    UserStats.objects.filter(pk=user_stats.pk).update(
+        total_study_time=F('total_study_time') + minutes,
+        last_active=timezone.now(),
+    )
+
+    # Проверяем достижения
+    achievements.on_words_learned(user, became_learned, summary.learned_words)
+    if daily_created:
+        achievements.on_new_study_day(user, today)
+
+    progress_changed(user)
+
+    return progress_map
+
+
+def record_answer(user, word, lesson, is_correct, time_spent):
+    """Записывает один ответ. Возвращает UserProgress слова"""
+    return record_answers(user, lesson, [(word, is_correct, time_spent)])[word.id]
+
+
+@dataclass
+class Completion:
+    """Итог завершения урока или блока"""
+    block_progress: BlockProgress
+    lesson_progress: LessonProgress = None
+    next_block: object = None  # блок снимка каталога, открытый завершением блока
+    achievements: list = field(default_factory=list)  # id выданных достижений
+
+    @property
+    def all_lessons_completed(self):
+        return self.block_progress.lessons_completed >= self.block_progress.total_lessons
+
+
+def _lock_progress(model, user, **lookup):
+    """Запись прогресса под select_for_update или новая несохраненная"""
+    return model.objects.select_for_update().filter(user=user, **lookup).first() or model(user=user, **lookup)
+
+
+def _upsert(progress, unique_fields, update_fields):
+    """Создает или обновляет запись одним запросом, без save()"""
+    type(progress).objects.bulk_create(
+        [progress],
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
+
+
+def _finish_block(user, block, block_progress, block_completed_now, summary):
+    completion = Completion(block_progress=block_progress)
+    if block_progress.is_completed:
+        completion.next_block = get_catalogue().get_next_block(block)
+        if completion.next_block:
+            summary.unlock_block(completion.next_block.order)
+    if block_completed_now:
+        completion.achievements += achievements.on_block_completed(user)
+    progress_changed(user)
+    return completion
+
+
+def mark_lesson_completed(user, lesson, accuracy=None, summary=None):
+    """
+    Завершает урок и распространяет изменение по цепочке: урок -> блок ->
+    следующий блок -> достижения. lesson - урок снимка каталога.
+    Граница открытых уроков и блоков сдвигается в сводке пользователя:
+    если summary передана (уже заблокирована вызывающим), сохраняет ее
+    вызывающий.
+
+    Каждый агрегат считается один раз: завершенные уроки блока и их
+    средняя точность - одним запросом, число уроков блока - по снимку
+    каталога. Записи урока и блока пишутся upsert'ом, поэтому число
+    запросов не зависит от числа уроков в блоке. Завершенный блок
+    остается завершенным. Вызывается внутри transaction.atomic().
+    """
+    block = get_catalogue().get_block(lesson.block_id)
+    now = timezone.now()
+    own_summary = summary is None
+    if own_summary:
+        summary = lock_user_summary(user)
+
+    lesson_progress = _lock_progress(LessonProgress, user, lesson_id=lesson.id)
+    lesson_completed_now = not lesson_progress.is_completed
+    lesson_progress.is_completed = True
+    lesson_progress.completed_at = now
+    if accuracy is not None:
+        lesson_progress.accuracy = accuracy
+    _upsert(lesson_progress, ['user', 'lesson'], ['is_completed', 'completed_at', 'accuracy'])
+    next_lesson = block.get_next_lesson(lesson)
+    if next_lesson:
+        summary.unlock_lesson(block.id, next_lesson.order)
+
+    completed = LessonProgress.objects.filter(
+        user=user,
+        lesson__in=block.active_lesson_ids,
+        is_completed=True,
+    ).aggregate(count=Count('id'), accuracy=Avg('accuracy'))
+
+    block_progress = _lock_progress(BlockProgress, user, block_id=block.id)
+    block_was_completed = block_progress.is_completed
+    block_progress.lessons_completed = completed['count']
+    block_progress.total_lessons = block.active_lessons_count
+    if completed['count']:
+        block_progress.overall_accuracy = round(completed['accuracy'], 1)
+    block_progress.is_completed = block_was_completed or completed['count'] >= block_progress.total_lessons
+    if block_progress.is_completed and not block_progress.completed_at:
+        block_progress.completed_at = now
+    _upsert(block_progress, ['user', 'block'], [
+        'lessons_completed', 'total_lessons', 'overall_accuracy', 'is_completed', 'completed_at'
+    ])
+
+    lesson_achievements = achievements.on_lesson_completed(user) if lesson_completed_now else []
+    completion = _finish_block(
+        user, block, block_progress, block_progress.is_completed and not block_was_completed, summary
+    )
+    if own_summary:
+        summary.save()
+    completion.lesson_progress = lesson_progress
+    completion.achievements = lesson_achievements + completion.achievements
+    return completion
+
+
+def mark_block_completed(user, block):
+    """
+    Завершает блок целиком (сдан тест или явное завершение): блок ->
+    следующий блок -> достижения. Вызывается внутри transaction.atomic().
+    """
+    summary = lock_user_summary(user)
+    block_progress = _lock_progress(BlockProgress, user, block_id=block.id)
+    block_completed_now = not block_progress.is_completed
+    block_progress.is_completed = True
+    block_progress.completed_at = timezone.now()
+    if block_progress.pk is None:
+        block_progress.total_lessons = block.active_lessons_count
+    _upsert(block_progress, ['user', 'block'], ['is_completed', 'completed_at'])
+    completion = _finish_block(user, block, block_progress, block_completed_now, summary)
+    summary.save()
+    return completion
@@ -0,0 +1,196 @@
+# progress/summary.py
+
+"""
+Сводка прогресса пользователя (UserSummary).
+
+Экраны статистики читают готовые счетчики одной выборкой по user_id
+вместо пересчета по всем записям UserProgress. Сводку обновляет
+record_answers под блокировкой строки. Если сводки нет или она помечена
+устаревшей (слово перенесли в другой урок, контент удалили, прогресс
+почистили), чтение собирает ее из UserProgress в памяти, а сохраняет
+следующая запись прогресса или rebuild_summaries.
+
+В сводке же хранится граница открытых блоков и уроков, ее сдвигают
+mark_lesson_completed и mark_block_completed. Проверка блокировки -
+сравнение order с этой границей, без поиска предыдущего блока или урока.
+"""
+
+from django.db.models import Count, Q, Sum
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, pre_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from content.catalogue import get_catalogue
+from content.models import Block, Lesson, Word, UserProgress, accuracy_expression
+from .models import UserSummary, DailyProgress, LessonProgress, BlockProgress
+
+
+def build_summary(user, summary=None):
+    """
+    Считает сводку из UserProgress и DailyProgress, не сохраняя ее.
+    Точность суммируется в базе, одним GROUP BY по блокам.
+    """
+    summary = summary or UserSummary(user=user)
+    summary.learned_words = 0
+    summary.words_started = 0
+    summary.accuracy_sum = 0
+    blocks = {}
+
+    rows = (
+        UserProgress.objects.filter(user=user)
+        .values('block_id')
+        .annotate(
+            learned=Count('id', filter=Q(is_learned=True)),
+            words=Count('id'),
+            accuracy_sum=Sum(accuracy_expression()),
+        )
+        .order_by()
+    )
+    for row in rows:
+        summary.learned_words += row['learned']
+        summary.words_started += row['words']
+        summary.accuracy_sum += row['accuracy_sum'] or 0
+        if row['block_id'] is not None:
+            blocks[str(row['block_id'])] = {
+                'learned': row['learned'],
+                'words': row['words'],
+                'accuracy_sum': row['accuracy_sum'] or 0,
+            }
+
+    summary.blocks = blocks
+    summary.study_days = DailyProgress.objects.filter(user=user, words_learned__gt=0).count()
+    build_frontier(user, summary)
+    summary.is_stale = False
+    return summary
+
+
+def build_frontier(user, summary):
+    """
+    Граница открытых блоков и уроков по завершенным записям прогресса:
+    каждый завершенный блок или урок открывает следующий по order
+    активный блок или урок. Уроки и блоки, которых нет в каталоге, пропускаются.
+    """
+    catalogue = get_catalogue()
+    summary.unlocked_block_order = 0
+    summary.unlocked_lessons = {}
+
+    completed_blocks = BlockProgress.objects.filter(user=user, is_completed=True).values_list('block_id', flat=True)
+    for block_id in completed_blocks:
+        block = catalogue.blocks_by_id.get(block_id)
+        next_block = block and catalogue.get_next_block(block)
+        if next_block:
+            summary.unlock_block(next_block.order)
+
+    completed_lessons = LessonProgress.objects.filter(user=user, is_completed=True).values_list('lesson_id', flat=True)
+    for lesson_id in completed_lessons:
+        lesson = catalogue.lessons_by_id.get(lesson_id)
+        if lesson is None:
+            continue
+        next_lesson = catalogue.blocks_by_id[lesson.block_id].get_next_lesson(lesson)
+        if next_lesson:
+            summary.unlock_lesson(lesson.block_id, next_lesson.order)
+
+
+def rebuild_summary(user, summary=None):
+    summary = build_summary(user, summary)
+    summary.save()
+    return summary
+
+
+# Поля, которые считает build_summary
+SUMMARY_FIELDS = (
+    'learned_words', 'words_started', 'accuracy_sum', 'study_days', 'blocks',
+    'unlocked_block_order', 'unlocked_lessons', 'is_stale',
+)
+
+
+def get_user_summary(user):
+    """
+    Сводка для чтения, без блокировок и без записи в базу.
+
+    Отсутствующая или устаревшая сводка собирается в памяти и возвращается
+    как есть. Записывают сводку только пути изменения прогресса
+    (lock_user_summary), создание пользователя (user_created) и
+    rebuild_summaries.
+    """
+    summary = UserSummary.objects.filter(user=user).first()
+    if summary is None or summary.is_stale:
+        summary = build_summary(user, summary)
+    return summary
+
+
+def lock_user_summary(user):
+    """
+    Сводка под select_for_update для изменения в record_answers и при
+    завершении уроков и блоков. Заодно сериализует параллельные записи
+    прогресса одного пользователя.
+    """
+    summary = UserSummary.objects.select_for_update().filter(user=user).first()
+    if summary is None:
+        UserSummary.objects.get_or_create(user=user, defaults={'is_stale': True})
+        summary = UserSummary.objects.select_for_update().get(user=user)
+    if summary.is_stale:
+        build_summary(user, summary)
+    return summary
+
+
+def apply_word_change(summary, block_id, old, new):
+    """
+    Учитывает изменение прогресса слова: old - запись до ответа (или None),
+    new - после. Сохранение сводки - на вызывающем.
+    """
+    old_accuracy = old.accuracy if old else 0
+    learned_delta = int(new.is_learned) - int(bool(old and old.is_learned))
+    words_delta = 0 if old else 1
+
+    summary.learned_words += learned_delta
+    summary.words_started += words_delta
+    summary.accuracy_sum += new.accuracy - old_accuracy
+
+    block = summary.blocks.setdefault(str(block_id), {'learned': 0, 'words': 0, 'accuracy_sum': 0})
+    block['learned'] += learned_delta
+    block['words'] += words_delta
+    block['accuracy_sum'] += new.accuracy - old_accuracy
+
+
+def mark_stale(progress_queryset):
+    """Помечает устаревшими сводки пользователей, у которых есть эти записи"""
+    # updated_at меняется, чтобы пересборка, начатая до этого, не записалась
+    UserSummary.objects.filter(
+        user__in=progress_queryset.values('user_id')
+    ).update(is_stale=True, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=get_user_model())
+def user_created(sender, instance, created, raw=False, **kwargs):
+    # Пустая сводка верна для нового пользователя, чтения ее не создают
+    if created and not raw:
+        UserSummary.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=Word)
+def word_moving(sender, instance, **kwargs):
+    # До сохранения UserProgress.lesson еще указывает на старый урок
+    if not instance._state.adding:
+        mark_stale(UserProgress.objects.filter(word=instance).exclude(lesson_id=instance.lesson_id))
+
+
+@receiver(pre_save, sender=Lesson)
+def lesson_moving(sender, instance, **kwargs):
+    if not instance._state.adding:
+        mark_stale(UserProgress.objects.filter(lesson=instance).exclude(block_id=instance.block_id))
+
+
+@receiver(pre_delete, sender=Word)
+def word_deleting(sender, instance, **kwargs):
+    mark_stale(UserProgress.objects.filter(word=instance))
+
+
+@receiver(pre_delete, sender=Lesson)
+def lesson_deleting(sender, instance, **kwargs):
+    mark_stale(UserProgress.objects.filter(lesson=instance))
+
+
+@receiver(pre_delete, sender=Block)
+def block_deleting(sender, instance, **kwargs):
+    mark_stale(UserProgress.objects.filter(block=instance))
@@ -1,3 +1,534 @@
-from django.test import TestCase
+# progress/tests.py
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from content.catalogue import get_catalogue, bump_catalogue_version
+from content.models import Block, Lesson, UserProgress
+from tests.factories import seed_catalogue, seed_progress, create_paid_user
+from .achievements import WORDS_LEARNED, get_rules
+from .charts import daily_series, last_days, time_of_day_distribution
+from .models import Achievement, UserAchievement, UserStats, DailyProgress, LessonProgress, BlockProgress, StudySession, UserSummary
+from .services import record_answers, mark_lesson_completed, mark_block_completed
+from .summary import build_summary, get_user_summary
+from .versions import get_progress_version
+
+
+class ProgressTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.blocks = seed_catalogue(blocks=3, lessons_per_block=3, words_per_lesson=5)
+        cls.user = create_paid_user()
+
+    def setUp(self):
+        cache.clear()
+
+    def catalogue_lesson(self, block_index=0, lesson_index=0):
+        return get_catalogue().blocks[block_index].lessons[lesson_index]
+
+    def answer(self, lesson, is_correct=True, times=1):
+        answers = [(word, is_correct, 30) for word in lesson.words for _ in range(times)]
+        with self.captureOnCommitCallbacks(execute=True):
+            return record_answers(self.user, lesson, answers)
+
+    def assertSummaryActual(self):
+        stored = UserSummary.objects.get(user=self.user)
+        actual = build_summary(self.user)
+        self.assertEqual(stored.learned_words, actual.learned_words)
+        self.assertEqual(stored.words_started, actual.words_started)
+        self.assertEqual(stored.study_days, actual.study_days)
+        self.assertAlmostEqual(stored.accuracy_sum, actual.accuracy_sum)
+        self.assertEqual(stored.learned_by_block, actual.learned_by_block)
+        self.assertEqual(stored.unlocked_block_order, actual.unlocked_block_order)
+        self.assertEqual(stored.unlocked_lessons, actual.unlocked_lessons)
+
+
+class RecordAnswersTests(ProgressTestCase):
+
+    def test_counters(self):
+        lesson = self.catalogue_lesson()
+
+        progress_map = self.answer(lesson, times=3)
+
+        self.assertEqual(len(progress_map), 5)
+        self.assertTrue(all(progress.is_learned for progress in progress_map.values()))
+        lesson_progress = LessonProgress.objects.get(user=self.user, lesson_id=lesson.id)
+        self.assertEqual(lesson_progress.total_attempts, 15)
+        self.assertEqual(lesson_progress.words_learned, 5)
+        self.assertTrue(lesson_progress.is_completed)
+        daily = DailyProgress.objects.get(user=self.user, date=timezone.now().date())
+        self.assertEqual(daily.words_learned, 5)
+        self.assertEqual(daily.time_studied, 7)  # 15 ответов по 30 секунд
+
+    def test_summary_matches_rebuild(self):
+        self.answer(self.catalogue_lesson(0, 0), times=3)
+        self.answer(self.catalogue_lesson(0, 1), is_correct=False)
+        self.answer(self.catalogue_lesson(1, 0), times=2)
+        self.answer(self.catalogue_lesson(0, 1), times=4)
+
+        self.assertSummaryActual()
+        summary = get_user_summary(self.user)
+        self.assertEqual(summary.learned_words, 10)
+        self.assertEqual(summary.study_days, 1)
+
+
+    def test_does_not_depend_on_lesson_size(self):
+        self.answer(self.catalogue_lesson(0, 0), is_correct=False)
+        one_word = self.catalogue_lesson(0, 1)
+        all_words = self.catalogue_lesson(0, 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                record_answers(self.user, one_word, [(one_word.words[0], False, 10)])
+
+        with self.assertNumQueries(len(queries)):
+            self.answer(all_words, is_correct=False, times=2)
+
+    def test_words_learned_without_lesson_counted(self):
+        lesson = self.catalogue_lesson()
+        first, *rest = lesson.words
+        with self.captureOnCommitCallbacks(execute=True):
+            record_answers(self.user, None, [(first, True, 10)] * 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_answers(self.user, lesson, [(word, True, 10) for word in rest for _ in range(3)])
+
+        lesson_progress = LessonProgress.objects.get(user=self.user, lesson_id=lesson.id)
+        self.assertEqual(lesson_progress.words_learned, 5)
+        self.assertTrue(lesson_progress.is_completed)
+
+    def test_words_outside_lesson_rejected(self):
+        lesson = self.catalogue_lesson(0, 0)
+        other = self.catalogue_lesson(0, 1)
+
+        with self.assertRaises(ValueError):
+            record_answers(self.user, lesson, [(word, True, 10) for word in other.words])
+
+        self.assertFalse(LessonProgress.objects.filter(user=self.user).exists())
+        self.assertEqual(UserSummary.objects.get(user=self.user).words_started, 0)
+
+    def test_stale_summary_rebuilt_without_writing(self):
+        self.answer(self.catalogue_lesson(), times=3)
+        UserSummary.objects.filter(user=self.user).update(is_stale=True, learned_words=0)
+
+        self.assertEqual(get_user_summary(self.user).learned_words, 5)
+
+        stored = UserSummary.objects.get(user=self.user)
+        self.assertTrue(stored.is_stale)
+        self.assertEqual(stored.learned_words, 0)
+
+    def test_stale_summary_saved_by_next_write(self):
+        lesson = self.catalogue_lesson()
+        self.answer(lesson, times=3)
+        UserSummary.objects.filter(user=self.user).update(is_stale=True, learned_words=0)
+
+        self.answer(lesson)
+
+        self.assertFalse(UserSummary.objects.get(user=self.user).is_stale)
+        self.assertSummaryActual()
+
+    def test_missing_summary_not_created_on_read(self):
+        self.answer(self.catalogue_lesson(), times=3)
+        UserSummary.objects.filter(user=self.user).delete()
+
+        self.assertEqual(get_user_summary(self.user).learned_words, 5)
+        self.assertFalse(UserSummary.objects.filter(user=self.user).exists())
+
+    def test_summary_created_with_user(self):
+        user = create_paid_user('newcomer')
+
+        with self.assertNumQueries(1):
+            summary = get_user_summary(user)
+        self.assertEqual((summary.learned_words, summary.is_stale), (0, False))
+
+
+class CompletionTests(ProgressTestCase):
+
+    def complete(self, block_index, lesson_index, accuracy=90):
+        with self.captureOnCommitCallbacks(execute=True):
+            return mark_lesson_completed(self.user, self.catalogue_lesson(block_index, lesson_index), accuracy)
+
+    def test_lesson_propagates_to_block(self):
+        completion = self.complete(0, 0)
+
+        self.assertFalse(completion.all_lessons_completed)
+        self.assertIsNone(completion.next_block)
+        block_progress = BlockProgress.objects.get(user=self.user, block=self.blocks[0])
+        self.assertEqual(block_progress.lessons_completed, 1)
+        self.assertEqual(block_progress.total_lessons, 3)
+        self.assertEqual(block_progress.overall_accuracy, 90)
+
+    def test_last_lesson_completes_block(self):
+        self.complete(0, 0, 80)
+        self.complete(0, 1, 90)
+
+        completion = self.complete(0, 2, 100)
+
+        self.assertTrue(completion.all_lessons_completed)
+        self.assertTrue(completion.block_progress.is_completed)
+        self.assertEqual(completion.block_progress.overall_accuracy, 90)
+        self.assertEqual(completion.next_block.id, self.blocks[1].id)
+
+    def test_repeated_completion_counted_once(self):
+        self.complete(0, 0)
+        completion = self.complete(0, 0, 70)
+
+        self.assertEqual(completion.block_progress.lessons_completed, 1)
+        self.assertEqual(LessonProgress.objects.get(user=self.user, lesson_id=completion.lesson_progress.lesson_id).accuracy, 70)
+
+    def test_completed_block_stays_completed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_block_completed(self.user, get_catalogue().blocks[1])
+
+        completion = self.complete(1, 0)
+
+        self.assertTrue(completion.block_progress.is_completed)
+        self.assertEqual(completion.block_progress.lessons_completed, 1)
+
+    def test_does_not_depend_on_lessons_per_block(self):
+        small = self.catalogue_lesson(0, 0)
+        seed_catalogue(blocks=1, lessons_per_block=30, words_per_lesson=1)
+        cache.clear()
+        big = next(block for block in get_catalogue().blocks if len(block.lessons) == 30).lessons[0]
+        self.complete(2, 0)  # первые записи пользователя
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                mark_lesson_completed(self.user, small)
+
+        with self.assertNumQueries(len(queries)):
+            with self.captureOnCommitCallbacks(execute=True):
+                mark_lesson_completed(self.user, big)
+
+
+class UnlockFrontierTests(ProgressTestCase):
+
+    def complete(self, block_index, lesson_index):
+        with self.captureOnCommitCallbacks(execute=True):
+            return mark_lesson_completed(self.user, self.catalogue_lesson(block_index, lesson_index))
+
+    def test_new_user(self):
+        catalogue = get_catalogue()
+        summary = get_user_summary(self.user)
+
+        self.assertFalse(summary.is_block_locked(catalogue.blocks[0], catalogue))
+        self.assertTrue(summary.is_block_locked(catalogue.blocks[1], catalogue))
+        self.assertFalse(summary.is_lesson_locked(self.catalogue_lesson(0, 0), catalogue.blocks[0]))
+        self.assertTrue(summary.is_lesson_locked(self.catalogue_lesson(0, 1), catalogue.blocks[0]))
+
+    def test_lesson_completion_unlocks_next_lesson(self):
+        self.complete(0, 0)
+
+        block = get_catalogue().blocks[0]
+        summary = get_user_summary(self.user)
+        self.assertFalse(summary.is_lesson_locked(self.catalogue_lesson(0, 1), block))
+        self.assertTrue(summary.is_lesson_locked(self.catalogue_lesson(0, 2), block))
+        self.assertSummaryActual()
+
+    def test_order_gaps(self):
+        # Порядковые номера блоков и уроков идут с пропусками
+        Block.objects.filter(pk=self.blocks[1].pk).update(order=5)
+        Block.objects.filter(pk=self.blocks[2].pk).update(order=9)
+        Lesson.objects.filter(block=self.blocks[0], order=2).update(order=4)
+        bump_catalogue_version()
+
+        self.complete(0, 0)
+
+        block = get_catalogue().blocks[0]
+        summary = get_user_summary(self.user)
+        self.assertFalse(summary.is_lesson_locked(self.catalogue_lesson(0, 1), block))
+        self.assertTrue(summary.is_lesson_locked(self.catalogue_lesson(0, 2), block))
+
+        self.complete(0, 1)
+        completion = self.complete(0, 2)
+
+        catalogue = get_catalogue()
+        summary = get_user_summary(self.user)
+        self.assertEqual(completion.next_block.id, self.blocks[1].id)
+        self.assertFalse(summary.is_block_locked(catalogue.get_block(self.blocks[1].id), catalogue))
+        self.assertTrue(summary.is_block_locked(catalogue.get_block(self.blocks[2].id), catalogue))
+        self.assertSummaryActual()
+
+    def test_lock_check_without_queries(self):
+        summary = get_user_summary(self.user)
+        catalogue = get_catalogue()
+
+        with self.assertNumQueries(0):
+            for block in catalogue.blocks:
+                summary.is_block_locked(block, catalogue)
+                for lesson in block.lessons:
+                    summary.is_lesson_locked(lesson, block)
+
+
+class BlockTotalsTests(ProgressTestCase):
+
+    def test_save_uses_catalogue(self):
+        get_catalogue()
+
+        with self.assertNumQueries(1):
+            progress = BlockProgress.objects.create(user=self.user, block=self.blocks[0])
+
+        self.assertEqual(progress.total_lessons, 3)
+
+    def test_sync_command(self):
+        BlockProgress.objects.create(user=self.user, block=self.blocks[0])
+        BlockProgress.objects.create(user=self.user, block=self.blocks[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson = self.blocks[2].lessons.first()
+            lesson.is_active = False
+            lesson.save()
+
+        out = StringIO()
+        call_command('sync_block_totals', '--batch-size', '1', stdout=out)
+
+        self.assertIn('Обновлено записей: 1', out.getvalue())
+        totals = dict(BlockProgress.objects.values_list('block_id', 'total_lessons'))
+        self.assertEqual(totals, {self.blocks[0].id: 3, self.blocks[2].id: 2})
+
+
+class AchievementTests(ProgressTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Достижения по умолчанию создает миграция 0003
+        Achievement.objects.all().delete()
+        self.first_words = Achievement.objects.create(
+            name='Первое слово', description='', achievement_type='first_words'
+        )
+        self.words_10 = Achievement.objects.create(
+            name='10 слов', description='', achievement_type='words_10'
+        )
+        self.first_lesson = Achievement.objects.create(
+            name='Первый урок', description='', achievement_type='first_lesson'
+        )
+        self.custom = Achievement.objects.create(
+            name='Особое', description='', achievement_type='speed_learner',
+            condition={'counter': 'words_learned', 'threshold': 7},
+        )
+        cache.clear()
+
+    def awarded(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement_id', flat=True))
+
+    def test_thresholds(self):
+        self.answer(self.catalogue_lesson(0, 0), times=3)
+
+        self.assertEqual(self.awarded(), {self.first_words.id, self.first_lesson.id})
+
+        self.answer(self.catalogue_lesson(0, 1), times=3)
+
+        self.assertEqual(
+            self.awarded(),
+            {self.first_words.id, self.first_lesson.id, self.words_10.id, self.custom.id}
+        )
+
+    def test_not_awarded_without_progress(self):
+        self.answer(self.catalogue_lesson(), is_correct=False)
+
+        self.assertEqual(self.awarded(), set())
+
+    def test_streak_resets_after_gap(self):
+        streak_2 = Achievement.objects.create(name='2 дня', description='', achievement_type='streak_2')
+        cache.clear()
+        today = timezone.now().date()
+        UserStats.objects.create(user=self.user, current_streak=5, longest_streak=5)
+        # date заполняется auto_now_add, сдвигаем его UPDATE
+        daily = DailyProgress.objects.create(user=self.user)
+        DailyProgress.objects.filter(pk=daily.pk).update(date=today - timedelta(days=3))
+
+        self.answer(self.catalogue_lesson())
+
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.current_streak, 1)
+        self.assertEqual(stats.longest_streak, 5)
+        self.assertNotIn(streak_2.id, self.awarded())
+
+    def test_streak_continues_from_yesterday(self):
+        streak_2 = Achievement.objects.create(name='2 дня', description='', achievement_type='streak_2')
+        cache.clear()
+        today = timezone.now().date()
+        UserStats.objects.create(user=self.user, current_streak=1, longest_streak=1)
+        # date заполняется auto_now_add, сдвигаем его UPDATE
+        daily = DailyProgress.objects.create(user=self.user)
+        DailyProgress.objects.filter(pk=daily.pk).update(date=today - timedelta(days=1))
+
+        self.answer(self.catalogue_lesson())
+
+        self.assertEqual(UserStats.objects.get(user=self.user).current_streak, 2)
+        self.assertIn(streak_2.id, self.awarded())
+
+    @override_settings(ACHIEVEMENTS_CACHE_TIMEOUT=60)
+    def test_rules_reloaded_after_version_expires(self):
+        get_rules()
+        # Правка в другом воркере: версия в кеше этого процесса не меняется
+        words_3 = Achievement.objects.create(name='3 слова', description='', achievement_type='words_3')
+        self.assertNotIn((3, words_3.id), get_rules()[WORDS_LEARNED])
+
+        with mock.patch('time.time', return_value=time.time() + 61):
+            rules = get_rules()
+
+        self.assertIn((3, words_3.id), rules[WORDS_LEARNED])
+
+    def test_sync_command_bumps_progress_version(self):
+        self.answer(self.catalogue_lesson(0, 0), times=3)
+        other = create_paid_user('other')
+        UserAchievement.objects.filter(user=self.user).delete()
+        versions = {user.pk: get_progress_version(user.pk) for user in (self.user, other)}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('sync_achievements', stdout=StringIO())
+
+        self.assertEqual(self.awarded(), {self.first_words.id, self.first_lesson.id})
+        self.assertNotEqual(get_progress_version(self.user.pk), versions[self.user.pk])
+        self.assertEqual(get_progress_version(other.pk), versions[other.pk])
+
+
+class ChartsTests(ProgressTestCase):
+
+    def test_daily_series_fills_gaps(self):
+        seed_progress(self.user, self.blocks, days=3)
+        DailyProgress.objects.filter(user=self.user, date=timezone.now().date() - timedelta(days=1)).delete()
+        start, end = last_days(5)
+
+        series = daily_series(self.user, start, end)
+        sparse = daily_series(self.user, start, end, fill_gaps=False)
+
+        self.assertEqual([point['words_learned'] for point in series], [0, 0, 5, 0, 5])
+        self.assertEqual(series[-1]['date'], end.strftime('%Y-%m-%d'))
+        self.assertEqual(len(sparse), 2)
+
+    @override_settings(TIME_ZONE='Europe/Moscow')
+    def test_time_of_day_in_local_time(self):
+        session = StudySession.objects.create(user=self.user, duration=20)
+        # 04:00 UTC - 07:00 по Москве
+        start_time = timezone.now().replace(hour=4, minute=0, second=0, microsecond=0, tzinfo=dt_timezone.utc)
+        StudySession.objects.filter(pk=session.pk).update(start_time=start_time)
+
+        distribution = time_of_day_distribution(self.user, start_time - timedelta(days=1))
+
+        self.assertEqual(distribution, {'morning': 20, 'afternoon': 0, 'evening': 0, 'night': 0})
+
+
+class PruneDefaultProgressCommandTests(ProgressTestCase):
+
+    def test_keeps_lessons_with_wrong_answers(self):
+        self.answer(self.catalogue_lesson(0, 0), is_correct=False)
+        untouched = LessonProgress.objects.create(user=self.user, lesson_id=self.catalogue_lesson(0, 1).id)
+
+        call_command('prune_default_progress', stdout=StringIO())
+
+        self.assertFalse(LessonProgress.objects.filter(pk=untouched.pk).exists())
+        kept = LessonProgress.objects.get(user=self.user, lesson_id=self.catalogue_lesson(0, 0).id)
+        self.assertEqual(kept.total_attempts, 5)
+
+
+class RebuildSummariesCommandTests(ProgressTestCase):
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('rebuild_summaries', *args, stdout=out)
+        return out.getvalue()
+
+    def test_check_and_rebuild(self):
+        self.answer(self.catalogue_lesson(), times=3)
+        UserSummary.objects.filter(user=self.user).update(learned_words=0)
+
+        output = self.call('--check')
+
+        self.assertIn(f'Расхождение у пользователя {self.user.pk}', output)
+        self.assertEqual(UserSummary.objects.get(user=self.user).learned_words, 0)
+
+        self.call()
+
+        self.assertSummaryActual()
+        self.assertIn('расхождений: 0', self.call('--check'))
+
+    def test_applies_learned_rule(self):
+        self.answer(self.catalogue_lesson(), times=3)
+        # Записи, загруженные в обход save()
+        UserProgress.objects.filter(user=self.user).update(is_learned=False)
+
+        self.assertIn('не отмечено выученных слов: 5', self.call('--check'))
+        self.call()
+
+        self.assertEqual(UserProgress.objects.filter(user=self.user, is_learned=True).count(), 5)
+        self.assertEqual(UserSummary.objects.get(user=self.user).learned_words, 5)
+
+    def test_bumps_progress_version_of_changed_users(self):
+        self.answer(self.catalogue_lesson(), times=3)
+        other = create_paid_user('other')
+        UserProgress.objects.filter(user=self.user).update(is_learned=False)
+        versions = {user.pk: get_progress_version(user.pk) for user in (self.user, other)}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.call('--check')
+        self.assertEqual(get_progress_version(self.user.pk), versions[self.user.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.call()
+
+        self.assertNotEqual(get_progress_version(self.user.pk), versions[self.user.pk])
+        self.assertEqual(get_progress_version(other.pk), versions[other.pk])
+
+    def test_creates_missing_summary(self):
+        # Пользователь без прогресса и без сводки (созданный до UserSummary)
+        UserSummary.objects.filter(user=self.user).delete()
+
+        self.assertIn('расхождений: 1', self.call())
+
+        self.assertSummaryActual()
+
+
+class GenerateDatasetCommandTests(TestCase):
+
+    def setUp(self):
+        self.admin = create_paid_user('admin', is_staff=True)
+        self.admin.set_password('secret')
+        self.admin.save()
+        self.path = os.path.join(tempfile.mkdtemp(), 'dataset.jsonl.gz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.path))
+
+    def generate(self, *args):
+        call_command(
+            'generate_dataset', '--blocks=2', '--lessons=2', '--words=3', '--users=3',
+            '--words-per-user=5', '--days=5', *args, stdout=StringIO(),
+        )
+
+    def read_rows(self):
+        rows, model = {}, None
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                if isinstance(row, dict):
+                    model = row['model']
+                    rows[model] = []
+                else:
+                    rows[model].append(row)
+        return rows
+
+    def test_export_skips_existing_users(self):
+        self.generate(f'--export={self.path}')
+
+        rows = self.read_rows()
+        user_ids = {row[0] for row in rows['users.user']}
+        self.assertEqual(len(user_ids), 3)
+        self.assertNotIn(self.admin.pk, user_ids)
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            content = f.read()
+        self.assertNotIn(self.admin.password, content)
+        self.assertNotIn(str(self.admin.auth_token), content)
+        self.assertEqual(len(rows['content.block']), 2)
 
-# Create your tests here.
@@ -0,0 +1,48 @@
+# progress/versions.py
+
+"""
+Версия прогресса пользователя.
+
+Меняется при каждой записи прогресса (ответы, завершение урока/блока,
+тест, сессия) и при сохранении пользователя. Используется как ETag и
+часть ключа кеша ответов статистики (см. api.caching).
+"""
+
+import uuid
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+PROGRESS_VERSION_KEY = 'progress:user:{user_id}:version'
+
+
+def get_progress_version(user_id):
+    key = PROGRESS_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, settings.PROGRESS_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_progress_version(user_id):
+    cache.set(
+        PROGRESS_VERSION_KEY.format(user_id=user_id),
+        uuid.uuid4().hex,
+        settings.PROGRESS_CACHE_TIMEOUT
+    )
+
+
+def progress_changed(user):
+    """Сбрасывает кеш статистики пользователя после фиксации транзакции"""
+    user_id = user.pk
+    transaction.on_commit(lambda: bump_progress_version(user_id))
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    # В ответах есть поля пользователя (is_paid, payment_date)
+    progress_changed(instance)
@@ -39,6 +39,10 @@ class LessonDetailPage {
         this.domCache = new Map();
         this.lessonStartTime = Date.now();
         this.isLessonCompleted = false;
+
+        // Ответы копятся локально и отправляются пачкой
+        this.pendingAnswers = [];
+        this.lastAnswerTime = Date.now();
     }
 
     getLessonIdFromUrl() {
@@ -797,25 +801,44 @@ class LessonDetailPage {
     }
 
     async updateWordProgress(wordId, isCorrect, lessonId) {
+        const now = Date.now();
+        this.pendingAnswers.push({
+            word_id: wordId,
+            is_correct: isCorrect,
+            time_spent: Math.round((now - this.lastAnswerTime) / 1000)
+        });
+        this.lastAnswerTime = now;
+
+        console.log('Word progress queued:', { wordId, isCorrect, lessonId, pending: this.pendingAnswers.length });
+    }
+
+    async flushProgress(options = {}) {
+        if (this.pendingAnswers.length === 0) {
+            return null;
+        }
+
+        const answers = this.pendingAnswers.splice(0);
+
         try {
-            console.log('Updating word progress:', { wordId, isCorrect, lessonId });
-            
-            const result = await this.auth.apiCall('/progress/update/', {
+            console.log('Flushing word progress:', answers.length, 'answers');
+
+            const result = await this.auth.apiCall('/progress/update/batch/', {
                 method: 'POST',
                 body: JSON.stringify({
-                    word_id: wordId,
-                    is_correct: isCorrect,
-                    lesson_id: lessonId,
-                    time_spent: Math.round((Date.now() - this.lessonStartTime) / 1000)
-                })
+                    lesson_id: this.lessonId,
+                    answers: answers
+                }),
+                ...options
             });
-            
-            console.log('Word progress updated:', result);
+
+            console.log('Word progress saved:', result);
             return result;
         } catch (error) {
+            // Возвращаем ответы в очередь - отправим при следующей возможности
+            this.pendingAnswers.unshift(...answers);
             console.error('Progress update error:', error);
             this.showToast('Ошибка сохранения прогресса', 'error');
-            throw error;
+            return null;
         }
     }
 
@@ -860,6 +883,7 @@ class LessonDetailPage {
             descriptionElement.textContent = description;
         }
         
+        await this.flushProgress();
         await this.saveLessonCompletion(percentage);
     }
 
@@ -903,6 +927,11 @@ class LessonDetailPage {
 
     goToStage(stage) {
         console.log('Going to stage:', stage);
+
+        // Упражнение закончилось - отправляем накопленные ответы
+        if (stage !== 'results') {
+            this.flushProgress();
+        }
         
         document.querySelectorAll('.lesson-stage').forEach(el => {
             el.classList.remove('active');
@@ -984,6 +1013,10 @@ class LessonDetailPage {
 
     setupEventListeners() {
         console.log('Setting up event listeners...');
+
+        // Досылаем ответы после восстановления связи и при уходе со страницы
+        window.addEventListener('online', () => this.flushProgress());
+        window.addEventListener('pagehide', () => this.flushProgress({ keepalive: true }));
         
         document.addEventListener('keypress', (e) => {
             if (e.key === 'Enter' && this.currentStage === 'exercise3') {
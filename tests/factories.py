@@ -0,0 +1,75 @@
+# tests/factories.py
+
+"""
+Наполнение базы для тестов: каталог и пользователи с частичным прогрессом.
+Каталог и пользователи - из content.fixtures и users.fixtures, они же
+нужны команде bench_api.
+"""
+
+from datetime import timedelta
+from django.utils import timezone
+from content.fixtures import seed_catalogue  # noqa: F401
+from content.models import UserProgress
+from progress.models import (
+    UserStats, DailyProgress, LessonProgress, BlockProgress, StudySession
+)
+from progress.summary import rebuild_summary
+from users.fixtures import create_paid_user  # noqa: F401
+
+
+def seed_progress(user, blocks, completed_blocks=1, days=10):
+    """
+    Прогресс пользователя: первые completed_blocks блоков пройдены
+    (все слова выучены), в следующем блоке начат первый урок,
+    days дней активности и по сессии на каждый день.
+    """
+    now = timezone.now()
+    progress = []
+    for block in blocks[:completed_blocks + 1]:
+        started_only = block.order > completed_blocks
+        for lesson in block.lessons.all():
+            for word in lesson.words.all():
+                progress.append(UserProgress(
+                    user=user, word=word, lesson=lesson, block=block,
+                    is_learned=not started_only,
+                    correct_answers=3 if not started_only else 2,
+                    total_attempts=3,
+                ))
+            if started_only:
+                break
+    UserProgress.objects.bulk_create(progress)
+
+    LessonProgress.objects.bulk_create([
+        LessonProgress(
+            user=user, lesson=lesson, is_completed=True, completed_at=now,
+            accuracy=100, correct_answers=30, total_attempts=30, words_learned=10,
+        )
+        for block in blocks[:completed_blocks]
+        for lesson in block.lessons.filter(is_active=True)
+    ])
+    BlockProgress.objects.bulk_create([
+        BlockProgress(
+            user=user, block=block, is_completed=True, completed_at=now,
+            overall_accuracy=100, lessons_completed=block.lessons.filter(is_active=True).count(),
+            total_lessons=block.lessons.filter(is_active=True).count(),
+        )
+        for block in blocks[:completed_blocks]
+    ])
+
+    # date и start_time заполняются auto_now_add, поэтому сдвигаем их UPDATE.
+    # Сегодняшний день - последним, иначе конфликт по (user, date)
+    today = now.date()
+    for day in reversed(range(days)):
+        daily = DailyProgress.objects.create(
+            user=user, words_learned=5, time_studied=20,
+            correct_answers=9, total_attempts=10, accuracy=90,
+        )
+        DailyProgress.objects.filter(pk=daily.pk).update(date=today - timedelta(days=day))
+        session = StudySession.objects.create(user=user, duration=20)
+        StudySession.objects.filter(pk=session.pk).update(start_time=now - timedelta(days=day))
+    UserStats.objects.create(
+        user=user, total_study_time=20 * days, total_sessions=days,
+        current_streak=days, longest_streak=days,
+    )
+    # Прогресс вставлен в обход record_answers, сводку пересобираем
+    rebuild_summary(user, user.summary)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        # Сброс кеша аутентификации при изменении пользователя
+        from . import signals  # noqa: F401
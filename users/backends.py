@@ -1,44 +1,128 @@
 # users/backends.py
 
+import hashlib
+import logging
+import uuid
+from django.conf import settings
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.cache import cache
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+# Кеш аутентификации: токен -> id пользователя и id -> поля пользователя.
+# Промахи по токену тоже кешируются (MISSING), чтобы перебор токенов
+# не доходил до базы. Записи сбрасываются при сохранении и удалении
+# пользователя (users.signals). С кешем в памяти процесса (AUTH_CACHE=False)
+# сброс видит только свой воркер, поэтому кеш не используется: иначе
+# остальные воркеры до AUTH_CACHE_TIMEOUT пускали бы заблокированных
+# пользователей и сессии после смены пароля.
+TOKEN_KEY = 'auth:token:{token}'
+USER_KEY = 'auth:user:{user_id}'
+MISSING = 0
+
+# Кеш может быть общим, поэтому в нем только то, что нужно для проверки
+# доступа: без пароля, токена и личных данных. Токен и пароль хранятся
+# хешами (для сверки токена и хеша сессии), остальные поля пользователь
+# подгружает из базы одним запросом при первом обращении (User.refresh_from_db).
+AUTH_CACHE_FIELDS = ('id', 'is_active', 'is_paid', 'is_staff', 'is_superuser')
+
+
+def normalize_token(token):
+    """Токен в каноническом виде или None, если это не UUID"""
+    try:
+        return uuid.UUID(str(token)).hex
+    except ValueError:
+        return None
+
+
+def token_digest(token):
+    return hashlib.sha256(str(normalize_token(token)).encode()).hexdigest()
+
+
+def _user_from_cache(entry):
+    """Пользователь с полями AUTH_CACHE_FIELDS, остальные отложены"""
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in entry['fields']]
+    user = User.from_db(None, names, [entry['fields'][name] for name in names])
+    user.token_digest = entry['token_digest']
+    user.cached_session_auth_hash = entry['session_auth_hash']
+    return user
+
+
+def _user_from_db(**lookup):
+    """Пользователь из базы в обход кеша (AUTH_CACHE=False)"""
+    user = User.objects.filter(**lookup).first()
+    if user is not None:
+        user.token_digest = token_digest(user.auth_token)
+    return user
+
+
+def get_cached_user(user_id):
+    if not settings.AUTH_CACHE:
+        return _user_from_db(pk=user_id)
+    key = USER_KEY.format(user_id=user_id)
+    entry = cache.get(key)
+    if entry is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        entry = {
+            'fields': {name: getattr(user, name) for name in AUTH_CACHE_FIELDS},
+            'token_digest': token_digest(user.auth_token),
+            'session_auth_hash': user.get_session_auth_hash(),
+        }
+        cache.set(key, entry, settings.AUTH_CACHE_TIMEOUT)
+    return _user_from_cache(entry)
+
+
+def invalidate_user_cache(user):
+    cache.delete_many([
+        USER_KEY.format(user_id=user.pk),
+        TOKEN_KEY.format(token=normalize_token(user.auth_token)),
+    ])
+
+
 class TokenBackend(BaseBackend):
     """
     Кастомная аутентификация через токен
     """
     def authenticate(self, request, token=None, **kwargs):
         if not token:
-            print("❌ No token provided")
             return None
-            
-        try:
-            print(f"🔐 Authenticating with token: {token}")
-            
-            # Ищем пользователя по токену
-            user = User.objects.get(auth_token=token)
-            print(f"✅ User found: {user.username}, is_paid: {user.is_paid}")
-            
-            # Проверяем оплату
-            if user.is_paid:
-                print("✅ Payment confirmed - user authenticated")
-                return user
-            else:
-                print("❌ User not paid - authentication failed")
-                return None
-                
-        except User.DoesNotExist:
-            print("❌ User not found with this token")
+
+        token = normalize_token(token)
+        if token is None:
+            logger.info('Token authentication failed: malformed token')
+            return None
+
+        # Ищем пользователя по токену
+        if not settings.AUTH_CACHE:
+            user = _user_from_db(auth_token=token)
+        else:
+            user = self._get_cached_user_by_token(token)
+        # Токен могли сменить после того, как он попал в кеш
+        if user is None or user.token_digest != token_digest(token):
+            logger.info('Token authentication failed: user not found')
             return None
-        except Exception as e:
-            print(f"❌ Authentication error: {e}")
+
+        # Проверяем оплату
+        if not user.is_paid:
+            logger.info('Token authentication failed: user %s not paid', user.pk)
             return None
+        return user
+
+    def _get_cached_user_by_token(self, token):
+        token_key = TOKEN_KEY.format(token=token)
+        user_id = cache.get(token_key)
+        if user_id is None:
+            user_id = User.objects.filter(auth_token=token).values_list('pk', flat=True).first()
+            if user_id is None:
+                cache.set(token_key, MISSING, settings.AUTH_NEGATIVE_CACHE_TIMEOUT)
+            else:
+                cache.set(token_key, user_id, settings.AUTH_CACHE_TIMEOUT)
+        return get_cached_user(user_id) if user_id != MISSING else None
 
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        return get_cached_user(user_id)
@@ -0,0 +1,32 @@
+# users/checks.py
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_session_cache_backend(app_configs, **kwargs):
+    """Сессии в кеше (core/sessions.py) требуют общего для воркеров кеша"""
+    if settings.SESSION_ENGINE == 'core.sessions' and settings.CACHES['default']['BACKEND'] in settings.LOCAL_CACHE_BACKENDS:
+        return [Warning(
+            'SESSION_ENGINE=core.sessions с кешем в памяти процесса: после '
+            'выхода другие воркеры продолжат принимать куку сессии.',
+            hint='Задайте общий кеш (CACHE_URL=rediscache://...) или '
+                 'SESSION_ENGINE=django.contrib.sessions.backends.db.',
+            id='users.W001',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_auth_cache_backend(app_configs, **kwargs):
+    """Кеш TokenBackend (users/backends.py) сбрасывается только в общем кеше"""
+    if settings.AUTH_CACHE and settings.CACHES['default']['BACKEND'] in settings.LOCAL_CACHE_BACKENDS:
+        return [Warning(
+            'AUTH_CACHE с кешем в памяти процесса: другие воркеры до '
+            f'AUTH_CACHE_TIMEOUT ({settings.AUTH_CACHE_TIMEOUT} с) пускают '
+            'заблокированных пользователей, старые токены и сессии после смены пароля.',
+            hint='Задайте общий кеш (CACHE_URL=rediscache://...) или AUTH_CACHE=False.',
+            id='users.W002',
+        )]
+    return []
@@ -0,0 +1,10 @@
+# users/fixtures.py
+
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def create_paid_user(username='student', **kwargs):
+    kwargs.setdefault('is_paid', True)
+    return User.objects.create(username=username, **kwargs)
@@ -13,4 +13,21 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"{self.username} ({self.telegram_id})"
\ No newline at end of file
+        return f"{self.username} ({self.telegram_id})"
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Пользователь из кеша аутентификации (users.backends) загружен
+        # не полностью: отложенные поля подгружаем разом, одним запросом
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+    def set_password(self, raw_password):
+        self.cached_session_auth_hash = None
+        super().set_password(raw_password)
+
+    def get_session_auth_hash(self):
+        # Из кеша аутентификации - без загрузки пароля на каждый запрос
+        cached = getattr(self, 'cached_session_auth_hash', None)
+        return cached or super().get_session_auth_hash()
\ No newline at end of file
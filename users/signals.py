@@ -0,0 +1,19 @@
+# users/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .backends import invalidate_user_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Сбрасываем кеш аутентификации (оплата, токен, блокировка)"""
+    invalidate_user_cache(instance)
+    # Повторно после коммита: параллельный запрос мог успеть
+    # закешировать старую версию из базы
+    transaction.on_commit(lambda: invalidate_user_cache(instance))
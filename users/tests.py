@@ -1,3 +1,178 @@
-from django.test import TestCase
+# users/tests.py
 
-# Create your tests here.
+import time
+import uuid
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from core.sessions import SessionStore, REFRESHED_AT_KEY
+from tests.factories import create_paid_user
+from .backends import TokenBackend, USER_KEY
+from .models import User
+from .checks import check_auth_cache_backend, check_session_cache_backend
+
+
+class TokenBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_paid_user()
+
+    def setUp(self):
+        cache.clear()
+        self.backend = TokenBackend()
+
+    def authenticate(self, token):
+        return self.backend.authenticate(None, token=token)
+
+    def test_valid_token(self):
+        self.assertEqual(self.authenticate(str(self.user.auth_token)), self.user)
+
+    def test_token_formats(self):
+        # UUID без дефисов и в верхнем регистре - тот же токен
+        self.assertEqual(self.authenticate(self.user.auth_token.hex.upper()), self.user)
+
+    def test_unpaid_user(self):
+        user = create_paid_user('unpaid', is_paid=False)
+
+        self.assertIsNone(self.authenticate(str(user.auth_token)))
+
+    def test_malformed_token(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.authenticate('not-a-token'))
+            self.assertIsNone(self.authenticate(''))
+
+    def test_cached(self):
+        self.authenticate(str(self.user.auth_token))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(str(self.user.auth_token)), self.user)
+
+    def test_unknown_token_cached(self):
+        token = str(uuid.uuid4())
+        self.assertIsNone(self.authenticate(token))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.authenticate(token))
+
+    def test_cache_holds_no_secrets(self):
+        self.user.set_password('secret')
+        self.user.save()
+        self.authenticate(str(self.user.auth_token))
+
+        entry = cache.get(USER_KEY.format(user_id=self.user.pk))
+
+        self.assertNotIn('password', entry['fields'])
+        self.assertNotIn(self.user.password, str(entry))
+        self.assertNotIn(self.user.auth_token.hex, str(entry))
+
+    def test_deferred_fields_loaded_at_once(self):
+        self.authenticate(str(self.user.auth_token))
+        user = self.authenticate(str(self.user.auth_token))
+
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.email, user.date_joined),
+                             (self.user.username, self.user.email, self.user.date_joined))
+        self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+
+    def test_invalidated_on_save(self):
+        token = str(self.user.auth_token)
+        self.authenticate(token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_paid = False
+            self.user.save()
+
+        self.assertIsNone(self.authenticate(token))
+
+    def test_old_token_rejected_after_change(self):
+        old_token = str(self.user.auth_token)
+        self.authenticate(old_token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.auth_token = uuid.uuid4()
+            self.user.save()
+
+        self.assertIsNone(self.authenticate(old_token))
+        self.assertEqual(self.authenticate(str(self.user.auth_token)), self.user)
+
+    @override_settings(AUTH_CACHE=False)
+    def test_revocation_without_shared_cache(self):
+        # Сигналы сбрасывают только кеш своего воркера: изменение
+        # в обход save() моделирует правку, сделанную в другом процессе
+        token = str(self.user.auth_token)
+        self.assertEqual(self.authenticate(token), self.user)
+
+        User.objects.filter(pk=self.user.pk).update(is_paid=False)
+        self.assertIsNone(self.authenticate(token))
+
+        User.objects.filter(pk=self.user.pk).update(is_paid=True, auth_token=uuid.uuid4())
+        self.assertIsNone(self.authenticate(token))
+
+        User.objects.filter(pk=self.user.pk).update(password='changed')
+        self.assertNotEqual(self.backend.get_user(self.user.pk).get_session_auth_hash(),
+                            self.user.get_session_auth_hash())
+        self.assertFalse(cache.has_key(USER_KEY.format(user_id=self.user.pk)))
+
+
+@override_settings(SESSION_REFRESH_INTERVAL=60)
+class SessionStoreTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.session = SessionStore()
+        self.session['user'] = 1
+        self.session.save()
+
+    def load(self):
+        session = SessionStore(self.session.session_key)
+        session.load()
+        return session
+
+    def test_unchanged_session_not_written(self):
+        session = self.load()
+
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_modified_session_written(self):
+        session = self.load()
+        session['user'] = 2
+
+        session.save()
+
+        cache.clear()
+        self.assertEqual(self.load()['user'], 2)
+
+    def test_refreshed_after_interval(self):
+        session = self.load()
+        session._session[REFRESHED_AT_KEY] = int(time.time()) - 61
+
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+
+        self.assertTrue(queries)
+
+
+class SessionEngineCheckTests(TestCase):
+
+    @override_settings(SESSION_ENGINE='core.sessions')
+    def test_local_cache_warning(self):
+        messages = check_session_cache_backend(None)
+
+        self.assertEqual([message.id for message in messages], ['users.W001'])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_db_sessions(self):
+        self.assertEqual(check_session_cache_backend(None), [])
+
+    @override_settings(AUTH_CACHE=True)
+    def test_local_auth_cache_warning(self):
+        messages = check_auth_cache_backend(None)
+
+        self.assertEqual([message.id for message in messages], ['users.W002'])
+
+    @override_settings(AUTH_CACHE=False)
+    def test_auth_cache_disabled(self):
+        self.assertEqual(check_auth_cache_backend(None), [])